@@ -6,10 +6,12 @@ Provides comprehensive analytics for all roles
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional, List
 from datetime import date
+from sqlalchemy.orm import Session
 
 from app.services.analytics_service import AnalyticsService
 from app.services.financial_analytics import FinancialAnalytics
 from app.api.auth import get_current_user
+from app.database import get_db
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
@@ -19,10 +21,11 @@ financial_analytics = FinancialAnalytics()
 
 
 @router.get("/overview")
-async def get_overview_stats(
+def get_overview_stats(
     academic_year_id: int = Query(..., description="Academic year ID"),
     session_type: Optional[str] = Query(None, description="morning or evening"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get high-level overview statistics
@@ -34,6 +37,7 @@ async def get_overview_stats(
             session_type = "morning" if current_user.role == "morning_school" else "evening"
         
         stats = analytics_service.get_overview_stats(
+            db=db,
             academic_year_id=academic_year_id,
             session_type=session_type,
             user_role=current_user.role
@@ -48,10 +52,11 @@ async def get_overview_stats(
 
 
 @router.get("/students/distribution")
-async def get_student_distribution(
+def get_student_distribution(
     academic_year_id: int = Query(..., description="Academic year ID"),
     session_type: Optional[str] = Query(None, description="morning or evening"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get student distribution by grade, gender, transportation, and section
@@ -62,6 +67,7 @@ async def get_student_distribution(
             session_type = "morning" if current_user.role == "morning_school" else "evening"
         
         distribution = analytics_service.get_student_distribution(
+            db=db,
             academic_year_id=academic_year_id,
             session_type=session_type
         )
@@ -75,11 +81,12 @@ async def get_student_distribution(
 
 
 @router.get("/academic/performance")
-async def get_academic_performance(
+def get_academic_performance(
     academic_year_id: int = Query(..., description="Academic year ID"),
     session_type: Optional[str] = Query(None, description="morning or evening"),
     class_id: Optional[int] = Query(None, description="Specific class ID"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get academic performance statistics including exam grades and subject performance
@@ -90,6 +97,7 @@ async def get_academic_performance(
             session_type = "morning" if current_user.role == "morning_school" else "evening"
         
         performance = analytics_service.get_academic_performance(
+            db=db,
             academic_year_id=academic_year_id,
             session_type=session_type,
             class_id=class_id
@@ -104,11 +112,12 @@ async def get_academic_performance(
 
 
 @router.get("/attendance")
-async def get_attendance_analytics(
+def get_attendance_analytics(
     academic_year_id: int = Query(..., description="Academic year ID"),
     period_type: str = Query("monthly", description="daily, weekly, monthly, yearly"),
     session_type: Optional[str] = Query(None, description="morning or evening"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get attendance analytics for students and teachers
@@ -119,6 +128,7 @@ async def get_attendance_analytics(
             session_type = "morning" if current_user.role == "morning_school" else "evening"
         
         attendance = analytics_service.get_attendance_analytics(
+            db=db,
             academic_year_id=academic_year_id,
             period_type=period_type,
             session_type=session_type
@@ -132,15 +142,48 @@ async def get_attendance_analytics(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/dashboard")
+def get_full_dashboard(
+    academic_year_id: int = Query(..., description="Academic year ID"),
+    period_type: str = Query("monthly", description="daily, weekly, monthly, yearly"),
+    session_type: Optional[str] = Query(None, description="morning or evening"),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get overview, distribution, academic performance and attendance in one request
+    """
+    try:
+        # Apply role-based filtering
+        if current_user.role in ["morning_school", "evening_school"]:
+            session_type = "morning" if current_user.role == "morning_school" else "evening"
+        
+        dashboard = analytics_service.get_full_dashboard(
+            db=db,
+            academic_year_id=academic_year_id,
+            period_type=period_type,
+            session_type=session_type,
+            user_role=current_user.role
+        )
+        
+        return {
+            "success": True,
+            "data": dashboard
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # =========================
 # FINANCIAL ENDPOINTS
 # =========================
 
 @router.get("/finance/overview")
-async def get_financial_overview(
+def get_financial_overview(
     academic_year_id: int = Query(..., description="Academic year ID"),
     period_type: str = Query("monthly", description="daily, weekly, monthly, yearly"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get comprehensive financial overview
@@ -151,6 +194,7 @@ async def get_financial_overview(
             raise HTTPException(status_code=403, detail="Access denied")
         
         overview = financial_analytics.get_financial_overview(
+            db=db,
             academic_year_id=academic_year_id,
             period_type=period_type
         )
@@ -166,10 +210,11 @@ async def get_financial_overview(
 
 
 @router.get("/finance/income-trends")
-async def get_income_trends(
+def get_income_trends(
     academic_year_id: int = Query(..., description="Academic year ID"),
     period_type: str = Query("monthly", description="daily, weekly, monthly, yearly"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get income trends over time with category breakdown
@@ -179,6 +224,7 @@ async def get_income_trends(
             raise HTTPException(status_code=403, detail="Access denied")
         
         trends = financial_analytics.get_income_trends(
+            db=db,
             academic_year_id=academic_year_id,
             period_type=period_type
         )
@@ -194,10 +240,11 @@ async def get_income_trends(
 
 
 @router.get("/finance/expense-trends")
-async def get_expense_trends(
+def get_expense_trends(
     academic_year_id: int = Query(..., description="Academic year ID"),
     period_type: str = Query("monthly", description="daily, weekly, monthly, yearly"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get expense trends over time with category breakdown and budget analysis
@@ -207,6 +254,7 @@ async def get_expense_trends(
             raise HTTPException(status_code=403, detail="Access denied")
         
         trends = financial_analytics.get_expense_trends(
+            db=db,
             academic_year_id=academic_year_id,
             period_type=period_type
         )
@@ -222,10 +270,11 @@ async def get_expense_trends(
 
 
 @router.get("/finance/outstanding-payments")
-async def get_outstanding_payments(
+def get_outstanding_payments(
     academic_year_id: int = Query(..., description="Academic year ID"),
     limit: int = Query(50, description="Maximum number of records to return"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get list of students with outstanding payments
@@ -235,6 +284,7 @@ async def get_outstanding_payments(
             raise HTTPException(status_code=403, detail="Access denied")
         
         outstanding = financial_analytics.get_outstanding_payments(
+            db=db,
             academic_year_id=academic_year_id,
             limit=limit
         )
@@ -250,9 +300,10 @@ async def get_outstanding_payments(
 
 
 @router.get("/finance/activity-analysis")
-async def get_activity_financial_analysis(
+def get_activity_financial_analysis(
     academic_year_id: int = Query(..., description="Academic year ID"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get financial analysis of activities
@@ -262,6 +313,7 @@ async def get_activity_financial_analysis(
             raise HTTPException(status_code=403, detail="Access denied")
         
         analysis = financial_analytics.get_activity_financial_analysis(
+            db=db,
             academic_year_id=academic_year_id
         )
         
@@ -280,11 +332,12 @@ async def get_activity_financial_analysis(
 # =========================
 
 @router.get("/comparison/year-over-year")
-async def compare_year_over_year(
+def compare_year_over_year(
     current_year_id: int = Query(..., description="Current academic year ID"),
     previous_year_id: int = Query(..., description="Previous academic year ID"),
     metric_type: str = Query(..., description="students, finance, attendance, academic"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Compare metrics between two academic years
@@ -304,8 +357,8 @@ async def compare_year_over_year(
         }
         
         if metric_type == "students":
-            current_stats = analytics_service.get_overview_stats(current_year_id)
-            previous_stats = analytics_service.get_overview_stats(previous_year_id)
+            current_stats = analytics_service.get_overview_stats(db, current_year_id)
+            previous_stats = analytics_service.get_overview_stats(db, previous_year_id)
             
             comparison_data["comparison"]["current"] = current_stats
             comparison_data["comparison"]["previous"] = previous_stats
@@ -325,10 +378,11 @@ async def compare_year_over_year(
 
 
 @router.get("/comparison/session-comparison")
-async def compare_sessions(
+def compare_sessions(
     academic_year_id: int = Query(..., description="Academic year ID"),
     metric_type: str = Query(..., description="students, finance, attendance, academic"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Compare metrics between morning and evening sessions
@@ -339,12 +393,12 @@ async def compare_sessions(
         evening_stats = {}
         
         if metric_type == "students":
-            morning_stats = analytics_service.get_overview_stats(academic_year_id, session_type="morning")
-            evening_stats = analytics_service.get_overview_stats(academic_year_id, session_type="evening")
+            morning_stats = analytics_service.get_overview_stats(db, academic_year_id, session_type="morning")
+            evening_stats = analytics_service.get_overview_stats(db, academic_year_id, session_type="evening")
         
         elif metric_type == "attendance":
-            morning_stats = analytics_service.get_attendance_analytics(academic_year_id, session_type="morning")
-            evening_stats = analytics_service.get_attendance_analytics(academic_year_id, session_type="evening")
+            morning_stats = analytics_service.get_attendance_analytics(db, academic_year_id, session_type="morning")
+            evening_stats = analytics_service.get_attendance_analytics(db, academic_year_id, session_type="evening")
         
         return {
             "success": True,
@@ -362,10 +416,11 @@ async def compare_sessions(
 
 
 @router.get("/grades/school-wide")
-async def get_school_wide_grades(
+def get_school_wide_grades(
     academic_year_id: int = Query(..., description="Academic year ID"),
     subject: Optional[str] = Query(None, description="Filter by subject name"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get school-wide grade averages for quizzes and exams by session
@@ -373,6 +428,7 @@ async def get_school_wide_grades(
     """
     try:
         grades = analytics_service.get_school_wide_grades(
+            db=db,
             academic_year_id=academic_year_id,
             subject_filter=subject
         )
@@ -386,11 +442,12 @@ async def get_school_wide_grades(
 
 
 @router.get("/students/{student_id}/attendance-trend")
-async def get_student_attendance_trend(
+def get_student_attendance_trend(
     student_id: int,
     academic_year_id: int = Query(..., description="Academic year ID"),
     period_type: str = Query("weekly", description="weekly or monthly"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get student attendance trend by week or month
@@ -398,6 +455,7 @@ async def get_student_attendance_trend(
     """
     try:
         trend_data = analytics_service.get_student_attendance_trend(
+            db=db,
             student_id=student_id,
             academic_year_id=academic_year_id,
             period_type=period_type
@@ -412,10 +470,11 @@ async def get_student_attendance_trend(
 
 
 @router.get("/students/{student_id}/grades-timeline")
-async def get_student_grades_timeline(
+def get_student_grades_timeline(
     student_id: int,
     academic_year_id: int = Query(..., description="Academic year ID"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get student's average grades timeline across all subjects
@@ -423,6 +482,7 @@ async def get_student_grades_timeline(
     """
     try:
         timeline_data = analytics_service.get_student_grades_timeline(
+            db=db,
             student_id=student_id,
             academic_year_id=academic_year_id
         )
@@ -436,10 +496,11 @@ async def get_student_grades_timeline(
 
 
 @router.get("/students/{student_id}/grades-by-subject")
-async def get_student_grades_by_subject(
+def get_student_grades_by_subject(
     student_id: int,
     academic_year_id: int = Query(..., description="Academic year ID"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get student's average grades by subject
@@ -447,6 +508,7 @@ async def get_student_grades_by_subject(
     """
     try:
         subject_data = analytics_service.get_student_grades_by_subject(
+            db=db,
             student_id=student_id,
             academic_year_id=academic_year_id
         )
@@ -460,10 +522,11 @@ async def get_student_grades_by_subject(
 
 
 @router.get("/students/{student_id}/financial-summary")
-async def get_student_financial_summary(
+def get_student_financial_summary(
     student_id: int,
     academic_year_id: int = Query(..., description="Academic year ID"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get student's financial summary (paid vs remaining balance)
@@ -471,6 +534,7 @@ async def get_student_financial_summary(
     """
     try:
         financial_data = analytics_service.get_student_financial_summary(
+            db=db,
             student_id=student_id,
             academic_year_id=academic_year_id
         )
@@ -484,10 +548,11 @@ async def get_student_financial_summary(
 
 
 @router.get("/students/{student_id}/behavior-records")
-async def get_student_behavior_records(
+def get_student_behavior_records(
     student_id: int,
     academic_year_id: int = Query(..., description="Academic year ID"),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """
     Get student's behavior records
@@ -495,6 +560,7 @@ async def get_student_behavior_records(
     """
     try:
         records = analytics_service.get_student_behavior_records(
+            db=db,
             student_id=student_id,
             academic_year_id=academic_year_id
         )
@@ -508,7 +574,7 @@ async def get_student_behavior_records(
 
 
 @router.post("/cache/clear")
-async def clear_analytics_cache(
+def clear_analytics_cache(
     current_user = Depends(get_current_user)
 ):
     """
@@ -26,6 +26,7 @@ from app.schemas.daily import (
 from app.core.dependencies import get_current_user
 from app.utils.history_helper import log_daily_action
 from app.services.analytics_service import CacheManager
+from app.services.attendance_service import attendance_service
 
 router = APIRouter()
 
@@ -484,24 +485,25 @@ def create_student_attendance_bulk(
     ).delete(synchronize_session=False)
     
     # أنشئ سجلات جديدة
-    attendance_records = []
-    for student in students:
-        is_present = student.id not in attendance_bulk.absent_student_ids
-        
-        attendance = StudentDailyAttendance(
-            student_id=student.id,
-            academic_year_id=attendance_bulk.academic_year_id,
-            attendance_date=attendance_bulk.attendance_date,
-            is_present=is_present,
-            notes=attendance_bulk.notes,
-            recorded_by=current_user.id
-        )
-        db.add(attendance)
-        attendance_records.append(attendance)
+    absent_ids = set(attendance_bulk.absent_student_ids)
+    attendance_service.bulk_mark(db, [
+        {
+            "student_id": student.id,
+            "academic_year_id": attendance_bulk.academic_year_id,
+            "attendance_date": attendance_bulk.attendance_date,
+            "is_present": student.id not in absent_ids,
+            "notes": attendance_bulk.notes,
+            "recorded_by": current_user.id
+        }
+        for student in students
+    ])
     
-    db.commit()
-    for record in attendance_records:
-        db.refresh(record)
+    attendance_records = db.query(StudentDailyAttendance).filter(
+        and_(
+            StudentDailyAttendance.attendance_date == attendance_bulk.attendance_date,
+            StudentDailyAttendance.student_id.in_([s.id for s in students])
+        )
+    ).order_by(StudentDailyAttendance.id).all()
     
     # Invalidate attendance-related caches
     CacheManager.invalidate_analytics('attendance')
@@ -691,7 +693,7 @@ def create_teacher_attendance_bulk_new(
         ).delete(synchronize_session=False)
         
         # أنشئ سجلات جديدة
-        attendance_records = []
+        attendance_rows = []
         for i, record in enumerate(records):
             # Validate each record has required fields
             if 'teacher_id' not in record:
@@ -700,23 +702,21 @@ def create_teacher_attendance_bulk_new(
             if 'is_present' not in record:
                 raise HTTPException(status_code=400, detail=f"Record {i}: is_present is required")
             
-            attendance = TeacherPeriodAttendance(
-                teacher_id=record.get('teacher_id'),
-                academic_year_id=academic_year_id,
-                attendance_date=attendance_date,
-                schedule_id=record.get('schedule_id'),  # Can be None
-                is_present=record.get('is_present', True),
-                recorded_by=current_user.id
-            )
-            db.add(attendance)
-            attendance_records.append(attendance)
+            attendance_rows.append({
+                "teacher_id": record.get('teacher_id'),
+                "academic_year_id": academic_year_id,
+                "attendance_date": attendance_date,
+                "schedule_id": record.get('schedule_id'),  # Can be None
+                "is_present": record.get('is_present', True),
+                "recorded_by": current_user.id
+            })
         
-        db.commit()
+        saved_count = attendance_service.bulk_mark_teachers(db, attendance_rows)
         
         # Invalidate attendance-related caches
         CacheManager.invalidate_analytics('attendance')
         
-        return {"message": "تم حفظ الحضور بنجاح", "count": len(attendance_records)}
+        return {"message": "تم حفظ الحضور بنجاح", "count": saved_count}
     except HTTPException:
         db.rollback()
         raise
@@ -754,32 +754,31 @@ def create_teacher_attendance_bulk(
     ).delete(synchronize_session=False)
     
     # أنشئ سجلات جديدة
-    attendance_records = []
-    for schedule in schedules:
-        is_present = schedule.id not in attendance_bulk.absent_period_ids
-        
-        attendance = TeacherPeriodAttendance(
-            teacher_id=teacher.id,
-            academic_year_id=attendance_bulk.academic_year_id,
-            attendance_date=attendance_bulk.attendance_date,
-            schedule_id=schedule.id,
-            class_id=schedule.class_id,
-            subject_id=schedule.subject_id,
-            section=schedule.section,
-            period_number=schedule.period_number,
-            day_of_week=day_of_week,
-            is_present=is_present,
-            notes=attendance_bulk.notes,
-            recorded_by=current_user.id
-        )
-        db.add(attendance)
-        attendance_records.append(attendance)
-    
-    db.commit()
-    for record in attendance_records:
-        db.refresh(record)
+    absent_period_ids = set(attendance_bulk.absent_period_ids)
+    attendance_service.bulk_mark_teachers(db, [
+        {
+            "teacher_id": teacher.id,
+            "academic_year_id": attendance_bulk.academic_year_id,
+            "attendance_date": attendance_bulk.attendance_date,
+            "schedule_id": schedule.id,
+            "class_id": schedule.class_id,
+            "subject_id": schedule.subject_id,
+            "section": schedule.section,
+            "period_number": schedule.period_number,
+            "day_of_week": day_of_week,
+            "is_present": schedule.id not in absent_period_ids,
+            "notes": attendance_bulk.notes,
+            "recorded_by": current_user.id
+        }
+        for schedule in schedules
+    ])
     
-    return attendance_records
+    return db.query(TeacherPeriodAttendance).filter(
+        and_(
+            TeacherPeriodAttendance.teacher_id == teacher.id,
+            TeacherPeriodAttendance.attendance_date == attendance_bulk.attendance_date
+        )
+    ).order_by(TeacherPeriodAttendance.id).all()
 
 # ==================== Student Actions ====================
 
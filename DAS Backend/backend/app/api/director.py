@@ -21,7 +21,7 @@ from ..core.dependencies import get_director_user
 from ..utils.history_helper import log_director_action
 from ..schemas.director import (
     DirectorNoteCreate, DirectorNoteUpdate, DirectorNoteResponse, DirectorNoteListItem,
-    CategorySummary, NoteSearchRequest, NoteSearchResult,
+    CategorySummary, NoteSearchRequest, NoteSearchResult, NoteFileBatchCreate,
     RewardCreate, RewardUpdate, RewardResponse,
     AssistanceRecordCreate, AssistanceRecordUpdate, AssistanceRecordResponse
 )
@@ -266,6 +266,24 @@ async def create_file(
     return result
 
 
+@router.post("/notes/files/batch")
+async def create_files_batch(
+    batch: NoteFileBatchCreate,
+    current_user: User = Depends(get_director_user),
+    db: Session = Depends(get_db)
+):
+    """Create several note files at once (all or nothing)"""
+    result = director_notes_service.create_files_batch(
+        db, batch.academic_year_id, batch.category,
+        [item.dict() for item in batch.files]
+    )
+    
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    
+    return result
+
+
 @router.put("/notes/files/{file_id}")
 async def update_file(
     file_id: int,
@@ -5,7 +5,7 @@ Schedule Templates API Endpoints
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from ..database import get_db
 from ..services.template_service import TemplateService
@@ -41,8 +41,7 @@ class TemplateResponse(BaseModel):
     created_at: Optional[str]
     last_used_at: Optional[str]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Endpoints
 
@@ -4,7 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from typing import List, Optional
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from collections import defaultdict
 
 from ..database import get_db
@@ -42,8 +42,7 @@ class ScheduleResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ScheduleCreate(BaseModel):
     academic_year_id: int
@@ -130,8 +129,7 @@ class ScheduleConstraintResponse(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Constraint Template Schemas
 class ConstraintTemplateBase(BaseModel):
@@ -153,8 +151,7 @@ class ConstraintTemplateResponse(ConstraintTemplateBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Basic Schedule Management
 @router.get("/")
@@ -171,14 +171,18 @@ async def list_backups(
         raise HTTPException(status_code=500, detail=f"Failed to list backups: {str(e)}")
 
 @router.post("/backup/restore/{backup_name}")
-async def restore_backup(
+def restore_backup(
     backup_name: str,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_director_user)
 ):
     """Restore database from backup (Director only)"""
+    # Plain def: the restore waits for other requests' connections, which must not block the event loop
     try:
+        # Return this request's connection so the restore is not waiting on it;
+        # the session reconnects for the history entry below
+        db.close()
         result = backup_service.restore_database_backup(backup_name)
         
         if result["success"]:
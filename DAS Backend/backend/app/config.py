@@ -18,12 +18,21 @@ class Settings:
     # Database (relative to exe/script location)
     DATABASE_URL: str = f"sqlite:///{BASE_DIR}/school_management.db"
     DATABASE_PASSWORD: str = "altarbeeto3la-losi-fuck-you-fuck-you-fuck-you"  # SQLCipher encryption key
+    # Pooled connections keep their SQLCipher key, so the key derivation runs once per connection
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    # Page cache budget shared by all pooled connections (each gets an equal share)
+    DATABASE_CACHE_BUDGET_MB: int = 128
     
     # Security
     SECRET_KEY: str = "123456789"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
     
+    # Default admin account - set a precomputed bcrypt hash to skip hashing on first startup
+    DEFAULT_ADMIN_PASSWORD: str = "admin123"
+    DEFAULT_ADMIN_PASSWORD_HASH: Optional[str] = None
+    
     # Network - Bind to 127.0.0.1 for all modes
     # CRITICAL FIX: Even when running as exe (Tauri WebView2):
     # - Binding to 0.0.0.0 + using "localhost" hostname FAILS (WebView2 hostname resolution issue)
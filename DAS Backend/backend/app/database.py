@@ -1,10 +1,19 @@
 from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy import MetaData  # Added import
 from typing import TYPE_CHECKING
+from contextlib import contextmanager
 from .config import settings
+import ast
+import json
+import logging
 import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 # Import SQLCipher instead of regular SQLite
 try:
@@ -26,17 +35,45 @@ if "/" in db_path or "\\" in db_path:
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args={"check_same_thread": False},  # SQLite specific
+    poolclass=QueuePool,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_pre_ping=True,
     echo=False  # Set to True for SQL logging
 )
 
+# Per-connection page cache in KiB: the budget is split over every connection the pool can open,
+# but never below SQLite's default of ~2MB
+CONNECTION_CACHE_KIB = max(
+    2000,
+    settings.DATABASE_CACHE_BUDGET_MB * 1024 // (settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW)
+)
+
+def sqlcipher_key_pragma(password: str) -> str:
+    """
+    Build the PRAGMA key statement for SQLCipher
+    PRAGMA does not accept bound parameters, so the key is quoted as an SQL string literal
+    """
+    return "PRAGMA key='{}'".format(password.replace("'", "''"))
+
 # Set SQLCipher encryption key and enable foreign key constraints
+# Runs once per new physical connection, not on every checkout from the pool
 @event.listens_for(engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     # Set encryption key for SQLCipher
-    cursor.execute(f"PRAGMA key='{settings.DATABASE_PASSWORD}'")
+    cursor.execute(sqlcipher_key_pragma(settings.DATABASE_PASSWORD))
     # Enable foreign key constraints
     cursor.execute("PRAGMA foreign_keys=ON")
+    # Wait for a competing writer instead of failing with "database is locked"
+    # (set first so the journal mode switch below also waits)
+    cursor.execute("PRAGMA busy_timeout=5000")
+    # WAL lets readers (lists/searches) run while a write is in progress; it needs a real file
+    if db_path and db_path != ":memory:":
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA cache_size=-{CONNECTION_CACHE_KIB}")  # negative = size in KiB
     cursor.close()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -46,14 +83,233 @@ Base = declarative_base()
 if TYPE_CHECKING:
     Base: DeclarativeMeta
 
+# Set while a backup restore replaces the database file; get_db holds new sessions back until it clears
+_restore_gate = threading.Condition()
+_restore_in_progress = False
+
 def get_db():
     """Database dependency for FastAPI"""
+    with _restore_gate:
+        _restore_gate.wait_for(lambda: not _restore_in_progress)
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+@contextmanager
+def exclusive_database_access(timeout: float = 30.0):
+    """
+    Hold back new get_db sessions and wait until every pooled connection has been returned
+    Used while the database file is replaced. Sessions opened directly with SessionLocal()
+    are only waited for, not held back, so background jobs should be idle during a restore.
+    Raises TimeoutError if connections are still checked out after timeout seconds.
+    """
+    global _restore_in_progress
+    with _restore_gate:
+        if _restore_in_progress:
+            raise RuntimeError("Another database restore is already in progress")
+        _restore_in_progress = True
+    try:
+        deadline = time.monotonic() + timeout
+        while engine.pool.checkedout():
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"{engine.pool.checkedout()} database connection(s) still in use after {timeout:g}s"
+                )
+            time.sleep(0.05)
+        yield
+    finally:
+        with _restore_gate:
+            _restore_in_progress = False
+            _restore_gate.notify_all()
+
+# Tables counted in dashboard_rollups: (table, metric, condition for a row to be counted)
+DASHBOARD_ROLLUP_SOURCES = [
+    ("students", "students", "{row}.is_active = 1"),
+    ("teachers", "teachers", "{row}.is_active = 1"),
+    ("classes", "classes", "1"),
+]
+
+def install_dashboard_rollup(cursor):
+    """
+    Create the triggers that keep dashboard_rollups in step with students/teachers/classes
+    The rollup is rebuilt from the source tables whenever a trigger had to be (re)created
+    """
+    cursor.execute("SELECT count(*) FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_rollup_%'")
+    installed = cursor.fetchone()[0]
+
+    for table, metric, condition in DASHBOARD_ROLLUP_SOURCES:
+        def increment(row):
+            return f"""
+                INSERT INTO dashboard_rollups (academic_year_id, metric, session_type, value)
+                SELECT {row}.academic_year_id, '{metric}', COALESCE({row}.session_type, ''), 1
+                WHERE {condition.format(row=row)}
+                ON CONFLICT (academic_year_id, metric, session_type) DO UPDATE SET value = value + 1;"""
+
+        def decrement(row):
+            return f"""
+                UPDATE dashboard_rollups SET value = value - 1
+                WHERE academic_year_id = {row}.academic_year_id AND metric = '{metric}'
+                  AND session_type = COALESCE({row}.session_type, '') AND {condition.format(row=row)};"""
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_rollup_{table}_insert AFTER INSERT ON {table}
+            BEGIN {increment("NEW")} END""")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_rollup_{table}_delete AFTER DELETE ON {table}
+            BEGIN {decrement("OLD")} END""")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_rollup_{table}_update
+            AFTER UPDATE OF academic_year_id, session_type{", is_active" if "is_active" in condition else ""} ON {table}
+            BEGIN {decrement("OLD")} {increment("NEW")} END""")
+
+    if installed < len(DASHBOARD_ROLLUP_SOURCES) * 3:
+        cursor.execute("DELETE FROM dashboard_rollups")
+        for table, metric, condition in DASHBOARD_ROLLUP_SOURCES:
+            cursor.execute(f"""
+                INSERT INTO dashboard_rollups (academic_year_id, metric, session_type, value)
+                SELECT academic_year_id, '{metric}', COALESCE(session_type, ''), count(*)
+                FROM {table} WHERE {condition.format(row=table)}
+                GROUP BY academic_year_id, COALESCE(session_type, '')""")
+        print("Rebuilt dashboard rollup counts")
+
+# Quiz/exam grades averaged into student_academics.subject_average
+ASSESSMENT_GRADE_COLUMNS = [
+    "first_quiz_grade", "second_quiz_grade", "third_quiz_grade",
+    "fourth_quiz_grade", "midterm_grades", "final_exam_grades",
+]
+
+# Trigger-maintained aggregate columns read by the student analytics
+MATERIALIZED_AGGREGATE_COLUMNS = [
+    ("student_academics", "subject_average", "NUMERIC(5,2)"),
+    ("student_academics", "assessments_count", "INTEGER DEFAULT 0"),
+    ("student_finances", "paid_total", "NUMERIC(10,2) DEFAULT 0"),
+]
+
+# Triggers created by install_materialized_aggregates; readers fall back to live
+# aggregates unless all of them exist
+MATERIALIZED_AGGREGATE_TRIGGERS = (
+    "trg_agg_academic_insert", "trg_agg_academic_update",
+    "trg_agg_payment_insert", "trg_agg_payment_delete", "trg_agg_payment_update",
+    "trg_agg_finance_insert", "trg_agg_finance_update",
+)
+
+def install_materialized_aggregates(conn):
+    """
+    Create the triggers that keep student_academics.subject_average/assessments_count and
+    student_finances.paid_total up to date, rebuilding both when a trigger had to be (re)created
+    """
+    installed = conn.exec_driver_sql(
+        "SELECT count(*) FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_agg_%'"
+    ).scalar()
+
+    grades_count = " + ".join(f"({column} IS NOT NULL)" for column in ASSESSMENT_GRADE_COLUMNS)
+    grades_total = " + ".join(f"COALESCE({column}, 0)" for column in ASSESSMENT_GRADE_COLUMNS)
+    set_average = f"""
+        SET assessments_count = {grades_count},
+            subject_average = CAST({grades_total} AS REAL) / NULLIF({grades_count}, 0)"""
+    payments_sum = """(
+        SELECT COALESCE(SUM(p.payment_amount), 0) FROM student_payments p
+        WHERE p.student_id = student_finances.student_id AND p.academic_year_id = student_finances.academic_year_id)"""
+
+    def add_paid(row, sign):
+        return f"""
+            UPDATE student_finances SET paid_total = COALESCE(paid_total, 0) {sign} {row}.payment_amount
+            WHERE student_id = {row}.student_id AND academic_year_id = {row}.academic_year_id;"""
+
+    triggers = {
+        "trg_agg_academic_insert": f"""AFTER INSERT ON student_academics
+            BEGIN UPDATE student_academics {set_average} WHERE id = NEW.id; END""",
+        "trg_agg_academic_update": f"""AFTER UPDATE OF {", ".join(ASSESSMENT_GRADE_COLUMNS)} ON student_academics
+            BEGIN UPDATE student_academics {set_average} WHERE id = NEW.id; END""",
+        "trg_agg_payment_insert": f"""AFTER INSERT ON student_payments
+            BEGIN {add_paid("NEW", "+")} END""",
+        "trg_agg_payment_delete": f"""AFTER DELETE ON student_payments
+            BEGIN {add_paid("OLD", "-")} END""",
+        "trg_agg_payment_update": f"""AFTER UPDATE OF payment_amount, student_id, academic_year_id ON student_payments
+            BEGIN {add_paid("OLD", "-")} {add_paid("NEW", "+")} END""",
+        "trg_agg_finance_insert": f"""AFTER INSERT ON student_finances
+            BEGIN UPDATE student_finances SET paid_total = {payments_sum} WHERE id = NEW.id; END""",
+        "trg_agg_finance_update": f"""AFTER UPDATE OF student_id, academic_year_id ON student_finances
+            BEGIN UPDATE student_finances SET paid_total = {payments_sum} WHERE id = NEW.id; END""",
+    }
+    for name in MATERIALIZED_AGGREGATE_TRIGGERS:
+        conn.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {triggers[name]}")
+
+    if installed < len(triggers):
+        conn.exec_driver_sql(f"UPDATE student_academics {set_average}")
+        conn.exec_driver_sql(f"UPDATE student_finances SET paid_total = {payments_sum}")
+        print("Rebuilt materialized grade averages and paid totals")
+
+def update_materialized_aggregates():
+    """
+    Add the materialized aggregate columns and install their triggers
+    Runs through the application engine, so it applies to the database the app actually reads
+    """
+    try:
+        with engine.begin() as conn:
+            for table, column, column_type in MATERIALIZED_AGGREGATE_COLUMNS:
+                columns = conn.exec_driver_sql(f"PRAGMA table_info({table})").all()
+                if not any(col[1] == column for col in columns):
+                    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+                    print(f"Added {column} column to {table} table")
+            install_materialized_aggregates(conn)
+    except Exception as e:
+        logger.error(f"Error installing materialized aggregate triggers: {e}")
+
+def install_notes_search(cursor):
+    """
+    Create the director_notes_fts trigram index and the triggers that keep it in step with director_notes
+    The index is rebuilt from director_notes whenever it or a trigger had to be (re)created
+    """
+    cursor.execute("""
+        SELECT count(*) FROM sqlite_master
+        WHERE name = 'director_notes_fts' OR (type = 'trigger' AND name LIKE 'trg_notes_fts_%')""")
+    installed = cursor.fetchone()[0]
+
+    # trigram keeps the case-insensitive substring matching of the old ILIKE search
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS director_notes_fts USING fts5(
+            title, content, content='director_notes', content_rowid='id', tokenize='trigram')""")
+    remove_old = """
+        INSERT INTO director_notes_fts (director_notes_fts, rowid, title, content)
+        VALUES ('delete', OLD.id, OLD.title, OLD.content);"""
+    add_new = """
+        INSERT INTO director_notes_fts (rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);"""
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_notes_fts_insert AFTER INSERT ON director_notes
+        BEGIN {add_new} END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_notes_fts_delete AFTER DELETE ON director_notes
+        BEGIN {remove_old} END""")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_notes_fts_update AFTER UPDATE OF title, content ON director_notes
+        BEGIN {remove_old} {add_new} END""")
+
+    if installed < 4:
+        cursor.execute("INSERT INTO director_notes_fts (director_notes_fts) VALUES ('rebuild')")
+        print("Rebuilt director notes search index")
+
+def legacy_repr_to_json(value):
+    """
+    Convert a legacy str(list) conflict column value to JSON text
+    Values that are already JSON are returned unchanged; anything that is not a Python literal
+    is kept as a JSON string so the row still loads
+    """
+    if value is None:
+        return None
+    try:
+        json.loads(value)
+        return value
+    except ValueError:
+        pass
+    try:
+        return json.dumps(ast.literal_eval(value))
+    except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+        logger.warning(f"Schedule conflict value is not a Python literal, storing it as a JSON string: {value!r}")
+        return json.dumps(value)
+
 def update_database_schema():
     """Update database schema to match current models"""
     # Skip if database doesn't exist yet (will be created with correct schema)
@@ -61,12 +317,14 @@ def update_database_schema():
         print("✓ Database will be created with CASCADE DELETE constraints")
         return
     
+    update_materialized_aggregates()
+    
+    conn = None
     try:
-        # Connect to the encrypted database with SQLCipher
-        conn = sqlite3.connect(db_path)
+        # Migrate through the application engine so the same driver (and key/pragmas from the
+        # connect listener) opens the file the app actually reads
+        conn = engine.raw_connection()
         cursor = conn.cursor()
-        # Set encryption key for SQLCipher
-        cursor.execute(f"PRAGMA key='{settings.DATABASE_PASSWORD}'")
         
         # Verify the database is encrypted correctly by testing a simple query
         try:
@@ -123,6 +381,81 @@ def update_database_schema():
             except Exception as e:
                 print(f"Error adding is_active column: {e}")
         
+        # Composite indexes for dashboard and summary queries (create_all only adds them to new tables)
+        analytics_indexes = [
+            "CREATE INDEX IF NOT EXISTS ix_student_ay_active_session_grade ON students (academic_year_id, is_active, session_type, grade_level, grade_number)",
+            "CREATE INDEX IF NOT EXISTS ix_teacher_ay_session_active ON teachers (academic_year_id, session_type, is_active)",
+            "CREATE INDEX IF NOT EXISTS ix_sda_ay_date_present ON student_daily_attendances (academic_year_id, attendance_date, is_present)",
+            "CREATE INDEX IF NOT EXISTS ix_academic_ay_student_subject ON student_academics (academic_year_id, student_id, subject_id)",
+            "CREATE INDEX IF NOT EXISTS ix_finance_student_ay ON student_finances (student_id, academic_year_id)",
+            "CREATE INDEX IF NOT EXISTS ix_payment_student_ay_amount ON student_payments (student_id, academic_year_id, payment_amount)",
+            "CREATE INDEX IF NOT EXISTS ix_behavior_student_ay_date ON student_behavior_records (student_id, academic_year_id, record_date)",
+            "CREATE INDEX IF NOT EXISTS ix_director_note_ay_type_folder ON director_notes (academic_year_id, folder_type, is_folder)",
+            "CREATE INDEX IF NOT EXISTS ix_director_note_ay_type_parent ON director_notes (academic_year_id, folder_type, parent_folder_id)",
+            "CREATE INDEX IF NOT EXISTS ix_director_note_parent_folder ON director_notes (parent_folder_id, is_folder)",
+        ]
+        for statement in analytics_indexes:
+            try:
+                cursor.execute(statement)
+            except Exception as e:
+                index_name = statement.split(" ON ")[0].rsplit(" ", 1)[-1]
+                logger.error(f"Error creating index {index_name}: {e}")
+
+        # One director note row per path; existing duplicates would make the unique index fail,
+        # so they are reported and the index is left out until they are cleaned up
+        try:
+            cursor.execute("""
+                SELECT file_path, count(*) FROM director_notes
+                WHERE academic_year_id IS NOT NULL AND folder_type IS NOT NULL
+                  AND file_path IS NOT NULL AND is_folder IS NOT NULL
+                GROUP BY academic_year_id, folder_type, file_path, is_folder
+                HAVING count(*) > 1""")
+            duplicate_paths = cursor.fetchall()
+            if duplicate_paths:
+                examples = ", ".join(f"{path} (x{count})" for path, count in duplicate_paths[:5])
+                logger.error(
+                    f"Not creating unique index ux_director_note_path: {len(duplicate_paths)} director note "
+                    f"path(s) have duplicate rows, e.g. {examples}"
+                )
+            else:
+                cursor.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ux_director_note_path "
+                    "ON director_notes (academic_year_id, folder_type, file_path, is_folder)"
+                )
+        except Exception as e:
+            logger.error(f"Error creating index ux_director_note_path: {e}")
+
+        # Trigger-maintained dashboard counts (the table itself comes from create_all)
+        try:
+            install_dashboard_rollup(cursor)
+        except Exception as e:
+            logger.error(f"Error installing dashboard rollup triggers: {e}")
+
+        # Full-text index for director notes search (falls back to ILIKE when FTS5 is unavailable)
+        try:
+            install_notes_search(cursor)
+        except Exception as e:
+            logger.error(f"Error installing director notes search index: {e}")
+
+        # Convert legacy Python-repr conflict lists to valid JSON for the JSON columns; each value
+        # is parsed as a Python literal, since quotes inside the strings rule out text replacement
+        try:
+            cursor.execute("""
+                SELECT id, affected_assignments, resolution_suggestions FROM schedule_conflicts
+                WHERE NOT json_valid(COALESCE(affected_assignments, '[]'))
+                   OR NOT json_valid(COALESCE(resolution_suggestions, '[]'))
+            """)
+            legacy_rows = cursor.fetchall()
+            for conflict_id, affected_assignments, resolution_suggestions in legacy_rows:
+                cursor.execute(
+                    "UPDATE schedule_conflicts SET affected_assignments = ?, resolution_suggestions = ? WHERE id = ?",
+                    (legacy_repr_to_json(affected_assignments), legacy_repr_to_json(resolution_suggestions), conflict_id)
+                )
+            if legacy_rows:
+                print(f"Converted {len(legacy_rows)} schedule conflict rows to JSON")
+        except Exception as e:
+            logger.error(f"Error converting schedule conflict columns: {e}")
+
         # Check if foreign keys have CASCADE DELETE
         cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='classes'")
         table_sql = cursor.fetchone()
@@ -144,4 +477,6 @@ def update_database_schema():
         conn.close()
         
     except Exception as e:
-        print(f"Error checking database schema: {e}")
\ No newline at end of file
+        logger.error(f"Error checking database schema: {e}")
+        if conn is not None:
+            conn.close()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import sys
 import os
 import io
+from typing import Optional
 
 # Ensure UTF-8 encoding (critical for compiled PyInstaller builds on Windows)
 if hasattr(sys.stdout, 'reconfigure'):
@@ -13,6 +14,7 @@ from fastapi import FastAPI, Depends, Request, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from slowapi.errors import RateLimitExceeded
@@ -32,6 +34,13 @@ from app.services.config_service import config_service
 from app.core.telegram_logging_handler import setup_telegram_logging
 from app.core.logging_config import setup_logging
 
+# Serialize responses with orjson when available (falls back to the stdlib encoder)
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponseClass
+except ImportError:
+    DefaultResponseClass = JSONResponse
+
 # Create database tables
 # Suppressing type error for Base.metadata as it's a known SQLAlchemy pattern
 Base.metadata.create_all(bind=engine)  # type: ignore
@@ -43,7 +52,8 @@ setup_telegram_logging()
 app = FastAPI(
     title="School Management System API",
     description="Backend API for comprehensive school management",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=DefaultResponseClass
 )
 
 # Setup CORS for localhost access - THIS MUST BE FIRST to handle preflight requests
@@ -198,11 +208,19 @@ async def get_version():
         "api_version": "1.0.0"
     }
 
+_DEFAULT_ADMIN_HASH: Optional[str] = None
+
+def _default_admin_hash() -> str:
+    """Return the default admin password hash, hashing at most once per process"""
+    global _DEFAULT_ADMIN_HASH
+    if _DEFAULT_ADMIN_HASH is None:
+        _DEFAULT_ADMIN_HASH = settings.DEFAULT_ADMIN_PASSWORD_HASH or get_password_hash(settings.DEFAULT_ADMIN_PASSWORD)
+    return _DEFAULT_ADMIN_HASH
+
 async def create_default_admin():
     """Create default admin user if none exists"""
     from app.database import SessionLocal
     from app.models.users import User
-    from app.utils.security import get_password_hash
     
     db = SessionLocal()
     try:
@@ -213,7 +231,7 @@ async def create_default_admin():
             # Create admin user (director role) using dictionary approach to avoid type errors
             admin_user_data = {
                 "username": "admin",
-                "password_hash": get_password_hash("admin123"),
+                "password_hash": _default_admin_hash(),
                 "role": "director",
                 "is_active": True
             }
@@ -222,7 +240,11 @@ async def create_default_admin():
             
             db.commit()
             print("Default admin user created:")
-            print("  - Username: admin, Password: admin123, Role: director")
+            if settings.DEFAULT_ADMIN_PASSWORD_HASH:
+                # The stored credential is the configured hash; the plaintext setting may not match it
+                print("  - Username: admin, Password: (preconfigured hash), Role: director")
+            else:
+                print(f"  - Username: admin, Password: {settings.DEFAULT_ADMIN_PASSWORD}, Role: director")
         else:
             print("Admin user already exists")
     finally:
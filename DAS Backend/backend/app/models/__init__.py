@@ -12,7 +12,7 @@ from .director import DirectorNote, Reward, AssistanceRecord
 from .system import (
     SystemSetting, BackupHistory, SystemLog, PerformanceMetric,
     AuditLog, SystemNotification, FileUpload, SystemConfiguration,
-    UserSession, LoginAttempt, HistoryLog
+    UserSession, LoginAttempt, HistoryLog, DashboardRollup
 )
 from .daily import (
     Holiday, StudentDailyAttendance, TeacherPeriodAttendance,
@@ -31,7 +31,7 @@ __all__ = [
     "DirectorNote", "Reward", "AssistanceRecord",
     "SystemSetting", "BackupHistory", "SystemLog", "PerformanceMetric",
     "AuditLog", "SystemNotification", "FileUpload", "SystemConfiguration",
-    "UserSession", "LoginAttempt", "HistoryLog",
+    "UserSession", "LoginAttempt", "HistoryLog", "DashboardRollup",
     "Holiday", "StudentDailyAttendance", "TeacherPeriodAttendance",
     "StudentAction", "WhatsAppGroupConfig"
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Boolean, ForeignKey, JSON, Numeric
+from sqlalchemy import Column, Integer, String, Text, Date, Boolean, ForeignKey, JSON, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -18,6 +18,10 @@ class Holiday(BaseModel):
 class StudentDailyAttendance(BaseModel):
     """نموذج حضور الطلاب اليومي"""
     __tablename__ = "student_daily_attendances"
+    __table_args__ = (
+        Index('ix_sda_ay_date_present', 'academic_year_id', 'attendance_date', 'is_present'),
+        {'extend_existing': True},
+    )
     
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
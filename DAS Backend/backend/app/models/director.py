@@ -1,14 +1,23 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Numeric, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, Numeric, ForeignKey, Boolean, Index
+from sqlalchemy.orm import relationship, deferred
 from app.models.base import BaseModel
 
 class DirectorNote(BaseModel):
     __tablename__ = "director_notes"
+    __table_args__ = (
+        Index('ix_director_note_ay_type_folder', 'academic_year_id', 'folder_type', 'is_folder'),
+        Index('ux_director_note_path', 'academic_year_id', 'folder_type', 'file_path', 'is_folder', unique=True),
+        Index('ix_director_note_ay_type_parent', 'academic_year_id', 'folder_type', 'parent_folder_id'),
+        Index('ix_director_note_parent_folder', 'parent_folder_id', 'is_folder'),
+        {'extend_existing': True},
+    )
     
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
     folder_type = Column(String(20), nullable=False)  # goals, projects, blogs, educational_admin
     title = Column(String(200), nullable=False)
-    content = Column(Text)  # Markdown content for files, null for folders
+    # Markdown content for files, null for folders. The .md file on disk is what read_file serves;
+    # this copy feeds the search index, so it is deferred and only loaded where search needs it
+    content = deferred(Column(Text))
     note_date = Column(Date, nullable=False)
     
     # New fields for file/folder management
@@ -44,8 +44,8 @@ class ScheduleConflict(BaseModel):
     conflict_type = Column(String(50), nullable=False)  # teacher_overlap, room_overlap, etc.
     description = Column(Text)
     severity = Column(String(20), default="medium")  # low, medium, high, critical
-    affected_assignments = Column(Text)  # JSON format for assignment IDs
-    resolution_suggestions = Column(Text)  # JSON format for suggestions
+    affected_assignments = Column(JSON)  # List of assignment IDs
+    resolution_suggestions = Column(JSON)  # List of suggestion strings
     is_resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime(timezone=True))
     
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, ForeignKey, JSON, Numeric
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, ForeignKey, JSON, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class Student(BaseModel):
     __tablename__ = "students"
+    __table_args__ = (
+        # Covers the dashboard counts/distributions filtered by year, activity and session
+        Index('ix_student_ay_active_session_grade', 'academic_year_id', 'is_active', 'session_type', 'grade_level', 'grade_number'),
+        {'extend_existing': True},
+    )
     
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
     class_id = Column(Integer, ForeignKey("classes.id", ondelete="SET NULL"), nullable=True)
@@ -56,6 +61,10 @@ class Student(BaseModel):
 
 class StudentFinance(BaseModel):
     __tablename__ = "student_finances"
+    __table_args__ = (
+        Index('ix_finance_student_ay', 'student_id', 'academic_year_id'),
+        {'extend_existing': True},
+    )
     
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
@@ -89,6 +98,9 @@ class StudentFinance(BaseModel):
     
     payment_notes = Column(Text)
     
+    # Sum of this student's payments for the year, maintained by database triggers (see database.py)
+    paid_total = Column(Numeric(10,2), default=0)
+    
     # Relationships
     student = relationship("Student", back_populates="finances")
     academic_year = relationship("AcademicYear")
@@ -125,6 +137,10 @@ class StudentFinance(BaseModel):
 
 class StudentPayment(BaseModel):
     __tablename__ = "student_payments"
+    __table_args__ = (
+        Index('ix_payment_student_ay_amount', 'student_id', 'academic_year_id', 'payment_amount'),
+        {'extend_existing': True},
+    )
     
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
@@ -141,6 +157,10 @@ class StudentPayment(BaseModel):
 
 class StudentAcademic(BaseModel):
     __tablename__ = "student_academics"
+    __table_args__ = (
+        Index('ix_academic_ay_student_subject', 'academic_year_id', 'student_id', 'subject_id'),
+        {'extend_existing': True},
+    )
     
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
@@ -163,6 +183,10 @@ class StudentAcademic(BaseModel):
     behavior_grade = Column(Numeric(5,2))
     activity_grade = Column(Numeric(5,2))
     
+    # Average of the quiz/exam grades present, maintained by database triggers (see database.py)
+    subject_average = Column(Numeric(5,2))
+    assessments_count = Column(Integer, default=0)
+    
     # Attendance
     absence_days = Column(Integer, default=0)
     absence_dates = Column(Text)  # JSON array of dates
@@ -190,6 +214,11 @@ class HistoricalBalance(BaseModel):
 class StudentBehaviorRecord(BaseModel):
     """نموذج سجل السلوك الطلابي"""
     __tablename__ = "student_behavior_records"
+    __table_args__ = (
+        # SQLite walks the index backwards for ORDER BY record_date DESC
+        Index('ix_behavior_student_ay_date', 'student_id', 'academic_year_id', 'record_date'),
+        {'extend_existing': True},
+    )
     
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
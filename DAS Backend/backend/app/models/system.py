@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 from datetime import datetime
@@ -166,4 +166,17 @@ class HistoryLog(BaseModel):
     
     # Relationships
     academic_year = relationship("AcademicYear", foreign_keys=[academic_year_id])
-    user = relationship("User", foreign_keys=[user_id])
\ No newline at end of file
+    user = relationship("User", foreign_keys=[user_id])
+
+class DashboardRollup(BaseModel):
+    """Per-year dashboard counts, kept current by triggers on students/teachers/classes"""
+    __tablename__ = "dashboard_rollups"
+    __table_args__ = (
+        UniqueConstraint('academic_year_id', 'metric', 'session_type', name='uq_dashboard_rollup'),
+        {'extend_existing': True},
+    )
+    
+    academic_year_id = Column(Integer, nullable=False)
+    metric = Column(String(20), nullable=False)  # students, teachers, classes
+    session_type = Column(String(10), nullable=False)  # morning, evening
+    value = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
 class Teacher(BaseModel):
     __tablename__ = "teachers"
+    __table_args__ = (
+        Index('ix_teacher_ay_session_active', 'academic_year_id', 'session_type', 'is_active'),
+        {'extend_existing': True},
+    )
     
     # Teacher attributes
     academic_year_id = Column(Integer, ForeignKey("academic_years.id", ondelete="CASCADE"), nullable=False)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, ConfigDict
 from typing import Optional
 from datetime import datetime
 import re
@@ -64,8 +64,7 @@ class AcademicYearResponse(AcademicYearBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ClassBase(BaseModel):
     academic_year_id: int
@@ -83,8 +82,7 @@ class ClassResponse(ClassBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SubjectBase(BaseModel):
     class_id: int
@@ -99,8 +97,7 @@ class SubjectResponse(SubjectBase):
     id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class GradeSettings(BaseModel):
     max_grade: int
@@ -141,5 +138,4 @@ class AcademicSettingsResponse(AcademicSettingsBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, ConfigDict
 from typing import Optional, List
 from datetime import datetime, date, time
 from decimal import Decimal
@@ -84,8 +84,7 @@ class ActivityResponse(ActivityBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Activity Registration Schemas
 class ActivityRegistrationBase(BaseModel):
@@ -123,8 +122,7 @@ class ActivityRegistrationResponse(ActivityRegistrationBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Activity Schedule Schemas
 class ActivityScheduleBase(BaseModel):
@@ -173,8 +171,7 @@ class ActivityScheduleResponse(ActivityScheduleBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Activity Attendance Schemas
 class ActivityAttendanceBase(BaseModel):
@@ -209,8 +206,7 @@ class ActivityAttendanceResponse(ActivityAttendanceBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Activity Report Schemas
 class ActivityParticipationReport(BaseModel):
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional, List
 from datetime import date
 from decimal import Decimal
@@ -23,8 +23,7 @@ class HolidayResponse(HolidayBase):
     academic_year_id: int
     session_type: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # ==================== Student Daily Attendance Schemas ====================
 
@@ -46,8 +45,7 @@ class StudentDailyAttendanceResponse(StudentDailyAttendanceBase):
     academic_year_id: int
     recorded_by: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentDailyAttendanceBulk(BaseModel):
     """للإدخال الجماعي لحضور الطلاب"""
@@ -85,8 +83,7 @@ class TeacherPeriodAttendanceResponse(TeacherPeriodAttendanceBase):
     academic_year_id: int
     recorded_by: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class TeacherScheduleInfo(BaseModel):
     """معلومات جدول الأستاذ لليوم"""
@@ -134,8 +131,7 @@ class StudentActionResponse(StudentActionBase):
     academic_year_id: int
     recorded_by: Optional[int] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentActionBulk(BaseModel):
     """للإدخال الجماعي للإجراءات"""
@@ -166,8 +162,7 @@ class WhatsAppGroupConfigResponse(WhatsAppGroupConfigBase):
     id: int
     academic_year_id: int
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # ==================== Daily Page Summary Schemas ====================
 
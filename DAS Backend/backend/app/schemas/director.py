@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from datetime import datetime, date
 
@@ -33,8 +33,7 @@ class DirectorNoteResponse(DirectorNoteBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class DirectorNoteListItem(BaseModel):
     """Simplified response for folder listing"""
@@ -47,8 +46,7 @@ class DirectorNoteListItem(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class CategorySummary(BaseModel):
     """Summary for each category"""
@@ -83,8 +81,7 @@ class RewardResponse(RewardBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Assistance Record Schemas
 class AssistanceRecordBase(BaseModel):
@@ -110,10 +107,21 @@ class AssistanceRecordResponse(AssistanceRecordBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Search Request/Response
+class NoteFileBatchItem(BaseModel):
+    file_name: str
+    content: str = ""
+    note_date: date
+    parent_folder_id: Optional[int] = None
+
+class NoteFileBatchCreate(BaseModel):
+    """Several note files created in one request"""
+    academic_year_id: int
+    category: str
+    files: List[NoteFileBatchItem]
+
 class NoteSearchRequest(BaseModel):
     query: str
     category: Optional[str] = None
@@ -128,6 +136,5 @@ class NoteSearchResult(BaseModel):
     file_path: Optional[str] = None
     is_folder: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
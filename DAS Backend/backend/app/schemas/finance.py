@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, ConfigDict
 from typing import Optional, List
 from datetime import datetime, date
 from decimal import Decimal
@@ -70,8 +70,7 @@ class FinanceTransactionResponse(FinanceTransactionBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Budget Schemas
 class BudgetBase(BaseModel):
@@ -134,8 +133,7 @@ class BudgetResponse(BudgetBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Financial Report Schemas
 class FinancialSummary(BaseModel):
@@ -179,8 +177,7 @@ class ExpenseCategoryResponse(ExpenseCategoryBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Income Category Schemas
 class IncomeCategoryBase(BaseModel):
@@ -201,8 +198,7 @@ class IncomeCategoryResponse(IncomeCategoryBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Payment Method Schemas
 class PaymentMethodBase(BaseModel):
@@ -223,8 +219,7 @@ class PaymentMethodResponse(PaymentMethodBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Finance Card Schemas
 class FinanceCardBase(BaseModel):
@@ -284,8 +279,7 @@ class FinanceCardResponse(FinanceCardBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Finance Card Transaction Schemas
 class FinanceCardTransactionBase(BaseModel):
@@ -378,8 +372,7 @@ class FinanceCardTransactionResponse(FinanceCardTransactionBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Finance Card Summary Schema
 class FinanceCardSummary(BaseModel):
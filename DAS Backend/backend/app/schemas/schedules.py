@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime, date, time
 from enum import Enum
@@ -57,8 +57,7 @@ class ScheduleResponse(ScheduleBase):
     total_periods: int
     total_conflicts: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Time Slot Schema
 class TimeSlotBase(BaseModel):
@@ -99,8 +98,7 @@ class TimeSlotResponse(TimeSlotBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schedule Assignment Schema
 class ScheduleAssignmentBase(BaseModel):
@@ -132,8 +130,7 @@ class ScheduleAssignmentResponse(ScheduleAssignmentBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schedule Generation Request
 class ScheduleGenerationRequest(BaseModel):
@@ -229,8 +226,7 @@ class ScheduleConflictResponse(ScheduleConflictBase):
     created_at: datetime
     resolved_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schedule Statistics
 class ScheduleStatistics(BaseModel):
@@ -274,8 +270,7 @@ class TeacherAvailabilityResponse(TeacherAvailabilityBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Schedule Template Schema
 class ScheduleTemplateBase(BaseModel):
@@ -309,8 +304,7 @@ class ScheduleTemplateResponse(ScheduleTemplateBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Bulk Schedule Operations
 class BulkScheduleOperationRequest(BaseModel):
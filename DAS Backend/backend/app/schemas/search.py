@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, ConfigDict
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, date
 from enum import Enum
@@ -186,8 +186,7 @@ class SearchHistoryItem(BaseModel):
     clicked_result_type: Optional[str] = None
     search_date: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Search Analytics Schema
 class SearchAnalytics(BaseModel):
@@ -228,8 +227,7 @@ class SavedSearchResponse(SavedSearchBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Search Index Schema (for managing search indexing)
 class SearchIndexStatus(BaseModel):
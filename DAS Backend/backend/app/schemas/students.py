@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from datetime import date, datetime
 from decimal import Decimal
@@ -73,8 +73,7 @@ class StudentResponse(StudentBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentFinanceBase(BaseModel):
     school_fee: Decimal = Decimal('0')
@@ -138,8 +137,7 @@ class StudentFinanceResponse(StudentFinanceBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentFinanceDetailedResponse(BaseModel):
     """Detailed financial response with calculated fields"""
@@ -179,8 +177,7 @@ class StudentFinanceDetailedResponse(BaseModel):
     payment_notes: Optional[str]
     payments: List['StudentPaymentResponse']
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentPaymentBase(BaseModel):
     payment_amount: Decimal
@@ -200,8 +197,7 @@ class StudentPaymentResponse(StudentPaymentBase):
     academic_year_id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudentAcademicBase(BaseModel):
     board_grades: Optional[Decimal] = None
@@ -237,8 +233,7 @@ class StudentAcademicResponse(StudentAcademicBase):
     subject_id: int
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Historical Balance Schemas
 class HistoricalBalanceBase(BaseModel):
@@ -259,8 +254,7 @@ class HistoricalBalanceResponse(HistoricalBalanceBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Student Finance Summary for Manager
 class StudentFinanceSummary(BaseModel):
@@ -279,5 +273,4 @@ class StudentFinanceSummary(BaseModel):
     balance: Decimal
     has_outstanding_balance: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
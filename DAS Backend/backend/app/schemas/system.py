@@ -3,7 +3,7 @@ System Management Schemas
 Pydantic models for advanced system features
 """
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, ConfigDict
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
@@ -21,8 +21,7 @@ class AuditLogResponse(BaseModel):
     ip_address: Optional[str]
     timestamp: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SystemNotificationResponse(BaseModel):
     id: int
@@ -33,8 +32,7 @@ class SystemNotificationResponse(BaseModel):
     created_at: datetime
     expires_at: Optional[datetime]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserSessionResponse(BaseModel):
     id: int
@@ -45,8 +43,7 @@ class UserSessionResponse(BaseModel):
     last_activity: datetime
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class SecurityMetricsResponse(BaseModel):
     login_attempts_today: int
@@ -66,8 +63,7 @@ class SystemConfigurationResponse(BaseModel):
     is_system: bool
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ConfigurationUpdate(BaseModel):
     value: str
@@ -122,8 +118,7 @@ class FileUploadResponse(BaseModel):
     related_entity_id: Optional[int]
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StorageStatsResponse(BaseModel):
     total_files: int
@@ -215,8 +210,7 @@ class LoginAttemptResponse(BaseModel):
     failure_reason: Optional[str]
     attempted_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Notification Types Enum
 
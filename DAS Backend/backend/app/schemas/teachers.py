@@ -1,4 +1,4 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, validator, ConfigDict
 from typing import Optional, List
 from datetime import datetime, date
 from decimal import Decimal
@@ -78,11 +78,12 @@ class TeacherResponse(TeacherBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-        json_encoders = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_encoders={
             date: lambda v: v.strftime('%Y-%m-%d') if v else None
         }
+    )
 
 # Teacher Subject Assignment Schemas
 class TeacherSubjectBase(BaseModel):
@@ -98,8 +99,7 @@ class TeacherSubjectResponse(TeacherSubjectBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Teacher Finance Schemas
 class TeacherFinanceBase(BaseModel):
@@ -150,8 +150,7 @@ class TeacherFinanceResponse(TeacherFinanceBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Teacher Attendance Schemas
 class TeacherAttendanceBase(BaseModel):
@@ -195,5 +194,4 @@ class TeacherAttendanceResponse(TeacherAttendanceBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
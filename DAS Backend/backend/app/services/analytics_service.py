@@ -5,19 +5,22 @@ Provides analytics for students, teachers, finance, and activities
 
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, and_, or_, extract, case
+from sqlalchemy import func, and_, or_, extract, select, union_all, literal, null, bindparam, Float, Integer, cast, text
 from sqlalchemy.orm import Session
 import json
 import hashlib
-from functools import wraps
+from collections import defaultdict
+from functools import wraps, lru_cache
 
-from app.database import SessionLocal
 from app.models.students import Student, StudentAcademic, StudentFinance, StudentPayment, StudentBehaviorRecord
 from app.models.teachers import Teacher, TeacherAssignment, TeacherAttendance, TeacherFinance
 from app.models.academic import AcademicYear, Class, Subject
 from app.models.finance import FinanceTransaction, FinanceCategory, Budget
 from app.models.activities import Activity, ActivityRegistration, ActivityAttendance
 from app.models.daily import StudentDailyAttendance, TeacherPeriodAttendance
+from app.models.system import DashboardRollup
+from app.models.users import User
+from app.database import ASSESSMENT_GRADE_COLUMNS, MATERIALIZED_AGGREGATE_TRIGGERS, DASHBOARD_ROLLUP_SOURCES
 
 
 class CacheManager:
@@ -27,12 +30,15 @@ class CacheManager:
     
     @classmethod
     def get(cls, key: str) -> Optional[Any]:
-        if key in cls._cache:
-            if datetime.now() < cls._ttl.get(key, datetime.min):
-                return cls._cache[key]
-            else:
-                del cls._cache[key]
-                del cls._ttl[key]
+        # Single get() reads, so a concurrent expiry/invalidation between the
+        # checks turns into a cache miss instead of a KeyError
+        expires_at = cls._ttl.get(key)
+        if expires_at is None:
+            return None
+        if datetime.now() < expires_at:
+            return cls._cache.get(key)
+        cls._cache.pop(key, None)
+        cls._ttl.pop(key, None)
         return None
     
     @classmethod
@@ -49,11 +55,10 @@ class CacheManager:
     @classmethod
     def invalidate_pattern(cls, pattern: str):
         """Invalidate all cache keys matching a pattern"""
-        keys_to_delete = [key for key in cls._cache.keys() if pattern in key]
+        keys_to_delete = [key for key in list(cls._cache) if pattern in key]
         for key in keys_to_delete:
-            del cls._cache[key]
-            if key in cls._ttl:
-                del cls._ttl[key]
+            cls._cache.pop(key, None)
+            cls._ttl.pop(key, None)
     
     @classmethod
     def invalidate_analytics(cls, category: str = None):
@@ -83,24 +88,69 @@ class CacheManager:
 def cache_result(ttl_seconds: int = 300):
     """Decorator to cache function results"""
     def decorator(func):
+        # Bound once per decorated function rather than looked up on every call
+        cache_get = CacheManager.get
+        cache_set = CacheManager.set
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
-            cache_key = f"{func.__name__}:{hashlib.md5(str(args).encode() + str(kwargs).encode()).hexdigest()}"
+            # Canonicalize session_type so None, '' and 'Morning' style variants share one entry
+            if 'session_type' in kwargs:
+                kwargs['session_type'] = (kwargs['session_type'] or '').lower() or None
+            
+            # Create cache key from function name and arguments (injected DB sessions are not part of the key)
+            key_args = tuple(arg for arg in args if not isinstance(arg, Session))
+            key_kwargs = {k: v for k, v in kwargs.items() if not isinstance(v, Session)}
+            cache_key = f"{func.__name__}:{hashlib.md5(str(key_args).encode() + str(key_kwargs).encode()).hexdigest()}"
             
             # Try to get from cache
-            cached = CacheManager.get(cache_key)
+            cached = cache_get(cache_key)
             if cached is not None:
                 return cached
             
             # Execute function and cache result
             result = func(*args, **kwargs)
-            CacheManager.set(cache_key, result, ttl_seconds)
+            cache_set(cache_key, result, ttl_seconds)
             return result
         return wrapper
     return decorator
 
 
+@lru_cache(maxsize=64)
+def _get_date_range(period_type: str, today: date, custom_start: Optional[date] = None,
+                    custom_end: Optional[date] = None) -> Tuple[date, date]:
+    """Compute the date range for a period type relative to `today` (memoized; rolls over daily)"""
+    if period_type == "daily":
+        # Last 30 days
+        return today - timedelta(days=30), today
+    
+    elif period_type == "weekly":
+        # Last 12 weeks, starting from Sunday
+        days_since_sunday = (today.weekday() + 1) % 7
+        last_sunday = today - timedelta(days=days_since_sunday)
+        start_date = last_sunday - timedelta(weeks=12)
+        return start_date, today
+    
+    elif period_type == "monthly":
+        # Last 12 months
+        start_date = today - timedelta(days=365)
+        return start_date, today
+    
+    elif period_type == "yearly":
+        # Last 5 academic years
+        current_year = today.year
+        if today.month < 9:  # Before September, still in previous academic year
+            current_year -= 1
+        start_year = current_year - 5
+        return date(start_year, 9, 1), today
+    
+    elif period_type == "custom" and custom_start and custom_end:
+        return custom_start, custom_end
+    
+    else:
+        return today - timedelta(days=30), today
+
+
 class TimePeriodHelper:
     """Helper class for time period calculations"""
     
@@ -108,39 +158,10 @@ class TimePeriodHelper:
     def get_date_range(period_type: str, custom_start: Optional[date] = None, 
                        custom_end: Optional[date] = None) -> Tuple[date, date]:
         """Get start and end dates for a given period type"""
-        today = date.today()
-        
-        if period_type == "daily":
-            # Last 30 days
-            return today - timedelta(days=30), today
-        
-        elif period_type == "weekly":
-            # Last 12 weeks, starting from Sunday
-            days_since_sunday = (today.weekday() + 1) % 7
-            last_sunday = today - timedelta(days=days_since_sunday)
-            start_date = last_sunday - timedelta(weeks=12)
-            return start_date, today
-        
-        elif period_type == "monthly":
-            # Last 12 months
-            start_date = today - timedelta(days=365)
-            return start_date, today
-        
-        elif period_type == "yearly":
-            # Last 5 academic years
-            current_year = today.year
-            if today.month < 9:  # Before September, still in previous academic year
-                current_year -= 1
-            start_year = current_year - 5
-            return date(start_year, 9, 1), today
-        
-        elif period_type == "custom" and custom_start and custom_end:
-            return custom_start, custom_end
-        
-        else:
-            return today - timedelta(days=30), today
+        return _get_date_range(period_type, date.today(), custom_start, custom_end)
     
     @staticmethod
+    @lru_cache(maxsize=8)
     def group_by_period(period_type: str) -> str:
         """Get SQL grouping expression for period type"""
         if period_type == "daily":
@@ -154,501 +175,552 @@ class TimePeriodHelper:
         return "day"
 
 
+# Arabic month names, indexed by month - 1
+ARABIC_MONTH_NAMES = (
+    'كانون الثاني', 'شباط', 'آذار', 'نيسان', 'أيار', 'حزيران',
+    'تموز', 'آب', 'أيلول', 'تشرين الأول', 'تشرين الثاني', 'كانون الأول'
+)
+
+# Overview count statements, built once so every dashboard call reuses the compiled SQL
+_STUDENT_SESSION_COUNTS = select(
+    func.count().filter(Student.session_type == "morning"),
+    func.count().filter(Student.session_type == "evening")
+).select_from(Student).where(
+    Student.academic_year_id == bindparam("ay"),
+    Student.is_active == True
+)
+
+_TEACHER_SESSION_COUNTS = select(Teacher.session_type, func.count()).where(
+    Teacher.academic_year_id == bindparam("ay"),
+    Teacher.is_active == True,
+    Teacher.session_type.in_(["morning", "evening"])
+).group_by(Teacher.session_type)
+
+_CLASS_SESSION_COUNTS = select(Class.session_type, func.count()).where(
+    Class.academic_year_id == bindparam("ay"),
+    Class.session_type.in_(["morning", "evening"])
+).group_by(Class.session_type)
+
+_ROLLUP_COUNTS = select(
+    DashboardRollup.metric, DashboardRollup.session_type, DashboardRollup.value
+).where(
+    DashboardRollup.academic_year_id == bindparam("ay"),
+    DashboardRollup.session_type.in_(["morning", "evening"])
+)
+
+_ACTIVITY_COUNT = select(func.count()).select_from(Activity).where(
+    Activity.academic_year_id == bindparam("ay"),
+    Activity.is_active == True
+)
+
+_SESSION_ACTIVITY_COUNT = _ACTIVITY_COUNT.where(
+    or_(Activity.session_type == bindparam("st"), Activity.session_type == "mixed")
+)
+
+# Live equivalents of the trigger-maintained StudentAcademic.subject_average/assessments_count,
+# used when the triggers have not been installed
+_ASSESSMENT_COLUMNS = [getattr(StudentAcademic, column) for column in ASSESSMENT_GRADE_COLUMNS]
+_LIVE_ASSESSMENTS_COUNT = sum(cast(column.isnot(None), Integer) for column in _ASSESSMENT_COLUMNS)
+_LIVE_SUBJECT_AVERAGE = cast(
+    sum(func.coalesce(column, 0) for column in _ASSESSMENT_COLUMNS), Float
+) / func.nullif(_LIVE_ASSESSMENTS_COUNT, 0)
+
+_TRIGGER_COUNT = text(
+    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE :pattern"
+)
+
+
 class AnalyticsService:
     """Main analytics service"""
     
     def __init__(self):
         self.time_helper = TimePeriodHelper()
+        # Trigger family prefix -> whether update_database_schema installed all of its triggers
+        self._installed_triggers: Dict[str, bool] = {}
+    
+    def _has_triggers(self, db: Session, prefix: str, expected: int) -> bool:
+        """Check once whether all triggers of a family were installed by update_database_schema"""
+        installed = self._installed_triggers.get(prefix)
+        if installed is None:
+            count = db.execute(_TRIGGER_COUNT, {"pattern": f"{prefix}%"}).scalar()
+            installed = self._installed_triggers[prefix] = count >= expected
+        return installed
+    
+    def _has_materialized_aggregates(self, db: Session) -> bool:
+        """Whether subject_average/assessments_count/paid_total are kept current by triggers"""
+        return self._has_triggers(db, "trg_agg_", len(MATERIALIZED_AGGREGATE_TRIGGERS))
+    
+    def _has_dashboard_rollup(self, db: Session) -> bool:
+        """Whether dashboard_rollups is kept current by triggers (insert/delete/update per source table)"""
+        return self._has_triggers(db, "trg_rollup_", len(DASHBOARD_ROLLUP_SOURCES) * 3)
+    
+    def _subject_average_columns(self, db: Session) -> Tuple[Any, Any]:
+        """Per-record average and assessment count: stored columns, or computed live without the triggers"""
+        if self._has_materialized_aggregates(db):
+            return StudentAcademic.subject_average, StudentAcademic.assessments_count
+        return _LIVE_SUBJECT_AVERAGE, _LIVE_ASSESSMENTS_COUNT
     
     # =========================
     # OVERVIEW ANALYTICS
     # =========================
     
     @cache_result(ttl_seconds=60)
-    def get_overview_stats(self, academic_year_id: int, session_type: Optional[str] = None,
+    def get_overview_stats(self, db: Session, academic_year_id: int, session_type: Optional[str] = None,
                            user_role: Optional[str] = None) -> Dict[str, Any]:
         """Get high-level overview statistics"""
-        db = SessionLocal()
-        try:
-            stats = {}
-            
-            # Student counts - get morning, evening, and total
-            morning_students = db.query(func.count(Student.id)).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True,
-                Student.session_type == "morning"
-            ).scalar() or 0
-            
-            evening_students = db.query(func.count(Student.id)).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True,
-                Student.session_type == "evening"
-            ).scalar() or 0
-            
-            stats["morning_students"] = morning_students
-            stats["evening_students"] = evening_students
-            stats["total_students"] = morning_students + evening_students
-            
-            # Teacher counts - get morning, evening, and total
-            morning_teachers = db.query(func.count(Teacher.id)).filter(
-                Teacher.academic_year_id == academic_year_id,
-                Teacher.is_active == True,
-                Teacher.session_type == "morning"
-            ).scalar() or 0
-            
-            evening_teachers = db.query(func.count(Teacher.id)).filter(
-                Teacher.academic_year_id == academic_year_id,
-                Teacher.is_active == True,
-                Teacher.session_type == "evening"
-            ).scalar() or 0
-            
-            stats["morning_teachers"] = morning_teachers
-            stats["evening_teachers"] = evening_teachers
-            stats["total_teachers"] = morning_teachers + evening_teachers
-            
-            # Class counts - get morning, evening, and total
-            morning_classes = db.query(func.count(Class.id)).filter(
-                Class.academic_year_id == academic_year_id,
-                Class.session_type == "morning"
-            ).scalar() or 0
-            
-            evening_classes = db.query(func.count(Class.id)).filter(
-                Class.academic_year_id == academic_year_id,
-                Class.session_type == "evening"
-            ).scalar() or 0
-            
-            stats["morning_classes"] = morning_classes
-            stats["evening_classes"] = evening_classes
-            stats["total_classes"] = morning_classes + evening_classes
-            
-            # Activity count (not session-specific for total)
-            activity_query = db.query(func.count(Activity.id)).filter(
-                Activity.academic_year_id == academic_year_id,
-                Activity.is_active == True
+        stats = {}
+        
+        params = {"ay": academic_year_id}
+        
+        # Student/teacher/class counts come from the trigger-maintained rollup; without its triggers
+        # the rollup rows go stale, so they are only trusted when the triggers exist.
+        # Years it has no rows for are counted live
+        counts = {}
+        if self._has_dashboard_rollup(db):
+            counts = {(metric, session): value for metric, session, value in db.execute(_ROLLUP_COUNTS, params).all()}
+        if not counts:
+            # Student counts - morning and evening in a single scan using FILTER aggregates
+            morning_students, evening_students = db.execute(_STUDENT_SESSION_COUNTS, params).one()
+            counts[("students", "morning")] = morning_students or 0
+            counts[("students", "evening")] = evening_students or 0
+            
+            # Teacher and class counts - morning and evening from one grouped query each
+            for session, count in db.execute(_TEACHER_SESSION_COUNTS, params).all():
+                counts[("teachers", session)] = count
+            for session, count in db.execute(_CLASS_SESSION_COUNTS, params).all():
+                counts[("classes", session)] = count
+        
+        for metric in ("students", "teachers", "classes"):
+            morning = counts.get((metric, "morning"), 0)
+            evening = counts.get((metric, "evening"), 0)
+            stats[f"morning_{metric}"] = morning
+            stats[f"evening_{metric}"] = evening
+            stats[f"total_{metric}"] = morning + evening
+        
+        # Activity count (not session-specific for total)
+        if session_type and session_type in ["morning", "evening"]:
+            activity_count = db.execute(_SESSION_ACTIVITY_COUNT, {**params, "st": session_type}).scalar()
+        else:
+            activity_count = db.execute(_ACTIVITY_COUNT, params).scalar()
+        stats["total_activities"] = activity_count or 0
+        
+        return stats
+    
+    def get_full_dashboard(self, db: Session, academic_year_id: int, period_type: str = "monthly",
+                           session_type: Optional[str] = None,
+                           user_role: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get every dashboard component in one call
+        All components run on the caller's session, so the page costs one connection checkout
+        """
+        return {
+            "overview": self.get_overview_stats(
+                db, academic_year_id, session_type=session_type, user_role=user_role
+            ),
+            "student_distribution": self.get_student_distribution(
+                db, academic_year_id, session_type=session_type
+            ),
+            "academic_performance": self.get_academic_performance(
+                db, academic_year_id, session_type=session_type
+            ),
+            "attendance": self.get_attendance_analytics(
+                db, academic_year_id, period_type=period_type, session_type=session_type
             )
-            if session_type and session_type in ["morning", "evening"]:
-                activity_query = activity_query.filter(
-                    or_(Activity.session_type == session_type, Activity.session_type == "mixed")
-                )
-            stats["total_activities"] = activity_query.scalar() or 0
-            
-            return stats
-            
-        finally:
-            db.close()
+        }
     
     # =========================
     # STUDENT ANALYTICS
     # =========================
     
     @cache_result(ttl_seconds=60)
-    def get_student_distribution(self, academic_year_id: int, 
+    def get_student_distribution(self, db: Session, academic_year_id: int, 
                                 session_type: Optional[str] = None) -> Dict[str, Any]:
         """Get student distribution by various categories"""
-        db = SessionLocal()
-        try:
-            base_query = db.query(Student).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True
-            )
-            if session_type:
-                base_query = base_query.filter(Student.session_type == session_type)
-            
+        filters = [
+            Student.academic_year_id == academic_year_id,
+            Student.is_active == True
+        ]
+        if session_type:
+            filters.append(Student.session_type == session_type)
+        
+        # All four distributions in one round-trip: each branch is tagged with its bucket name
+        # and pads the columns it does not group by with NULL
+        no_value = null()
+        distribution_rows = db.execute(union_all(
             # By grade level
-            grade_distribution = db.query(
-                Student.grade_level,
-                Student.grade_number,
-                func.count(Student.id).label("count")
-            ).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True
-            )
-            if session_type:
-                grade_distribution = grade_distribution.filter(Student.session_type == session_type)
-            grade_distribution = grade_distribution.group_by(
-                Student.grade_level, Student.grade_number
-            ).all()
-            
+            select(
+                literal("grade").label("bucket"), Student.grade_level, Student.grade_number,
+                no_value.label("section"), no_value.label("category"), no_value.label("session_type"),
+                func.count().label("count")
+            ).where(*filters).group_by(Student.grade_level, Student.grade_number),
             # By gender (with session_type for filtering)
-            gender_distribution = db.query(
-                Student.gender,
-                Student.session_type,
-                func.count(Student.id).label("count")
-            ).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True
-            )
-            if session_type:
-                gender_distribution = gender_distribution.filter(Student.session_type == session_type)
-            gender_distribution = gender_distribution.group_by(Student.gender, Student.session_type).all()
-            
+            select(
+                literal("gender"), no_value, no_value, no_value, Student.gender, Student.session_type,
+                func.count()
+            ).where(*filters).group_by(Student.gender, Student.session_type),
             # By transportation (with session_type for filtering)
-            transport_distribution = db.query(
-                Student.transportation_type,
-                Student.session_type,
-                func.count(Student.id).label("count")
-            ).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True
-            )
-            if session_type:
-                transport_distribution = transport_distribution.filter(Student.session_type == session_type)
-            transport_distribution = transport_distribution.group_by(Student.transportation_type, Student.session_type).all()
-            
+            select(
+                literal("transportation"), no_value, no_value, no_value, Student.transportation_type,
+                Student.session_type, func.count()
+            ).where(*filters).group_by(Student.transportation_type, Student.session_type),
             # By section (class distribution)
-            section_distribution = db.query(
-                Student.grade_level,
-                Student.grade_number,
-                Student.section,
-                Student.session_type,
-                func.count(Student.id).label("count")
-            ).filter(
-                Student.academic_year_id == academic_year_id,
-                Student.is_active == True
-            )
-            if session_type:
-                section_distribution = section_distribution.filter(Student.session_type == session_type)
-            section_distribution = section_distribution.group_by(
+            select(
+                literal("section"), Student.grade_level, Student.grade_number, Student.section, no_value,
+                Student.session_type, func.count()
+            ).where(*filters).group_by(
                 Student.grade_level, Student.grade_number, Student.section, Student.session_type
-            ).all()
-            
-            return {
-                "by_grade": [
-                    {
-                        "grade_level": level,
-                        "grade_number": number,
-                        "count": count,
-                        "label": f"{level} - {number}"
-                    }
-                    for level, number, count in grade_distribution
-                ],
-                "by_gender": [
-                    {"gender": gender, "session_type": session, "count": count}
-                    for gender, session, count in gender_distribution
-                ],
-                "by_transportation": [
-                    {"type": transport, "session_type": session, "count": count}
-                    for transport, session, count in transport_distribution
-                ],
-                "by_section": [
-                    {
-                        "grade_level": level,
-                        "grade_number": number,
-                        "section": section,
-                        "session_type": session,
-                        "count": count,
-                        "label": f"{level} {number} - {section}"
-                    }
-                    for level, number, section, session, count in section_distribution
-                ]
-            }
-            
-        finally:
-            db.close()
+            )
+        )).all()
+        
+        grade_distribution = []
+        gender_distribution = []
+        transport_distribution = []
+        section_distribution = []
+        for bucket, level, number, section, category, session, count in distribution_rows:
+            if bucket == "grade":
+                grade_distribution.append((level, number, count))
+            elif bucket == "gender":
+                gender_distribution.append((category, session, count))
+            elif bucket == "transportation":
+                transport_distribution.append((category, session, count))
+            else:
+                section_distribution.append((level, number, section, session, count))
+        
+        return {
+            "by_grade": [
+                {
+                    "grade_level": level,
+                    "grade_number": number,
+                    "count": count,
+                    "label": f"{level} - {number}"
+                }
+                for level, number, count in grade_distribution
+            ],
+            "by_gender": [
+                {"gender": gender, "session_type": session, "count": count}
+                for gender, session, count in gender_distribution
+            ],
+            "by_transportation": [
+                {"type": transport, "session_type": session, "count": count}
+                for transport, session, count in transport_distribution
+            ],
+            "by_section": [
+                {
+                    "grade_level": level,
+                    "grade_number": number,
+                    "section": section,
+                    "session_type": session,
+                    "count": count,
+                    "label": f"{level} {number} - {section}"
+                }
+                for level, number, section, session, count in section_distribution
+            ]
+        }
     
     @cache_result(ttl_seconds=60)
-    def get_academic_performance(self, academic_year_id: int, session_type: Optional[str] = None,
+    def get_academic_performance(self, db: Session, academic_year_id: int, session_type: Optional[str] = None,
                                  class_id: Optional[int] = None) -> Dict[str, Any]:
         """Get academic performance statistics"""
-        db = SessionLocal()
-        try:
-            # Base query for student academics
-            academic_query = db.query(StudentAcademic).filter(
-                StudentAcademic.academic_year_id == academic_year_id
-            )
-            
-            if class_id:
-                academic_query = academic_query.join(Student).filter(Student.class_id == class_id)
-            elif session_type:
-                academic_query = academic_query.join(Student).filter(Student.session_type == session_type)
-            
-            records = academic_query.all()
-            
-            if not records:
-                return {"error": "No academic records found"}
-            
-            # Calculate statistics for each exam type
-            def calc_stats(values):
-                if not values:
-                    return {"average": 0, "highest": 0, "lowest": 0, "count": 0}
-                return {
-                    "average": round(sum(values) / len(values), 2),
-                    "highest": round(max(values), 2),
-                    "lowest": round(min(values), 2),
-                    "count": len(values)
-                }
-            
-            # Collect grades by type
-            board_grades = [r.board_grades for r in records if r.board_grades is not None]
-            recitation_grades = [r.recitation_grades for r in records if r.recitation_grades is not None]
-            
+        # Filtered academic rows, joined to Student once and shared by both aggregates below
+        academic_rows = select(StudentAcademic).where(
+            StudentAcademic.academic_year_id == academic_year_id
+        )
+        
+        if class_id:
+            academic_rows = academic_rows.join(Student).where(Student.class_id == class_id)
+        elif session_type:
+            academic_rows = academic_rows.join(Student).where(Student.session_type == session_type)
+        
+        academic_rows = academic_rows.subquery('academic_rows')
+        
+        # Cheap probe so empty years stop at the first index lookup instead of aggregating
+        if db.query(academic_rows.c.id).limit(1).first() is None:
+            return {"error": "No academic records found"}
+        
+        # Min/max/avg/count for every grade column in one aggregate row
+        grade_columns = [
+            ("board_grades", academic_rows.c.board_grades),
+            ("recitation", academic_rows.c.recitation_grades),
             # Quiz grades (المذاكرات)
-            first_quiz = [r.first_quiz_grade for r in records if r.first_quiz_grade is not None]
-            second_quiz = [r.second_quiz_grade for r in records if r.second_quiz_grade is not None]
-            third_quiz = [r.third_quiz_grade for r in records if r.third_quiz_grade is not None]
-            fourth_quiz = [r.fourth_quiz_grade for r in records if r.fourth_quiz_grade is not None]
-            
+            ("first_quiz", academic_rows.c.first_quiz_grade),
+            ("second_quiz", academic_rows.c.second_quiz_grade),
+            ("third_quiz", academic_rows.c.third_quiz_grade),
+            ("fourth_quiz", academic_rows.c.fourth_quiz_grade),
             # Exam grades (الامتحانات)
-            midterm = [r.midterm_grades for r in records if r.midterm_grades is not None]
-            final_exam = [r.final_exam_grades for r in records if r.final_exam_grades is not None]
-            
-            behavior = [r.behavior_grade for r in records if r.behavior_grade is not None]
-            activity = [r.activity_grade for r in records if r.activity_grade is not None]
-            
-            # Performance by subject
-            subject_performance = db.query(
-                Subject.subject_name,
-                func.avg(StudentAcademic.final_exam_grades).label("avg_grade"),
-                func.count(StudentAcademic.id).label("student_count")
-            ).join(StudentAcademic, Subject.id == StudentAcademic.subject_id).filter(
-                StudentAcademic.academic_year_id == academic_year_id
-            )
-            
-            if class_id:
-                subject_performance = subject_performance.join(Student).filter(Student.class_id == class_id)
-            elif session_type:
-                subject_performance = subject_performance.join(Student).filter(Student.session_type == session_type)
-            
-            subject_performance = subject_performance.group_by(Subject.subject_name).all()
-            
-            return {
-                "exam_statistics": {
-                    "board_grades": calc_stats(board_grades),
-                    "recitation": calc_stats(recitation_grades),
-                    "first_quiz": calc_stats(first_quiz),
-                    "second_quiz": calc_stats(second_quiz),
-                    "third_quiz": calc_stats(third_quiz),
-                    "fourth_quiz": calc_stats(fourth_quiz),
-                    "midterm": calc_stats(midterm),
-                    "final_exam": calc_stats(final_exam),
-                    "behavior": calc_stats(behavior),
-                    "activity": calc_stats(activity)
-                },
-                "subject_performance": [
-                    {
-                        "subject": subj,
-                        "average": round(float(avg), 2) if avg else 0,
-                        "student_count": count
-                    }
-                    for subj, avg, count in subject_performance
-                ],
-                "total_records": len(records)
-            }
-            
-        finally:
-            db.close()
+            ("midterm", academic_rows.c.midterm_grades),
+            ("final_exam", academic_rows.c.final_exam_grades),
+            ("behavior", academic_rows.c.behavior_grade),
+            ("activity", academic_rows.c.activity_grade),
+        ]
+        
+        aggregates = []
+        for _, column in grade_columns:
+            aggregates.extend((func.avg(column, type_=Float), func.max(column), func.min(column), func.count(column)))
+        
+        stats_query = db.query(func.count(), *aggregates).select_from(academic_rows)
+        
+        row = stats_query.one()
+        total_records = row[0]
+        
+        exam_statistics = {}
+        for i, (name, _) in enumerate(grade_columns):
+            average, highest, lowest, count = row[1 + 4 * i:5 + 4 * i]
+            if not count:
+                exam_statistics[name] = {"average": 0, "highest": 0, "lowest": 0, "count": 0}
+            else:
+                exam_statistics[name] = {
+                    "average": round(average, 2),
+                    "highest": round(highest, 2),
+                    "lowest": round(lowest, 2),
+                    "count": count
+                }
+        
+        # Performance by subject
+        subject_performance = db.query(
+            Subject.subject_name,
+            func.avg(academic_rows.c.final_exam_grades, type_=Float).label("avg_grade"),
+            func.count().label("student_count")
+        ).join(academic_rows, Subject.id == academic_rows.c.subject_id)
+        
+        subject_performance = subject_performance.group_by(Subject.subject_name).all()
+        
+        return {
+            "exam_statistics": exam_statistics,
+            "subject_performance": [
+                {
+                    "subject": subj,
+                    "average": round(avg, 2) if avg else 0,
+                    "student_count": count
+                }
+                for subj, avg, count in subject_performance
+            ],
+            "total_records": total_records
+        }
     
     @cache_result(ttl_seconds=60)
-    def get_attendance_analytics(self, academic_year_id: int, period_type: str = "monthly",
+    def get_attendance_analytics(self, db: Session, academic_year_id: int, period_type: str = "monthly",
                                 session_type: Optional[str] = None) -> Dict[str, Any]:
         """Get attendance analytics for students and teachers"""
-        db = SessionLocal()
-        try:
-            start_date, end_date = self.time_helper.get_date_range(period_type)
-            
-            # Student attendance
-            student_attendance = db.query(
-                StudentDailyAttendance.attendance_date,
-                func.count(StudentDailyAttendance.id).label("total_records"),
-                func.sum(case((StudentDailyAttendance.is_present == True, 1), else_=0)).label("present_count"),
-                func.sum(case((StudentDailyAttendance.is_present == False, 1), else_=0)).label("absent_count")
-            ).filter(
-                StudentDailyAttendance.academic_year_id == academic_year_id,
-                StudentDailyAttendance.attendance_date.between(start_date, end_date)
-            )
-            
-            if session_type:
-                student_attendance = student_attendance.join(Student).filter(
-                    Student.session_type == session_type
-                )
-            
-            student_attendance = student_attendance.group_by(
-                StudentDailyAttendance.attendance_date
-            ).order_by(StudentDailyAttendance.attendance_date).all()
-            
-            # Teacher attendance
-            teacher_attendance = db.query(
-                TeacherPeriodAttendance.attendance_date,
-                func.count(TeacherPeriodAttendance.id).label("total_records"),
-                func.sum(case((TeacherPeriodAttendance.is_present == True, 1), else_=0)).label("present_count"),
-                func.sum(case((TeacherPeriodAttendance.is_present == False, 1), else_=0)).label("absent_count")
-            ).filter(
-                TeacherPeriodAttendance.academic_year_id == academic_year_id,
-                TeacherPeriodAttendance.attendance_date.between(start_date, end_date)
+        start_date, end_date = self.time_helper.get_date_range(period_type)
+        
+        # Student attendance rows shared by the daily histogram and the top-absent ranking
+        attendance_rows = select(
+            StudentDailyAttendance.student_id,
+            StudentDailyAttendance.attendance_date,
+            StudentDailyAttendance.is_present
+        ).where(
+            StudentDailyAttendance.academic_year_id == academic_year_id,
+            StudentDailyAttendance.attendance_date.between(start_date, end_date)
+        )
+        
+        if session_type:
+            attendance_rows = attendance_rows.join(Student).where(
+                Student.session_type == session_type
             )
-            
-            if session_type:
-                teacher_attendance = teacher_attendance.join(Teacher).filter(
-                    Teacher.session_type == session_type
-                )
-            
-            teacher_attendance = teacher_attendance.group_by(
-                TeacherPeriodAttendance.attendance_date
-            ).order_by(TeacherPeriodAttendance.attendance_date).all()
-            
-            # Top absent students
-            top_absent_students = db.query(
-                Student.id,
-                Student.full_name,
-                func.count(StudentDailyAttendance.id).label("absence_count")
-            ).join(StudentDailyAttendance).filter(
-                Student.academic_year_id == academic_year_id,
-                StudentDailyAttendance.is_present == False,
-                StudentDailyAttendance.attendance_date.between(start_date, end_date)
+        
+        attendance_rows = attendance_rows.cte('attendance_rows')
+        
+        daily_histogram = select(
+            literal("daily").label("bucket"),
+            attendance_rows.c.attendance_date,
+            func.count().label("total_records"),
+            func.count().filter(attendance_rows.c.is_present == True).label("present_count"),
+            func.count().filter(attendance_rows.c.is_present == False).label("absent_count"),
+            null().label("student_id"),
+            null().label("student_name")
+        ).group_by(attendance_rows.c.attendance_date)
+        
+        top_absent = select(
+            Student.id,
+            Student.full_name,
+            func.count().label("absence_count")
+        ).join(attendance_rows, attendance_rows.c.student_id == Student.id).where(
+            Student.academic_year_id == academic_year_id,
+            attendance_rows.c.is_present == False
+        ).group_by(
+            Student.id, Student.full_name
+        ).order_by(func.count().desc()).limit(10).subquery('top_absent')
+        
+        top_absent_rows = select(
+            literal("top_absent"),
+            null(),
+            top_absent.c.absence_count,
+            null(),
+            null(),
+            top_absent.c.id,
+            top_absent.c.full_name
+        )
+        
+        # One statement so SQLite materializes the CTE once for both aggregations
+        student_attendance = []
+        top_absent_students = []
+        for bucket, att_date, total, present, absent, sid, name in db.execute(
+            union_all(daily_histogram, top_absent_rows)
+        ).all():
+            if bucket == "daily":
+                student_attendance.append((att_date, total, present, absent))
+            else:
+                top_absent_students.append((sid, name, total))
+        
+        student_attendance.sort(key=lambda row: row[0])
+        top_absent_students.sort(key=lambda row: row[2], reverse=True)
+        
+        # Teacher attendance
+        teacher_attendance = db.query(
+            TeacherPeriodAttendance.attendance_date,
+            func.count().label("total_records"),
+            func.count().filter(TeacherPeriodAttendance.is_present == True).label("present_count"),
+            func.count().filter(TeacherPeriodAttendance.is_present == False).label("absent_count")
+        ).filter(
+            TeacherPeriodAttendance.academic_year_id == academic_year_id,
+            TeacherPeriodAttendance.attendance_date.between(start_date, end_date)
+        )
+        
+        if session_type:
+            teacher_attendance = teacher_attendance.join(Teacher).filter(
+                Teacher.session_type == session_type
             )
-            
-            if session_type:
-                top_absent_students = top_absent_students.filter(Student.session_type == session_type)
-            
-            top_absent_students = top_absent_students.group_by(
-                Student.id, Student.full_name
-            ).order_by(func.count(StudentDailyAttendance.id).desc()).limit(10).all()
-            
-            return {
-                "student_attendance": [
-                    {
-                        "date": att_date.isoformat(),
-                        "total": total,
-                        "present": present,
-                        "absent": absent,
-                        "attendance_rate": round((present / total * 100) if total > 0 else 0, 2)
-                    }
-                    for att_date, total, present, absent in student_attendance
-                ],
-                "teacher_attendance": [
-                    {
-                        "date": att_date.isoformat(),
-                        "total": total,
-                        "present": present,
-                        "absent": absent,
-                        "attendance_rate": round((present / total * 100) if total > 0 else 0, 2)
-                    }
-                    for att_date, total, present, absent in teacher_attendance
-                ],
-                "top_absent_students": [
-                    {
-                        "student_id": sid,
-                        "student_name": name,
-                        "absence_count": count
-                    }
-                    for sid, name, count in top_absent_students
-                ]
-            }
-            
-        finally:
-            db.close()
+        
+        teacher_attendance = teacher_attendance.group_by(
+            TeacherPeriodAttendance.attendance_date
+        ).order_by(TeacherPeriodAttendance.attendance_date).all()
+        
+        iso = date.isoformat
+        return {
+            "student_attendance": [
+                {
+                    "date": iso(att_date),
+                    "total": total,
+                    "present": present,
+                    "absent": absent,
+                    "attendance_rate": round((present / total * 100) if total > 0 else 0, 2)
+                }
+                for att_date, total, present, absent in student_attendance
+            ],
+            "teacher_attendance": [
+                {
+                    "date": iso(att_date),
+                    "total": total,
+                    "present": present,
+                    "absent": absent,
+                    "attendance_rate": round((present / total * 100) if total > 0 else 0, 2)
+                }
+                for att_date, total, present, absent in teacher_attendance
+            ],
+            "top_absent_students": [
+                {
+                    "student_id": sid,
+                    "student_name": name,
+                    "absence_count": count
+                }
+                for sid, name, count in top_absent_students
+            ]
+        }
     
     @cache_result(ttl_seconds=60)
-    def get_school_wide_grades(self, academic_year_id: int, 
+    def get_school_wide_grades(self, db: Session, academic_year_id: int, 
                                subject_filter: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get school-wide grade averages for all quizzes and exams by session
         Returns average grades separated by morning and evening sessions
         Calculates average of student averages (not average of all records)
         """
-        db = SessionLocal()
-        try:
-            results = []
-            
-            # Base query joining StudentAcademic with Student and Subject
-            base_query = db.query(
-                StudentAcademic,
+        # Skip the six-way unpivot entirely when the year has no academic records
+        if db.query(StudentAcademic.id).filter(
+            StudentAcademic.academic_year_id == academic_year_id
+        ).limit(1).first() is None:
+            return []
+        
+        # Unpivot the quiz/exam columns into (student, session, assignment, grade) rows
+        grade_columns = [
+            ('مذاكرة', 1, StudentAcademic.first_quiz_grade),
+            ('مذاكرة', 2, StudentAcademic.second_quiz_grade),
+            ('مذاكرة', 3, StudentAcademic.third_quiz_grade),
+            ('مذاكرة', 4, StudentAcademic.fourth_quiz_grade),
+            ('امتحان', 1, StudentAcademic.midterm_grades),
+            ('امتحان', 2, StudentAcademic.final_exam_grades)
+        ]
+        
+        filters = [
+            StudentAcademic.academic_year_id == academic_year_id,
+            Student.is_active == True,
+            Student.session_type.in_(["morning", "evening"])
+        ]
+        
+        # Apply subject filter if provided
+        if subject_filter and subject_filter != 'all':
+            filters.append(Subject.subject_name == subject_filter)
+        
+        unpivoted = union_all(*[
+            select(
                 Student.id.label('student_id'),
-                Student.session_type,
-                Subject.subject_name
-            ).join(
+                Student.session_type.label('session_type'),
+                literal(assignment_type).label('assignment_type'),
+                literal(assignment_number).label('assignment_number'),
+                grade_column.label('grade')
+            ).select_from(StudentAcademic).join(
                 Student, StudentAcademic.student_id == Student.id
             ).join(
                 Subject, StudentAcademic.subject_id == Subject.id
-            ).filter(
-                StudentAcademic.academic_year_id == academic_year_id,
-                Student.is_active == True
+            ).where(*filters, grade_column.isnot(None))
+            for assignment_type, assignment_number, grade_column in grade_columns
+        ]).subquery('unpivoted')
+        
+        # Each student's average per assignment first...
+        student_averages = select(
+            unpivoted.c.session_type,
+            unpivoted.c.assignment_type,
+            unpivoted.c.assignment_number,
+            func.avg(unpivoted.c.grade, type_=Float).label('student_avg')
+        ).group_by(
+            unpivoted.c.student_id,
+            unpivoted.c.session_type,
+            unpivoted.c.assignment_type,
+            unpivoted.c.assignment_number
+        ).subquery('student_averages')
+        
+        # ...then the sum and count of those averages per assignment and session
+        session_totals = db.execute(
+            select(
+                student_averages.c.assignment_type,
+                student_averages.c.assignment_number,
+                student_averages.c.session_type,
+                func.sum(student_averages.c.student_avg, type_=Float),
+                func.count()
+            ).group_by(
+                student_averages.c.assignment_type,
+                student_averages.c.assignment_number,
+                student_averages.c.session_type
             )
-            
-            # Apply subject filter if provided
-            if subject_filter and subject_filter != 'all':
-                base_query = base_query.filter(Subject.subject_name == subject_filter)
-            
-            records = base_query.all()
-            
-            if not records:
-                return []
-            
-            # Group by student and assignment type to calculate student averages first
-            # Structure: {assignment_type: {assignment_number: {session: {student_id: [grades]}}}}
-            student_grades = {}
-            
-            for academic, student_id, session_type, subject_name in records:
-                # Process quizzes
-                for quiz_num, grade_field in [(1, 'first_quiz_grade'), (2, 'second_quiz_grade'), 
-                                               (3, 'third_quiz_grade'), (4, 'fourth_quiz_grade')]:
-                    grade = getattr(academic, grade_field, None)
-                    if grade is not None:
-                        key = ('مذاكرة', quiz_num)
-                        if key not in student_grades:
-                            student_grades[key] = {'morning': {}, 'evening': {}}
-                        if student_id not in student_grades[key][session_type]:
-                            student_grades[key][session_type][student_id] = []
-                        student_grades[key][session_type][student_id].append(float(grade))
-                
-                # Process midterm exam
-                if academic.midterm_grades is not None:
-                    key = ('امتحان', 1)
-                    if key not in student_grades:
-                        student_grades[key] = {'morning': {}, 'evening': {}}
-                    if student_id not in student_grades[key][session_type]:
-                        student_grades[key][session_type][student_id] = []
-                    student_grades[key][session_type][student_id].append(float(academic.midterm_grades))
-                
-                # Process final exam
-                if academic.final_exam_grades is not None:
-                    key = ('امتحان', 2)
-                    if key not in student_grades:
-                        student_grades[key] = {'morning': {}, 'evening': {}}
-                    if student_id not in student_grades[key][session_type]:
-                        student_grades[key][session_type][student_id] = []
-                    student_grades[key][session_type][student_id].append(float(academic.final_exam_grades))
-            
-            # Calculate average of student averages
-            for (assignment_type, assignment_number), sessions in student_grades.items():
-                morning_student_avgs = []
-                evening_student_avgs = []
-                
-                # Calculate each student's average for this assignment
-                for student_id, grades in sessions['morning'].items():
-                    if grades:
-                        student_avg = sum(grades) / len(grades)
-                        morning_student_avgs.append(student_avg)
-                
-                for student_id, grades in sessions['evening'].items():
-                    if grades:
-                        student_avg = sum(grades) / len(grades)
-                        evening_student_avgs.append(student_avg)
-                
-                # Calculate overall average (average of student averages)
-                morning_sum = sum(morning_student_avgs) if morning_student_avgs else 0
-                morning_count = len(morning_student_avgs) if morning_student_avgs else 0
-                evening_sum = sum(evening_student_avgs) if evening_student_avgs else 0
-                evening_count = len(evening_student_avgs) if evening_student_avgs else 0
-                
-                if morning_count > 0 or evening_count > 0:
-                    results.append({
-                        'assignment_type': assignment_type,
-                        'assignment_number': assignment_number,
-                        'morning_sum': morning_sum,
-                        'morning_count': morning_count,
-                        'evening_sum': evening_sum,
-                        'evening_count': evening_count,
-                        'subject_name': 'all'
-                    })
-            
-            return results
-            
-        finally:
-            db.close()
+        ).all()
+        
+        # Flat (assignment_type, assignment_number, session) -> (sum, count) lookup
+        totals = {
+            (assignment_type, assignment_number, session): (avg_sum, avg_count)
+            for assignment_type, assignment_number, session, avg_sum, avg_count in session_totals
+        }
+        
+        # Overall average is the average of student averages (sum / count per session)
+        results = []
+        for assignment_type, assignment_number, _ in grade_columns:
+            morning_sum, morning_count = totals.get((assignment_type, assignment_number, 'morning'), (0, 0))
+            evening_sum, evening_count = totals.get((assignment_type, assignment_number, 'evening'), (0, 0))
+            if morning_count > 0 or evening_count > 0:
+                results.append({
+                    'assignment_type': assignment_type,
+                    'assignment_number': assignment_number,
+                    'morning_sum': morning_sum,
+                    'morning_count': morning_count,
+                    'evening_sum': evening_sum,
+                    'evening_count': evening_count,
+                    'subject_name': 'all'
+                })
+        
+        return results
     
     def get_student_attendance_trend(
         self,
+        db: Session,
         student_id: int,
         academic_year_id: int,
         period_type: str = "weekly"  # "weekly" or "monthly"
@@ -657,132 +729,66 @@ class AnalyticsService:
         Get student attendance trend by week or month
         Returns attendance rate (percentage) for each period
         """
-        db = SessionLocal()
-        try:
-            # Get all attendance records for the student in this academic year
-            attendance_records = db.query(StudentDailyAttendance).filter(
-                and_(
-                    StudentDailyAttendance.student_id == student_id,
-                    StudentDailyAttendance.academic_year_id == academic_year_id
-                )
-            ).order_by(StudentDailyAttendance.attendance_date).all()
-            
-            if not attendance_records:
-                return []
-            
-            # Get date range from actual attendance records
-            start_date = min(record.attendance_date for record in attendance_records)
-            end_date = max(record.attendance_date for record in attendance_records)
-            
-            # Group attendance by period
-            if period_type == "weekly":
-                return self._group_attendance_by_week(attendance_records, start_date, end_date)
-            else:  # monthly
-                return self._group_attendance_by_month(attendance_records, start_date, end_date)
-                
-        finally:
-            db.close()
-    
-    def _group_attendance_by_week(
-        self,
-        attendance_records: List[StudentDailyAttendance],
-        start_date: date,
-        end_date: date
-    ) -> List[Dict[str, Any]]:
-        """Group attendance records by week and calculate attendance rate"""
-        # Create a dictionary to store attendance by week
-        weeks_data = {}
-        
-        # Process each attendance record
-        for record in attendance_records:
-            # Calculate week number from start_date
-            days_diff = (record.attendance_date - start_date).days
-            week_num = days_diff // 7 + 1
-            
-            if week_num not in weeks_data:
-                weeks_data[week_num] = {
-                    'total_days': 0,
-                    'present_days': 0,
-                    'week_start': start_date + timedelta(days=(week_num - 1) * 7)
-                }
-            
-            weeks_data[week_num]['total_days'] += 1
-            if record.is_present:
-                weeks_data[week_num]['present_days'] += 1
+        filters = and_(
+            StudentDailyAttendance.student_id == student_id,
+            StudentDailyAttendance.academic_year_id == academic_year_id
+        )
         
-        # Calculate attendance rate for each week
-        results = []
-        for week_num in sorted(weeks_data.keys()):
-            week_data = weeks_data[week_num]
-            attendance_rate = 0
-            if week_data['total_days'] > 0:
-                attendance_rate = round((week_data['present_days'] / week_data['total_days']) * 100, 2)
-            
-            results.append({
-                'period': f'الأسبوع {week_num}',
-                'week_number': week_num,
-                'attendance_rate': attendance_rate,
-                'total_days': week_data['total_days'],
-                'present_days': week_data['present_days'],
-                'start_date': week_data['week_start'].isoformat()
-            })
+        # Weeks are counted from the student's first attendance record
+        start_date = db.query(func.min(StudentDailyAttendance.attendance_date)).filter(filters).scalar()
+        if start_date is None:
+            return []
         
-        return results
-    
-    def _group_attendance_by_month(
-        self,
-        attendance_records: List[StudentDailyAttendance],
-        start_date: date,
-        end_date: date
-    ) -> List[Dict[str, Any]]:
-        """Group attendance records by month and calculate attendance rate"""
-        # Create a dictionary to store attendance by month
-        months_data = {}
+        total_days = func.count().label('total_days')
+        present_days = func.count().filter(StudentDailyAttendance.is_present == True).label('present_days')
         
-        # Process each attendance record
-        for record in attendance_records:
-            month_key = f"{record.attendance_date.year}-{record.attendance_date.month:02d}"
+        # Group attendance by period in SQL - one row per week/month comes back
+        if period_type == "weekly":
+            week_index = cast(
+                (func.julianday(StudentDailyAttendance.attendance_date) - func.julianday(start_date)) / 7,
+                Integer
+            ).label('week_index')
+            buckets = db.query(week_index, total_days, present_days).filter(filters).group_by(
+                week_index
+            ).order_by(week_index).all()
             
-            if month_key not in months_data:
-                months_data[month_key] = {
-                    'total_days': 0,
-                    'present_days': 0,
-                    'year': record.attendance_date.year,
-                    'month': record.attendance_date.month
-                }
-            
-            months_data[month_key]['total_days'] += 1
-            if record.is_present:
-                months_data[month_key]['present_days'] += 1
-        
-        # Arabic month names
-        month_names = [
-            'كانون الثاني', 'شباط', 'آذار', 'نيسان', 'أيار', 'حزيران',
-            'تموز', 'آب', 'أيلول', 'تشرين الأول', 'تشرين الثاني', 'كانون الأول'
-        ]
+            results = []
+            for index, total, present in buckets:
+                week_num = index + 1
+                results.append({
+                    'period': f'الأسبوع {week_num}',
+                    'week_number': week_num,
+                    'attendance_rate': round((present / total) * 100, 2) if total > 0 else 0,
+                    'total_days': total,
+                    'present_days': present,
+                    'start_date': (start_date + timedelta(days=index * 7)).isoformat()
+                })
+            return results
         
-        # Calculate attendance rate for each month
+        # monthly
+        month_key = func.strftime('%Y-%m', StudentDailyAttendance.attendance_date).label('month_key')
+        buckets = db.query(month_key, total_days, present_days).filter(filters).group_by(
+            month_key
+        ).order_by(month_key).all()
+        
+        month_names = ARABIC_MONTH_NAMES
         results = []
-        for month_key in sorted(months_data.keys()):
-            month_data = months_data[month_key]
-            attendance_rate = 0
-            if month_data['total_days'] > 0:
-                attendance_rate = round((month_data['present_days'] / month_data['total_days']) * 100, 2)
-            
+        for key, total, present in buckets:
+            year, month = int(key[:4]), int(key[5:7])
             results.append({
-                'period': month_names[month_data['month'] - 1],
-                'month': month_data['month'],
-                'year': month_data['year'],
-                'attendance_rate': attendance_rate,
-                'total_days': month_data['total_days'],
-                'present_days': month_data['present_days'],
-                'month_key': month_key
+                'period': month_names[month - 1],
+                'month': month,
+                'year': year,
+                'attendance_rate': round((present / total) * 100, 2) if total > 0 else 0,
+                'total_days': total,
+                'present_days': present,
+                'month_key': key
             })
-        
         return results
     
     def get_student_grades_timeline(
         self,
+        db: Session,
         student_id: int,
         academic_year_id: int
     ) -> List[Dict[str, Any]]:
@@ -790,86 +796,74 @@ class AnalyticsService:
         Get student's average grades timeline across all subjects
         Timeline order depends on class quizzes_count (2 or 4)
         """
-        db = SessionLocal()
-        try:
-            # Get student to find their class
-            student = db.query(Student).filter(Student.id == student_id).first()
-            if not student:
-                return []
-            
-            # Get the class to know quizzes_count
-            student_class = db.query(Class).filter(
-                and_(
-                    Class.id == student.class_id,
-                    Class.academic_year_id == academic_year_id
-                )
-            ).first()
-            
-            if not student_class:
-                return []
-            
-            quizzes_count = student_class.quizzes_count
-            
-            # Get all academic records for this student in this academic year
-            academic_records = db.query(StudentAcademic).filter(
-                and_(
-                    StudentAcademic.student_id == student_id,
-                    StudentAcademic.academic_year_id == academic_year_id
-                )
-            ).all()
-            
-            if not academic_records:
-                return []
-            
-            # Calculate averages for each assessment
-            timeline = []
-            
-            if quizzes_count == 2:
-                # Order: مذاكرة أولى، امتحان نصفي، مذاكرة ثانية، امتحان نهائي
-                assessments = [
-                    ('first_quiz_grade', 'مذاكرة أولى'),
-                    ('midterm_grades', 'امتحان نصفي'),
-                    ('second_quiz_grade', 'مذاكرة ثانية'),
-                    ('final_exam_grades', 'امتحان نهائي')
-                ]
-            else:  # quizzes_count == 4
-                # Order: مذاكرة أولى، مذاكرة ثانية، امتحان نصفي، مذاكرة ثالثة، مذاكرة رابعة، امتحان نهائي
-                assessments = [
-                    ('first_quiz_grade', 'مذاكرة أولى'),
-                    ('second_quiz_grade', 'مذاكرة ثانية'),
-                    ('midterm_grades', 'امتحان نصفي'),
-                    ('third_quiz_grade', 'مذاكرة ثالثة'),
-                    ('fourth_quiz_grade', 'مذاكرة رابعة'),
-                    ('final_exam_grades', 'امتحان نهائي')
-                ]
-            
-            # Calculate average for each assessment across all subjects
-            for field_name, label in assessments:
-                grades = []
-                for record in academic_records:
-                    grade = getattr(record, field_name, None)
-                    if grade is not None:
-                        grades.append(float(grade))
-                
-                # Calculate average
-                if grades:
-                    average = round(sum(grades) / len(grades), 2)
-                else:
-                    average = 0
-                
-                timeline.append({
-                    'assessment': label,
-                    'average_grade': average,
-                    'subjects_count': len(grades)
-                })
-            
-            return timeline
-            
-        finally:
-            db.close()
+        # Class quizzes_count plus average/graded-subject count for every assessment column,
+        # fetched in one round trip through student -> class -> academic records
+        assessment_fields = [
+            'first_quiz_grade', 'second_quiz_grade', 'third_quiz_grade',
+            'fourth_quiz_grade', 'midterm_grades', 'final_exam_grades'
+        ]
+        aggregates = []
+        for field_name in assessment_fields:
+            column = getattr(StudentAcademic, field_name)
+            aggregates.extend((func.avg(column, type_=Float), func.count(column)))
+        
+        row = db.query(
+            Class.quizzes_count,
+            func.count(StudentAcademic.id),
+            *aggregates
+        ).select_from(Student).join(
+            Class, Student.class_id == Class.id
+        ).outerjoin(
+            StudentAcademic,
+            and_(
+                StudentAcademic.student_id == Student.id,
+                StudentAcademic.academic_year_id == academic_year_id
+            )
+        ).filter(
+            Student.id == student_id,
+            Class.academic_year_id == academic_year_id
+        ).group_by(Class.id, Class.quizzes_count).first()
+        
+        # No student, no class in this year, or no academic records
+        if not row or not row[1]:
+            return []
+        
+        quizzes_count = row[0]
+        
+        if quizzes_count == 2:
+            # Order: مذاكرة أولى، امتحان نصفي، مذاكرة ثانية، امتحان نهائي
+            assessments = [
+                ('first_quiz_grade', 'مذاكرة أولى'),
+                ('midterm_grades', 'امتحان نصفي'),
+                ('second_quiz_grade', 'مذاكرة ثانية'),
+                ('final_exam_grades', 'امتحان نهائي')
+            ]
+        else:  # quizzes_count == 4
+            # Order: مذاكرة أولى، مذاكرة ثانية، امتحان نصفي، مذاكرة ثالثة، مذاكرة رابعة، امتحان نهائي
+            assessments = [
+                ('first_quiz_grade', 'مذاكرة أولى'),
+                ('second_quiz_grade', 'مذاكرة ثانية'),
+                ('midterm_grades', 'امتحان نصفي'),
+                ('third_quiz_grade', 'مذاكرة ثالثة'),
+                ('fourth_quiz_grade', 'مذاكرة رابعة'),
+                ('final_exam_grades', 'امتحان نهائي')
+            ]
+        
+        timeline = []
+        for field_name, label in assessments:
+            index = assessment_fields.index(field_name)
+            average, subjects_count = row[2 + 2 * index], row[3 + 2 * index]
+            timeline.append({
+                'assessment': label,
+                'average_grade': round(average, 2) if subjects_count else 0,
+                'subjects_count': subjects_count
+            })
+        
+        return timeline
     
     def get_student_grades_by_subject(
         self,
+        db: Session,
         student_id: int,
         academic_year_id: int
     ) -> List[Dict[str, Any]]:
@@ -877,66 +871,66 @@ class AnalyticsService:
         Get student's average grades by subject
         Calculates average of all assessments (quizzes + exams) for each subject
         """
-        db = SessionLocal()
-        try:
-            # Get all academic records for this student in this academic year
-            academic_records = db.query(StudentAcademic).filter(
-                and_(
-                    StudentAcademic.student_id == student_id,
-                    StudentAcademic.academic_year_id == academic_year_id
-                )
-            ).all()
-            
-            if not academic_records:
-                return []
-            
-            # Calculate average for each subject
-            subject_averages = []
-            
-            for record in academic_records:
-                # Get subject name
-                subject = db.query(Subject).filter(Subject.id == record.subject_id).first()
-                if not subject:
-                    continue
-                
-                # Collect all grades for this subject
-                grades = []
-                
-                # Add quiz grades
-                if record.first_quiz_grade is not None:
-                    grades.append(float(record.first_quiz_grade))
-                if record.second_quiz_grade is not None:
-                    grades.append(float(record.second_quiz_grade))
-                if record.third_quiz_grade is not None:
-                    grades.append(float(record.third_quiz_grade))
-                if record.fourth_quiz_grade is not None:
-                    grades.append(float(record.fourth_quiz_grade))
-                
-                # Add exam grades
-                if record.midterm_grades is not None:
-                    grades.append(float(record.midterm_grades))
-                if record.final_exam_grades is not None:
-                    grades.append(float(record.final_exam_grades))
-                
-                # Calculate average
-                if grades:
-                    average = round(sum(grades) / len(grades), 2)
-                else:
-                    average = 0
-                
-                subject_averages.append({
-                    'subject_name': subject.subject_name,
-                    'average_grade': average,
-                    'assessments_count': len(grades)
-                })
-            
-            return subject_averages
-            
-        finally:
-            db.close()
+        # subject_average/assessments_count are kept current by database triggers
+        average_column, count_column = self._subject_average_columns(db)
+        
+        # Inner join skips records whose subject no longer exists
+        academic_records = db.query(
+            Subject.subject_name,
+            average_column,
+            count_column
+        ).join(Subject, Subject.id == StudentAcademic.subject_id).filter(
+            and_(
+                StudentAcademic.student_id == student_id,
+                StudentAcademic.academic_year_id == academic_year_id
+            )
+        ).order_by(StudentAcademic.id).all()
+        
+        subject_averages = [
+            {
+                'subject_name': subject_name,
+                'average_grade': round(float(average), 2) if assessments_count else 0,
+                'assessments_count': assessments_count
+            }
+            for subject_name, average, assessments_count in academic_records
+        ]
+        
+        return subject_averages
+    
+    def get_bulk_subject_averages(
+        self,
+        db: Session,
+        academic_year_id: int
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Get every student's average grades by subject for an academic year (bulk reports)
+        Same per-subject entries as get_student_grades_by_subject, keyed by student id
+        """
+        # Averages are materialized per record, so the whole year is one indexed read
+        # (computed from the grade columns in the same query when the triggers are missing)
+        average_column, count_column = self._subject_average_columns(db)
+        academic_records = db.query(
+            StudentAcademic.student_id,
+            Subject.subject_name,
+            average_column,
+            count_column
+        ).join(Subject, Subject.id == StudentAcademic.subject_id).filter(
+            StudentAcademic.academic_year_id == academic_year_id
+        ).order_by(StudentAcademic.student_id, StudentAcademic.id).all()
+        
+        averages_by_student: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for student_id, subject_name, average, assessments_count in academic_records:
+            averages_by_student[student_id].append({
+                'subject_name': subject_name,
+                'average_grade': round(float(average), 2) if assessments_count else 0,
+                'assessments_count': assessments_count
+            })
+        
+        return dict(averages_by_student)
     
     def get_student_financial_summary(
         self,
+        db: Session,
         student_id: int,
         academic_year_id: int
     ) -> Dict[str, Any]:
@@ -944,65 +938,55 @@ class AnalyticsService:
         Get student's financial summary (paid vs remaining balance)
         Returns data for pie chart display
         """
-        db = SessionLocal()
-        try:
-            from app.models.students import StudentFinance, StudentPayment
-            
-            # Get student's finance record
-            finance = db.query(StudentFinance).filter(
-                and_(
-                    StudentFinance.student_id == student_id,
-                    StudentFinance.academic_year_id == academic_year_id
-                )
-            ).first()
-            
-            if not finance:
-                return {
-                    'total_amount': 0,
-                    'total_paid': 0,
-                    'remaining_balance': 0,
-                    'paid_percentage': 0,
-                    'remaining_percentage': 0
-                }
-            
-            # Calculate total amount owed
-            total_amount = float(finance.total_amount)
-            
-            # Get all payments for this student in this academic year
-            payments = db.query(StudentPayment).filter(
-                and_(
-                    StudentPayment.student_id == student_id,
-                    StudentPayment.academic_year_id == academic_year_id
-                )
-            ).all()
-            
-            # Calculate total paid
-            total_paid = sum(float(payment.payment_amount) for payment in payments)
-            
-            # Calculate remaining balance
-            remaining_balance = max(0, total_amount - total_paid)
-            
-            # Calculate percentages
-            if total_amount > 0:
-                paid_percentage = round((total_paid / total_amount) * 100, 2)
-                remaining_percentage = round((remaining_balance / total_amount) * 100, 2)
-            else:
-                paid_percentage = 0
-                remaining_percentage = 0
-            
+        # Get student's finance record; paid_total is kept current by database triggers
+        finance = db.query(StudentFinance).filter(
+            and_(
+                StudentFinance.student_id == student_id,
+                StudentFinance.academic_year_id == academic_year_id
+            )
+        ).first()
+        
+        if not finance:
             return {
-                'total_amount': round(total_amount, 2),
-                'total_paid': round(total_paid, 2),
-                'remaining_balance': round(remaining_balance, 2),
-                'paid_percentage': paid_percentage,
-                'remaining_percentage': remaining_percentage
+                'total_amount': 0,
+                'total_paid': 0,
+                'remaining_balance': 0,
+                'paid_percentage': 0,
+                'remaining_percentage': 0
             }
-            
-        finally:
-            db.close()
+        
+        # Calculate total amount owed (discounts and other revenue items are model properties)
+        total_amount = float(finance.total_amount)
+        if self._has_materialized_aggregates(db):
+            total_paid = float(finance.paid_total or 0)
+        else:
+            total_paid = float(db.query(func.coalesce(func.sum(StudentPayment.payment_amount), 0)).filter(
+                StudentPayment.student_id == student_id,
+                StudentPayment.academic_year_id == academic_year_id
+            ).scalar())
+        
+        # Calculate remaining balance
+        remaining_balance = max(0, total_amount - total_paid)
+        
+        # Calculate percentages
+        if total_amount > 0:
+            paid_percentage = round((total_paid / total_amount) * 100, 2)
+            remaining_percentage = round((remaining_balance / total_amount) * 100, 2)
+        else:
+            paid_percentage = 0
+            remaining_percentage = 0
+        
+        return {
+            'total_amount': round(total_amount, 2),
+            'total_paid': round(total_paid, 2),
+            'remaining_balance': round(remaining_balance, 2),
+            'paid_percentage': paid_percentage,
+            'remaining_percentage': remaining_percentage
+        }
     
     def get_student_behavior_records(
         self,
+        db: Session,
         student_id: int,
         academic_year_id: int
     ) -> List[Dict[str, Any]]:
@@ -1010,35 +994,26 @@ class AnalyticsService:
         Get student's behavior records (مشاغبة، مشاركة مميزة، بطاقة شكر، ملاحظة، إنذار، استدعاء ولي أمر، فصل)
         Returns all records sorted by date (most recent first)
         """
-        db = SessionLocal()
-        try:
-            # Get all behavior records for this student in this academic year
-            records = db.query(StudentBehaviorRecord).filter(
-                and_(
-                    StudentBehaviorRecord.student_id == student_id,
-                    StudentBehaviorRecord.academic_year_id == academic_year_id
-                )
-            ).order_by(StudentBehaviorRecord.record_date.desc()).all()
-            
-            # Format records
-            formatted_records = []
-            for record in records:
-                # Get recorded by user name if available
-                recorded_by_name = None
-                if record.recorded_by_user:
-                    recorded_by_name = record.recorded_by_user.username
-                
-                formatted_records.append({
-                    'id': record.id,
-                    'record_type': record.record_type,
-                    'record_date': record.record_date.isoformat() if record.record_date else None,
-                    'description': record.description,
-                    'severity': record.severity,
-                    'recorded_by': recorded_by_name,
-                    'created_at': record.created_at.isoformat() if record.created_at else None
-                })
-            
-            return formatted_records
-            
-        finally:
-            db.close()
+        # Get all behavior records for this student in this academic year, with the recording
+        # user's name joined in and dates formatted as ISO strings by SQLite
+        records = db.query(
+            StudentBehaviorRecord.id,
+            StudentBehaviorRecord.record_type,
+            func.strftime('%Y-%m-%d', StudentBehaviorRecord.record_date).label('record_date'),
+            StudentBehaviorRecord.description,
+            StudentBehaviorRecord.severity,
+            User.username.label('recorded_by'),
+            func.strftime('%Y-%m-%dT%H:%M:%S', StudentBehaviorRecord.created_at).label('created_at')
+        ).outerjoin(
+            User, StudentBehaviorRecord.recorded_by == User.id
+        ).filter(
+            and_(
+                StudentBehaviorRecord.student_id == student_id,
+                StudentBehaviorRecord.academic_year_id == academic_year_id
+            )
+        ).order_by(StudentBehaviorRecord.record_date.desc()).all()
+        
+        # Format records
+        formatted_records = [record._asdict() for record in records]
+        
+        return formatted_records
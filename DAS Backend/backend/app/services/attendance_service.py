@@ -0,0 +1,31 @@
+"""
+Attendance Service - Batched writes for daily attendance records
+Inserts whole classes/days in one executemany instead of one ORM add() per row
+"""
+from sqlalchemy.orm import Session
+from typing import List, Dict, Any
+from app.models.daily import StudentDailyAttendance, TeacherPeriodAttendance
+
+
+class AttendanceService:
+    """Service for bulk attendance writes"""
+
+    @staticmethod
+    def bulk_mark(db: Session, rows: List[Dict[str, Any]], model=StudentDailyAttendance) -> int:
+        """
+        Insert attendance rows (plain dicts, not ORM instances) and commit
+        Bypasses the unit-of-work so the whole batch is sent as a single executemany
+        """
+        if rows:
+            db.bulk_insert_mappings(model, rows)
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def bulk_mark_teachers(db: Session, rows: List[Dict[str, Any]]) -> int:
+        """Insert teacher period attendance rows and commit"""
+        return AttendanceService.bulk_mark(db, rows, model=TeacherPeriodAttendance)
+
+
+# Global instance
+attendance_service = AttendanceService()
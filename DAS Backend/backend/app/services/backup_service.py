@@ -1,7 +1,10 @@
 import os
 import shutil
 import zipfile
+import tarfile
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from pathlib import Path
@@ -17,8 +20,14 @@ except ImportError:
     import sqlite3
     print("Warning: sqlcipher3-wheels not found. Using regular sqlite3. Database backups will not be encrypted.")
 
+# Multi-threaded zstd for files backups; falls back to ZIP when not installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from ..config import settings
-from ..database import engine, SessionLocal
+from ..database import engine, SessionLocal, sqlcipher_key_pragma, exclusive_database_access
 from ..models.system import BackupHistory
 
 logger = logging.getLogger(__name__)
@@ -26,6 +35,16 @@ logger = logging.getLogger(__name__)
 class BackupService:
     """Comprehensive backup service for database and files"""
     
+    # Upload types that are already compressed and gain nothing from DEFLATE
+    PRECOMPRESSED_SUFFIXES = {
+        '.jpg', '.jpeg', '.png', '.gif', '.webp', '.pdf',
+        '.zip', '.gz', '.docx', '.xlsx', '.pptx', '.mp3', '.mp4'
+    }
+    
+    # Uploads are capped at MAX_FILE_SIZE, so at most READ_AHEAD_FILES of them are held in memory
+    READ_AHEAD_WORKERS = 4
+    READ_AHEAD_FILES = 8
+    
     def __init__(self):
         self.backup_dir = Path(settings.BACKUP_DIRECTORY)
         self.backup_dir.mkdir(exist_ok=True)
@@ -37,6 +56,15 @@ class BackupService:
         
         for dir_path in [self.db_backup_dir, self.file_backup_dir, self.full_backup_dir]:
             dir_path.mkdir(exist_ok=True)
+        
+        # Table count only changes with a schema migration
+        self._tables_count_cache: Optional[int] = None
+        # Parsed *_metadata.json files keyed by path -> (mtime, metadata)
+        self._metadata_cache: Dict[Path, tuple] = {}
+    
+    def invalidate_schema_cache(self):
+        """Forget cached schema metadata (call after a migration or restore changes the tables)"""
+        self._tables_count_cache = None
     
     def create_database_backup(self, backup_name: Optional[str] = None) -> Dict[str, Any]:
         """Create a database backup"""
@@ -46,18 +74,17 @@ class BackupService:
             
             backup_path = self.db_backup_dir / f"{backup_name}.sqlite"
             
-            # Create database backup using SQLCipher backup API
+            # Create a compacted copy with VACUUM INTO; SQLCipher encrypts it with the
+            # source key, so only one connection (one key derivation) is needed.
+            # VACUUM INTO will not overwrite, so clear a previous backup of the same name
+            backup_path.unlink(missing_ok=True)
             source_db = sqlite3.connect(settings.DATABASE_URL.replace("sqlite:///", ""))
-            source_cursor = source_db.cursor()
-            source_cursor.execute(f"PRAGMA key='{settings.DATABASE_PASSWORD}'")
-            
-            backup_db = sqlite3.connect(str(backup_path))
-            backup_cursor = backup_db.cursor()
-            backup_cursor.execute(f"PRAGMA key='{settings.DATABASE_PASSWORD}'")
-            
-            source_db.backup(backup_db)
-            source_db.close()
-            backup_db.close()
+            try:
+                source_cursor = source_db.cursor()
+                source_cursor.execute(sqlcipher_key_pragma(settings.DATABASE_PASSWORD))
+                source_cursor.execute("VACUUM INTO ?", (str(backup_path),))
+            finally:
+                source_db.close()
             
             # Create metadata file
             metadata = {
@@ -97,7 +124,8 @@ class BackupService:
             if not backup_name:
                 backup_name = f"files_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             
-            backup_path = self.file_backup_dir / f"{backup_name}.zip"
+            archive_format = "tar.zst" if zstandard is not None else "zip"
+            backup_path = self.file_backup_dir / f"{backup_name}.{archive_format}"
             uploads_dir = Path(settings.UPLOAD_DIRECTORY)
             
             if not uploads_dir.exists():
@@ -108,21 +136,19 @@ class BackupService:
                     "message": "No files to backup"
                 }
             
-            # Create zip archive of uploads directory
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in uploads_dir.rglob('*'):
-                    if file_path.is_file():
-                        arcname = file_path.relative_to(uploads_dir.parent)
-                        zipf.write(file_path, arcname)
+            if archive_format == "tar.zst":
+                file_count = self._write_files_tar_zst(uploads_dir, backup_path)
+            else:
+                file_count = self._write_files_zip(uploads_dir, backup_path)
             
             # Create metadata
-            file_count = len(list(uploads_dir.rglob('*')))
             metadata = {
                 "backup_type": "files",
                 "backup_name": backup_name,
                 "created_at": datetime.now().isoformat(),
                 "file_size": backup_path.stat().st_size,
                 "files_count": file_count,
+                "archive_format": archive_format,
                 "source_directory": str(uploads_dir)
             }
             
@@ -149,6 +175,49 @@ class BackupService:
                 "error": str(e)
             }
     
+    def _write_files_tar_zst(self, uploads_dir: Path, backup_path: Path) -> int:
+        """Stream the uploads directory into a tar compressed by zstd on all cores"""
+        file_count = 0
+        compressor = zstandard.ZstdCompressor(level=3, threads=-1)
+        with open(backup_path, 'wb') as raw, compressor.stream_writer(raw) as zst, \
+                tarfile.open(fileobj=zst, mode='w|') as tar:
+            for file_path in uploads_dir.rglob('*'):
+                if file_path.is_file():
+                    tar.add(file_path, arcname=str(file_path.relative_to(uploads_dir.parent)), recursive=False)
+                    file_count += 1
+        return file_count
+    
+    def _write_files_zip(self, uploads_dir: Path, backup_path: Path) -> int:
+        """Zip the uploads directory, counting files in the same pass"""
+        # Worker threads read the next files while this thread compresses the current one
+        file_count = 0
+        pending = deque()
+        with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf, \
+                ThreadPoolExecutor(max_workers=self.READ_AHEAD_WORKERS) as pool:
+            for file_path in uploads_dir.rglob('*'):
+                if file_path.is_file():
+                    arcname = file_path.relative_to(uploads_dir.parent)
+                    pending.append(pool.submit(self._read_upload, file_path, arcname))
+                    file_count += 1
+                    # Bound memory to READ_AHEAD_FILES uploads held at once
+                    if len(pending) >= self.READ_AHEAD_FILES:
+                        self._write_upload(zipf, *pending.popleft().result())
+            while pending:
+                self._write_upload(zipf, *pending.popleft().result())
+        return file_count
+    
+    @staticmethod
+    def _read_upload(file_path: Path, arcname: Path):
+        """Read an upload and its zip entry header (runs on a read-ahead worker)"""
+        return zipfile.ZipInfo.from_file(file_path, arcname), file_path.read_bytes()
+    
+    def _write_upload(self, zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, data: bytes):
+        """Add a read upload to the archive; images/PDFs are stored as-is since DEFLATE gains nothing"""
+        if Path(zinfo.filename).suffix.lower() in self.PRECOMPRESSED_SUFFIXES:
+            zipf.writestr(zinfo, data, compress_type=zipfile.ZIP_STORED)
+        else:
+            zipf.writestr(zinfo, data, compress_type=zipfile.ZIP_DEFLATED, compresslevel=1)
+    
     def create_full_backup(self, backup_name: Optional[str] = None) -> Dict[str, Any]:
         """Create a complete system backup"""
         try:
@@ -168,14 +237,18 @@ class BackupService:
                 return files_result
             
             # Create full system archive
-            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            # The database and files backups are already encrypted/compressed, so they are
+            # stored as-is; only the small configuration files are deflated
+            with zipfile.ZipFile(backup_path, 'w', zipfile.ZIP_STORED) as zipf:
                 # Add database backup
                 if Path(db_result["backup_path"]).exists():
                     zipf.write(db_result["backup_path"], "database.sqlite")
                 
-                # Add files backup
-                if Path(files_result["backup_path"]).exists():
-                    zipf.write(files_result["backup_path"], "files.zip")
+                # Add files backup (files.tar.zst or files.zip depending on the archive format)
+                files_backup_path = Path(files_result["backup_path"])
+                if files_backup_path.exists():
+                    files_format = files_result.get("metadata", {}).get("archive_format", "zip")
+                    zipf.write(files_backup_path, f"files.{files_format}")
                 
                 # Add configuration files (using current working directory as project root)
                 config_files = [
@@ -185,7 +258,7 @@ class BackupService:
                 
                 for config_file in config_files:
                     if config_file.exists():
-                        zipf.write(config_file, f"config/{config_file.name}")
+                        zipf.write(config_file, f"config/{config_file.name}", compress_type=zipfile.ZIP_DEFLATED)
             
             # Create metadata
             metadata = {
@@ -224,7 +297,11 @@ class BackupService:
             }
     
     def restore_database_backup(self, backup_name: str) -> Dict[str, Any]:
-        """Restore database from backup"""
+        """
+        Restore database from backup
+        The caller must not hold a checked-out connection (close its session first); the file
+        is only replaced once every connection is back in the pool, and new requests wait meanwhile
+        """
         try:
             backup_path = self.db_backup_dir / f"{backup_name}.sqlite"
             
@@ -239,8 +316,20 @@ class BackupService:
             
             # Replace current database with backup
             # Note: The backup file is already encrypted with the same key
+            # copyfile uses the kernel sendfile fast path on Linux; the backup's timestamps
+            # are deliberately not copied onto the live database (unlike copy2)
             current_db_path = settings.DATABASE_URL.replace("sqlite:///", "")
-            shutil.copy2(backup_path, current_db_path)
+            # engine.dispose() only closes connections that are checked in, so wait for every
+            # session to finish (holding new ones back) before the file is touched
+            with exclusive_database_access():
+                # Close pooled connections so the WAL is checkpointed, then drop any leftover
+                # -wal/-shm files so they cannot be replayed onto the restored database
+                engine.dispose()
+                shutil.copyfile(backup_path, current_db_path)
+                for suffix in ("-wal", "-shm"):
+                    Path(current_db_path + suffix).unlink(missing_ok=True)
+            # The restored file may come from a different schema version
+            self.invalidate_schema_cache()
             
             logger.info(f"Database restored from backup: {backup_name}")
             
@@ -273,15 +362,21 @@ class BackupService:
         for backup_dir in search_dirs:
             for metadata_file in backup_dir.glob("*_metadata.json"):
                 try:
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
+                    metadata = self._read_metadata(metadata_file)
                     
-                    backup_file = backup_dir / f"{metadata['backup_name']}.{'sqlite' if metadata['backup_type'] == 'database' else 'zip'}"
+                    if metadata['backup_type'] == 'database':
+                        extension = 'sqlite'
+                    else:
+                        # Files backups may be tar.zst; older metadata has no archive_format
+                        extension = metadata.get('archive_format', 'zip')
+                    backup_file = backup_dir / f"{metadata['backup_name']}.{extension}"
                     
                     if backup_file.exists():
-                        metadata["file_exists"] = True
-                        metadata["file_path"] = str(backup_file)
-                        backups.append(metadata)
+                        backups.append({
+                            **metadata,
+                            "file_exists": True,
+                            "file_path": str(backup_file)
+                        })
                     
                 except Exception as e:
                     logger.warning(f"Failed to read metadata file {metadata_file}: {e}")
@@ -291,38 +386,39 @@ class BackupService:
         
         return backups
     
+    def _read_metadata(self, metadata_file: Path) -> Dict[str, Any]:
+        """Load a backup metadata file, reusing the parsed copy while its mtime is unchanged"""
+        mtime = metadata_file.stat().st_mtime
+        cached = self._metadata_cache.get(metadata_file)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        self._metadata_cache[metadata_file] = (mtime, metadata)
+        return metadata
+    
     def cleanup_old_backups(self, keep_days: int = 30) -> Dict[str, Any]:
         """Remove old backup files"""
         try:
             cutoff_date = datetime.now() - timedelta(days=keep_days)
             removed_files = []
             
+            cutoff_timestamp = cutoff_date.timestamp()
             for backup_dir in [self.db_backup_dir, self.file_backup_dir, self.full_backup_dir]:
-                for file_path in backup_dir.rglob("*"):
-                    if file_path.is_file():
-                        file_date = datetime.fromtimestamp(file_path.stat().st_mtime)
-                        if file_date < cutoff_date:
-                            file_path.unlink()
-                            removed_files.append(str(file_path))
+                for entry in self._walk_files(backup_dir):
+                    if entry.stat().st_mtime < cutoff_timestamp:
+                        os.unlink(entry.path)
+                        removed_files.append(entry.path)
             
             # Update backup history
             db = SessionLocal()
             try:
-                # Handle potential None query result with getattr approach
-                try:
-                    query_method = getattr(db, 'query')
-                    query_result = query_method(BackupHistory).filter(
-                        BackupHistory.created_at < cutoff_date
-                    )
-                    old_backups = query_result.all() if query_result is not None else []
-                except:
-                    old_backups = []
-                
-                for backup in old_backups:
-                    db.delete(backup)
-                
+                # Single DELETE statement instead of loading and deleting rows one by one
+                removed_history = db.query(BackupHistory).filter(
+                    BackupHistory.created_at < cutoff_date
+                ).delete(synchronize_session=False)
                 db.commit()
-                
             finally:
                 db.close()
             
@@ -331,7 +427,8 @@ class BackupService:
             return {
                 "success": True,
                 "removed_files": removed_files,
-                "removed_count": len(removed_files)
+                "removed_count": len(removed_files),
+                "removed_history_count": removed_history
             }
             
         except Exception as e:
@@ -379,7 +476,7 @@ class BackupService:
                 "files": self.file_backup_dir,
                 "full": self.full_backup_dir
             }.items():
-                dir_size = sum(f.stat().st_size for f in backup_dir.rglob('*') if f.is_file())
+                dir_size = sum(entry.stat().st_size for entry in self._walk_files(backup_dir))
                 stats["storage_usage"][name] = round(dir_size / (1024 * 1024), 2)
             
             return stats
@@ -388,13 +485,26 @@ class BackupService:
             logger.error(f"Failed to get backup statistics: {e}")
             return {"error": str(e)}
     
+    @classmethod
+    def _walk_files(cls, directory):
+        """Yield a DirEntry for every file under directory (DirEntry caches its stat result)"""
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry
+                elif entry.is_dir(follow_symlinks=False):
+                    yield from cls._walk_files(entry.path)
+    
     def _get_tables_count(self) -> int:
-        """Get number of tables in database"""
+        """Get number of tables in database (cached until invalidate_schema_cache)"""
+        if self._tables_count_cache is not None:
+            return self._tables_count_cache
         try:
             connection = engine.connect()
             try:
                 result = connection.execute(text("SELECT COUNT(*) FROM sqlite_master WHERE type='table'"))
                 count = result.scalar() or 0
+                self._tables_count_cache = count
                 return count
             finally:
                 # Safely close connection using getattr to avoid type checking issues
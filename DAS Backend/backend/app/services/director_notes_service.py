@@ -5,11 +5,12 @@ Handles filesystem operations for director notes with folder/file hierarchy
 
 import os
 import re
+import shutil
 from pathlib import Path
-from datetime import datetime, date
+from datetime import date
 from typing import Dict, Any, List, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, or_, func, select, delete, update, text, table, literal_column, case
 
 from ..database import SessionLocal
 from ..models.director import DirectorNote
@@ -25,6 +26,18 @@ class DirectorNotesService:
         'blogs': 'مدونات',
         'educational_admin': 'الأمور التعليمية والإدارية'
     }
+    # Built once for the per-request category checks and the summary listing
+    _CATEGORY_KEYS = frozenset(CATEGORIES)
+    _CATEGORY_ITEMS = tuple(CATEGORIES.items())
+    
+    # Relative paths of allowed characters only: no leading slash and no '..' anywhere
+    _PATH_RE = re.compile(r'^(?!/)(?!.*\.\.)[\w\s\-/\u0600-\u06FF.]+$', re.DOTALL)
+    # User-supplied file names: reserved characters (including path separators) become '_',
+    # control characters are dropped
+    _SANITIZE_TABLE = str.maketrans({
+        **{char: '_' for char in '<>:"/\\|?*'},
+        **{code: None for code in range(32)}
+    })
     
     def __init__(self):
         # Base directory for all director notes (relative to exe/script location)
@@ -34,27 +47,56 @@ class DirectorNotesService:
         # Maximum file size (5MB)
         self.max_file_size = 5 * 1024 * 1024
         
+        # Whether the director_notes_fts index exists (checked on first search)
+        self._search_index_available: Optional[bool] = None
+        
+        # (academic_year_id, category) -> directory already created on disk
+        self._category_roots: Dict[Tuple[int, str], Path] = {}
+        
         # Initialize category structure
         self._initialize_directories()
     
     def _initialize_directories(self):
         """Create base directory structure for all categories"""
-        for category in self.CATEGORIES.keys():
+        for category in self._CATEGORY_KEYS:
             category_dir = self.base_dir / category
             category_dir.mkdir(exist_ok=True)
     
     def _get_academic_year_path(self, academic_year_id: int, category: str) -> Path:
-        """Get the path for a specific academic year and category"""
-        path = self.base_dir / str(academic_year_id) / category
-        path.mkdir(parents=True, exist_ok=True)
+        """Get the path for a specific academic year and category (created on first use, then cached)"""
+        key = (academic_year_id, category)
+        path = self._category_roots.get(key)
+        if path is None:
+            path = self.base_dir / str(academic_year_id) / category
+            path.mkdir(parents=True, exist_ok=True)
+            self._category_roots[key] = path
         return path
     
+    @staticmethod
+    def _write_file_atomic(full_path: Path, content: str):
+        """Write to a temp file beside full_path, fsync it, then rename it over full_path"""
+        temp_path = full_path.with_name(full_path.name + ".tmp")
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, full_path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+    
+    def _content_too_large(self, content: str) -> bool:
+        """Check content against max_file_size, encoding only when the char count is inconclusive"""
+        # A UTF-8 character is 1-4 bytes, so the char count bounds the encoded size
+        if len(content) <= self.max_file_size // 4:
+            return False
+        if len(content) > self.max_file_size:
+            return True
+        return len(content.encode('utf-8')) > self.max_file_size
+    
     def _validate_path(self, file_path: str) -> bool:
         """Validate file path to prevent directory traversal attacks"""
-        # Check for dangerous characters and patterns
-        if '..' in file_path or file_path.startswith('/') or file_path.startswith('\\'):
-            return False
-        
         # Check for absolute path attempts
         if os.path.isabs(file_path):
             return False
@@ -62,8 +104,9 @@ class DirectorNotesService:
         # Normalize path separators to forward slashes for validation
         normalized_path = file_path.replace('\\', '/')
         
-        # Only allow alphanumeric, spaces, underscores, hyphens, forward slashes, and Arabic characters
-        if not re.match(r'^[\w\s\-/\u0600-\u06FF.]+$', normalized_path):
+        # Only allow alphanumeric, spaces, underscores, hyphens, forward slashes, and Arabic characters;
+        # leading separators and '..' are rejected by the same pattern
+        if not self._PATH_RE.match(normalized_path):
             return False
         
         return True
@@ -71,7 +114,7 @@ class DirectorNotesService:
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename to remove dangerous characters"""
         # Remove or replace dangerous characters
-        filename = re.sub(r'[<>:"|?*\\]', '_', filename)
+        filename = filename.translate(self._SANITIZE_TABLE)
         # Remove leading/trailing spaces and dots
         filename = filename.strip('. ')
         return filename
@@ -98,7 +141,7 @@ class DirectorNotesService:
                 return {"success": False, "error": "Invalid folder name"}
             
             # Validate category
-            if category not in self.CATEGORIES:
+            if category not in self._CATEGORY_KEYS:
                 return {"success": False, "error": "Invalid category"}
             
             # Determine parent path
@@ -166,6 +209,7 @@ class DirectorNotesService:
                    file_name: str, content: str, note_date: date,
                    parent_folder_id: Optional[int] = None) -> Dict[str, Any]:
         """Create a new markdown file"""
+        written_path: Optional[Path] = None
         try:
             # Sanitize and ensure .md extension
             file_name = self._sanitize_filename(file_name)
@@ -176,20 +220,47 @@ class DirectorNotesService:
                 return {"success": False, "error": "Invalid file name"}
             
             # Validate category
-            if category not in self.CATEGORIES:
+            if category not in self._CATEGORY_KEYS:
                 return {"success": False, "error": "Invalid category"}
             
             # Check content size
-            if len(content.encode('utf-8')) > self.max_file_size:
+            if self._content_too_large(content):
                 return {"success": False, "error": "File content too large"}
             
+            # Fetch the parent folder and any file already at the target path in one query;
+            # the target path is built from the parent's path inside the query
+            lookup = DirectorNote.file_path == file_name
+            parent_folder_filter = None
+            if parent_folder_id:
+                parent = aliased(DirectorNote)
+                parent_path_sql = select(parent.file_path).where(
+                    parent.id == parent_folder_id,
+                    parent.is_folder == True
+                ).scalar_subquery()
+                target_path_sql = func.replace(
+                    case(
+                        (func.coalesce(parent_path_sql, '') == '', file_name),
+                        else_=parent_path_sql + '/' + file_name
+                    ),
+                    '\\', '/'
+                )
+                lookup = DirectorNote.file_path == target_path_sql
+                parent_folder_filter = and_(DirectorNote.id == parent_folder_id, DirectorNote.is_folder == True)
+            
+            file_filter = and_(
+                DirectorNote.academic_year_id == academic_year_id,
+                DirectorNote.folder_type == category,
+                lookup,
+                DirectorNote.is_folder == False
+            )
+            rows = db.query(DirectorNote).filter(
+                or_(parent_folder_filter, file_filter) if parent_folder_filter is not None else file_filter
+            ).all()
+            
             # Determine parent path
             parent_path = ""
             if parent_folder_id:
-                parent_folder = db.query(DirectorNote).filter(
-                    DirectorNote.id == parent_folder_id,
-                    DirectorNote.is_folder == True
-                ).first()
+                parent_folder = next((row for row in rows if row.is_folder), None)
                 
                 if not parent_folder:
                     return {"success": False, "error": "Parent folder not found"}
@@ -201,24 +272,11 @@ class DirectorNotesService:
             relative_path = relative_path.replace('\\', '/')
             
             # Check if file already exists
-            existing_file = db.query(DirectorNote).filter(
-                DirectorNote.academic_year_id == academic_year_id,
-                DirectorNote.folder_type == category,
-                DirectorNote.file_path == relative_path,
-                DirectorNote.is_folder == False
-            ).first()
-            
-            if existing_file:
+            if any(not row.is_folder for row in rows):
                 return {"success": False, "error": "File already exists"}
             
-            # Write physical file
-            full_path = self._get_full_path(academic_year_id, category, relative_path)
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            # Create database record
+            # Create database record; flushing first means a rejected insert never leaves
+            # a file on disk
             file_title = file_name.replace('.md', '')
             file_record = DirectorNote(
                 academic_year_id=academic_year_id,
@@ -232,8 +290,14 @@ class DirectorNotesService:
             )
             
             db.add(file_record)
+            db.flush()
+            
+            # Write physical file, then commit the record
+            full_path = self._get_full_path(academic_year_id, category, relative_path)
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_file_atomic(full_path, content)
+            written_path = full_path
             db.commit()
-            db.refresh(file_record)
             
             return {
                 "success": True,
@@ -246,8 +310,118 @@ class DirectorNotesService:
             
         except Exception as e:
             db.rollback()
+            # Remove the file if its record was not saved
+            if written_path is not None:
+                written_path.unlink(missing_ok=True)
             return {"success": False, "error": f"Failed to create file: {str(e)}"}
     
+    def create_files_batch(self, db: Session, academic_year_id: int, category: str,
+                           files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Create several markdown files with one INSERT and one commit
+        Each item has file_name, content, note_date and an optional parent_folder_id;
+        the whole batch is rejected if any item is invalid
+        """
+        written_paths: List[Path] = []
+        try:
+            # Validate category
+            if category not in self._CATEGORY_KEYS:
+                return {"success": False, "error": "Invalid category"}
+            
+            if not files:
+                return {"success": False, "error": "No files to create"}
+            
+            # Resolve all parent folders in one query
+            parent_ids = {item.get("parent_folder_id") for item in files if item.get("parent_folder_id")}
+            parent_paths = dict(db.query(DirectorNote.id, DirectorNote.file_path).filter(
+                DirectorNote.id.in_(parent_ids),
+                DirectorNote.is_folder == True
+            ).all()) if parent_ids else {}
+            
+            records = []
+            for item in files:
+                # Sanitize and ensure .md extension
+                file_name = self._sanitize_filename(item.get("file_name", ""))
+                if not file_name.endswith('.md'):
+                    file_name = file_name + '.md'
+                
+                if not file_name:
+                    return {"success": False, "error": "Invalid file name"}
+                
+                content = item.get("content") or ""
+                if self._content_too_large(content):
+                    return {"success": False, "error": f"File content too large: {file_name}"}
+                
+                parent_folder_id = item.get("parent_folder_id")
+                parent_path = ""
+                if parent_folder_id:
+                    if parent_folder_id not in parent_paths:
+                        return {"success": False, "error": "Parent folder not found"}
+                    parent_path = parent_paths[parent_folder_id] or ""
+                
+                # Create relative path (normalize to forward slashes for cross-platform compatibility)
+                relative_path = os.path.join(parent_path, file_name) if parent_path else file_name
+                relative_path = relative_path.replace('\\', '/')
+                
+                records.append({
+                    "academic_year_id": academic_year_id,
+                    "folder_type": category,
+                    "title": file_name.replace('.md', ''),
+                    "note_date": item["note_date"],
+                    "content": content,
+                    "file_path": relative_path,
+                    "parent_folder_id": parent_folder_id,
+                    "is_folder": False
+                })
+            
+            # Check for duplicates within the batch and against existing files in one query
+            new_paths = [record["file_path"] for record in records]
+            if len(set(new_paths)) != len(new_paths):
+                return {"success": False, "error": "Duplicate file names in batch"}
+            
+            existing = db.query(DirectorNote.file_path).filter(
+                DirectorNote.academic_year_id == academic_year_id,
+                DirectorNote.folder_type == category,
+                DirectorNote.file_path.in_(new_paths),
+                DirectorNote.is_folder == False
+            ).first()
+            if existing:
+                return {"success": False, "error": f"File already exists: {existing.file_path}"}
+            
+            # Write physical files (each one atomically, so a failed batch never leaves a
+            # half-written note behind)
+            for record in records:
+                full_path = self._get_full_path(academic_year_id, category, record["file_path"])
+                full_path.parent.mkdir(parents=True, exist_ok=True)
+                self._write_file_atomic(full_path, record["content"])
+                written_paths.append(full_path)
+            
+            # Insert all records in one statement; return_defaults fills in the new ids
+            db.bulk_insert_mappings(DirectorNote, records, return_defaults=True)
+            db.commit()
+            
+            return {
+                "success": True,
+                "data": {
+                    "files": [
+                        {
+                            "file_id": record["id"],
+                            "file_name": record["title"] + ".md",
+                            "file_path": record["file_path"]
+                        }
+                        for record in records
+                    ],
+                    "total": len(records)
+                }
+            }
+            
+        except Exception as e:
+            db.rollback()
+            # Remove the files written for this batch since their records were not saved
+            for full_path in written_paths:
+                full_path.unlink(missing_ok=True)
+            return {"success": False, "error": f"Failed to create files: {str(e)}"}
+    
     def read_file(self, db: Session, file_id: int) -> Dict[str, Any]:
         """Read a markdown file content"""
         try:
@@ -306,7 +480,7 @@ class DirectorNotesService:
             # Update content if provided
             if content is not None:
                 # Check content size
-                if len(content.encode('utf-8')) > self.max_file_size:
+                if self._content_too_large(content):
                     return {"success": False, "error": "File content too large"}
                 
                 # Write to physical file
@@ -316,22 +490,9 @@ class DirectorNotesService:
                     file_record.file_path
                 )
                 
-                # Create backup before writing
-                backup_content = None
-                if full_path.exists():
-                    with open(full_path, 'r', encoding='utf-8') as f:
-                        backup_content = f.read()
-                
-                try:
-                    with open(full_path, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                    file_record.content = content
-                except Exception as e:
-                    # Restore backup if write fails
-                    if backup_content is not None:
-                        with open(full_path, 'w', encoding='utf-8') as f:
-                            f.write(backup_content)
-                    raise e
+                # Replace the file atomically; the old content stays intact if the write fails
+                self._write_file_atomic(full_path, content)
+                file_record.content = content
             
             # Update title if provided
             if title is not None:
@@ -341,14 +502,12 @@ class DirectorNotesService:
             if note_date is not None:
                 file_record.note_date = note_date
             
-            file_record.updated_at = datetime.utcnow()
             db.commit()
-            db.refresh(file_record)
             
             return {
                 "success": True,
                 "data": {
-                    "file_id": file_record.id
+                    "file_id": file_id
                 },
                 "message": "File updated successfully"
             }
@@ -373,26 +532,29 @@ class DirectorNotesService:
                 item_record.file_path
             )
             
-            if item_record.is_folder:
-                # Delete all children recursively in database
+            is_folder = item_record.is_folder
+            if is_folder:
+                # Delete the folder and all of its descendants in database
                 self._delete_folder_recursive(db, item_id)
                 
                 # Delete physical directory
+                # rmtree walks the tree with os.scandir and file descriptors, so large
+                # folders are removed without building child lists
                 if full_path.exists():
-                    import shutil
                     shutil.rmtree(full_path)
             else:
                 # Delete physical file
                 if full_path.exists():
                     os.remove(full_path)
+                
+                # Delete database record
+                db.delete(item_record)
             
-            # Delete database record
-            db.delete(item_record)
             db.commit()
             
             return {
                 "success": True,
-                "message": f"{'Folder' if item_record.is_folder else 'File'} deleted successfully"
+                "message": f"{'Folder' if is_folder else 'File'} deleted successfully"
             }
             
         except Exception as e:
@@ -400,54 +562,50 @@ class DirectorNotesService:
             return {"success": False, "error": f"Failed to delete item: {str(e)}"}
     
     def _delete_folder_recursive(self, db: Session, folder_id: int):
-        """Recursively delete all children of a folder"""
-        # Get all children
-        children = db.query(DirectorNote).filter(
-            DirectorNote.parent_folder_id == folder_id
-        ).all()
-        
-        for child in children:
-            if child.is_folder:
-                # Recursively delete subfolder children
-                self._delete_folder_recursive(db, child.id)
-            db.delete(child)
+        """Delete a folder and everything below it with one recursive CTE"""
+        tree = select(DirectorNote.id).where(DirectorNote.id == folder_id).cte(recursive=True)
+        tree = tree.union_all(
+            select(DirectorNote.id).where(DirectorNote.parent_folder_id == tree.c.id)
+        )
+        db.execute(
+            delete(DirectorNote).where(DirectorNote.id.in_(select(tree.c.id))),
+            execution_options={"synchronize_session": "fetch"}
+        )
     
     def list_items(self, db: Session, academic_year_id: int, category: str,
                   parent_folder_id: Optional[int] = None) -> Dict[str, Any]:
         """List all files and folders in a directory"""
         try:
             # Validate category
-            if category not in self.CATEGORIES:
+            if category not in self._CATEGORY_KEYS:
                 return {"success": False, "error": "Invalid category"}
             
-            # Query items
-            query = db.query(DirectorNote).filter(
+            # Select only the listed columns; rows come back as plain mappings
+            stmt = select(
+                DirectorNote.id,
+                DirectorNote.title,
+                DirectorNote.is_folder,
+                DirectorNote.note_date,
+                DirectorNote.file_path,
+                DirectorNote.parent_folder_id,
+                DirectorNote.created_at,
+                DirectorNote.updated_at
+            ).where(
                 DirectorNote.academic_year_id == academic_year_id,
                 DirectorNote.folder_type == category
             )
             
             if parent_folder_id is None:
-                query = query.filter(DirectorNote.parent_folder_id.is_(None))
+                stmt = stmt.where(DirectorNote.parent_folder_id.is_(None))
             else:
-                query = query.filter(DirectorNote.parent_folder_id == parent_folder_id)
+                stmt = stmt.where(DirectorNote.parent_folder_id == parent_folder_id)
             
-            items = query.order_by(
+            stmt = stmt.order_by(
                 DirectorNote.is_folder.desc(),  # Folders first
                 DirectorNote.title.asc()
-            ).all()
+            )
             
-            result_items = []
-            for item in items:
-                result_items.append({
-                    "id": item.id,
-                    "title": item.title,
-                    "is_folder": item.is_folder,
-                    "note_date": item.note_date,
-                    "file_path": item.file_path,
-                    "parent_folder_id": item.parent_folder_id,
-                    "created_at": item.created_at,
-                    "updated_at": item.updated_at
-                })
+            result_items = [dict(item) for item in db.execute(stmt).mappings()]
             
             return {
                 "success": True,
@@ -463,28 +621,23 @@ class DirectorNotesService:
     def get_category_summary(self, db: Session, academic_year_id: int) -> Dict[str, Any]:
         """Get summary statistics for all categories"""
         try:
-            summaries = []
-            
-            for category, display_name in self.CATEGORIES.items():
-                # Count files and folders
-                total_files = db.query(DirectorNote).filter(
-                    DirectorNote.academic_year_id == academic_year_id,
-                    DirectorNote.folder_type == category,
-                    DirectorNote.is_folder == False
-                ).count()
-                
-                total_folders = db.query(DirectorNote).filter(
-                    DirectorNote.academic_year_id == academic_year_id,
-                    DirectorNote.folder_type == category,
-                    DirectorNote.is_folder == True
-                ).count()
-                
-                summaries.append({
+            # Count files and folders for every category in one grouped query
+            rows = db.query(
+                DirectorNote.folder_type, DirectorNote.is_folder, func.count()
+            ).filter(
+                DirectorNote.academic_year_id == academic_year_id
+            ).group_by(DirectorNote.folder_type, DirectorNote.is_folder).all()
+            counts = {(folder_type, bool(is_folder)): count for folder_type, is_folder, count in rows}
+            
+            summaries = [
+                {
                     "category": category,
                     "display_name": display_name,
-                    "total_files": total_files,
-                    "total_folders": total_folders
-                })
+                    "total_files": counts.get((category, False), 0),
+                    "total_folders": counts.get((category, True), 0)
+                }
+                for category, display_name in self._CATEGORY_ITEMS
+            ]
             
             return {
                 "success": True,
@@ -504,18 +657,37 @@ class DirectorNotesService:
                 return {"success": False, "error": "Search query is required"}
             
             # Build search query - include both files and folders
-            search_pattern = f"%{query}%"
-            db_query = db.query(DirectorNote).filter(
-                or_(
-                    DirectorNote.title.ilike(search_pattern),
-                    DirectorNote.content.ilike(search_pattern)
+            # The trigram index only matches queries of 3+ characters
+            if len(query) >= 3 and self._has_search_index(db):
+                fts_query = '"' + query.replace('"', '""') + '"'
+                matching_ids = select(literal_column("rowid")).select_from(table("director_notes_fts")).where(
+                    text("director_notes_fts MATCH :fts_query").bindparams(fts_query=fts_query)
                 )
-            )
+                match_filter = DirectorNote.id.in_(matching_ids)
+            else:
+                # Escape LIKE wildcards so '%' and '_' in the query match literally
+                escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                search_pattern = f"%{escaped}%"
+                match_filter = or_(
+                    DirectorNote.title.ilike(search_pattern, escape='\\'),
+                    DirectorNote.content.ilike(search_pattern, escape='\\')
+                )
+            
+            # Only the returned columns, plus content for the snippets
+            db_query = db.query(
+                DirectorNote.id,
+                DirectorNote.title,
+                DirectorNote.folder_type,
+                DirectorNote.note_date,
+                DirectorNote.content,
+                DirectorNote.file_path,
+                DirectorNote.is_folder
+            ).filter(match_filter)
             
             if academic_year_id:
                 db_query = db_query.filter(DirectorNote.academic_year_id == academic_year_id)
             
-            if category and category in self.CATEGORIES:
+            if category and category in self._CATEGORY_KEYS:
                 db_query = db_query.filter(DirectorNote.folder_type == category)
             
             results = db_query.order_by(DirectorNote.updated_at.desc()).limit(50).all()
@@ -556,6 +728,19 @@ class DirectorNotesService:
         except Exception as e:
             return {"success": False, "error": f"Search failed: {str(e)}"}
     
+    def _has_search_index(self, db: Session) -> bool:
+        """
+        Check once whether update_database_schema installed the FTS5 search index
+        Requires the table and its three sync triggers; without them the index would go stale
+        """
+        if self._search_index_available is None:
+            self._search_index_available = db.execute(text("""
+                SELECT count(*) FROM sqlite_master
+                WHERE (type = 'table' AND name = 'director_notes_fts')
+                   OR (type = 'trigger' AND name LIKE 'trg_notes_fts_%')"""
+            )).scalar() >= 4
+        return self._search_index_available
+    
     def rename_item(self, db: Session, item_id: int, new_name: str) -> Dict[str, Any]:
         """Rename a file or folder"""
         try:
@@ -612,7 +797,6 @@ class DirectorNotesService:
             # Update database record
             item_record.title = new_name.replace('.md', '') if not item_record.is_folder else new_name
             item_record.file_path = new_relative_path
-            item_record.updated_at = datetime.utcnow()
             
             # Update children paths if it's a folder
             if item_record.is_folder:
@@ -631,19 +815,22 @@ class DirectorNotesService:
             return {"success": False, "error": f"Failed to rename item: {str(e)}"}
     
     def _update_children_paths(self, db: Session, folder_id: int, old_parent_path: str, new_parent_path: str):
-        """Update file paths for all children when a folder is renamed"""
-        children = db.query(DirectorNote).filter(
-            DirectorNote.parent_folder_id == folder_id
-        ).all()
-        
-        for child in children:
-            if child.file_path:
-                # Replace old parent path with new parent path
-                child.file_path = child.file_path.replace(old_parent_path, new_parent_path, 1)
-                
-                if child.is_folder:
-                    # Recursively update grandchildren
-                    self._update_children_paths(db, child.id, old_parent_path, new_parent_path)
+        """Update file paths for all descendants when a folder is renamed (one UPDATE)"""
+        tree = select(DirectorNote.id).where(DirectorNote.parent_folder_id == folder_id).cte(recursive=True)
+        tree = tree.union_all(
+            select(DirectorNote.id).where(DirectorNote.parent_folder_id == tree.c.id)
+        )
+        # Swap the leading old parent path for the new one
+        prefix_length = len(old_parent_path)
+        db.execute(
+            update(DirectorNote).where(
+                DirectorNote.id.in_(select(tree.c.id)),
+                func.substr(DirectorNote.file_path, 1, prefix_length) == old_parent_path
+            ).values(
+                file_path=new_parent_path + func.substr(DirectorNote.file_path, prefix_length + 1)
+            ),
+            execution_options={"synchronize_session": "fetch"}
+        )
 
 # Global service instance
 director_notes_service = DirectorNotesService()
@@ -4,14 +4,21 @@ Supports Excel, PDF, and Image (PNG/JPG) export formats
 """
 
 from typing import Dict, List, Any, Optional, BinaryIO
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from types import SimpleNamespace
+from importlib.util import find_spec
 import os
 
 # Excel export
 try:
     from openpyxl import Workbook
-    from openpyxl.styles import Font, Fill, PatternFill, Border, Side, Alignment
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Fill, PatternFill, Border, Side, Alignment, NamedStyle
+    from openpyxl.styles.fonts import DEFAULT_FONT
+    from openpyxl.styles.borders import DEFAULT_BORDER
     from openpyxl.utils import get_column_letter
     from openpyxl.styles.numbers import FORMAT_TEXT
     OPENPYXL_AVAILABLE = True
@@ -35,26 +42,118 @@ THEME_TEXT_LIGHT = "9CA3AF"        # Light gray text
 # It's clean, contemporary, and renders Arabic beautifully
 MODERN_FONT = "Segoe UI"
 
-# PDF export
-try:
-    from reportlab.lib.pagesizes import letter, A4, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+# Arabic labels (day index 1 = Sunday; index 0 is unused)
+DAY_NAMES = ("", "الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس", "الجمعة", "السبت")
+_GRADE_LEVEL_AR = {
+    "primary": "ابتدائي",
+    "intermediate": "إعدادي",
+    "secondary": "ثانوي"
+}
+_SESSION_AR = {"morning": "صباحي", "evening": "مسائي"}
+_PERIOD_AR = "الحصة"
+_EMPTY_CELL_AR = "فارغ"
 
-# Image export
-try:
-    from PIL import Image, ImageDraw, ImageFont
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+# Excel styles - openpyxl style objects are immutable, so they are built once and shared by
+# every export instead of being re-created per call
+if OPENPYXL_AVAILABLE:
+    def _argb(rgb: str) -> str:
+        """Opaque ARGB form of a 6-digit theme color (openpyxl would otherwise prefix alpha 00)"""
+        return "FF" + rgb
+    
+    _thin_gray_side = Side(style='thin', color=_argb(THEME_BORDER_GRAY))
+    _EXCEL_STYLES = SimpleNamespace(
+        # Title style - Deep blue, clean modern look
+        title_fill=PatternFill(start_color=_argb(THEME_PRIMARY_DARK), end_color=_argb(THEME_PRIMARY_DARK), fill_type="solid"),
+        title_font=Font(name=MODERN_FONT, bold=True, size=20, color=_argb("FFFFFF")),
+        # Header style - Primary Blue for day headers
+        header_fill=PatternFill(start_color=_argb(THEME_PRIMARY_BLUE), end_color=_argb(THEME_PRIMARY_BLUE), fill_type="solid"),
+        header_font=Font(name=MODERN_FONT, bold=True, size=12, color=_argb("FFFFFF")),
+        # Period column style - Modern amber/gold
+        period_fill=PatternFill(start_color=_argb(THEME_ACCENT_YELLOW), end_color=_argb(THEME_ACCENT_YELLOW), fill_type="solid"),
+        period_font=Font(name=MODERN_FONT, bold=True, size=11, color=_argb(THEME_TEXT_DARK)),
+        # Info section style - Soft blue background, clean text
+        info_fill=PatternFill(start_color=_argb(THEME_SOFT_BLUE), end_color=_argb(THEME_SOFT_BLUE), fill_type="solid"),
+        info_font=Font(name=MODERN_FONT, bold=False, size=11, color=_argb(THEME_PRIMARY_DARK)),
+        # Cell styles for schedule content - clean and readable
+        cell_font=Font(name=MODERN_FONT, size=11, color=_argb(THEME_TEXT_DARK)),
+        empty_font=Font(name=MODERN_FONT, size=10, color=_argb(THEME_TEXT_LIGHT)),
+        footer_font=Font(name=MODERN_FONT, size=9, color=_argb(THEME_TEXT_LIGHT)),
+        # Alternating row colors - very subtle
+        row_fill_white=PatternFill(start_color=_argb("FFFFFF"), end_color=_argb("FFFFFF"), fill_type="solid"),
+        row_fill_alt=PatternFill(start_color=_argb(THEME_LIGHT_GRAY), end_color=_argb(THEME_LIGHT_GRAY), fill_type="solid"),
+        # Border styles - subtle and modern
+        subtle_border=Border(
+            left=_thin_gray_side,
+            right=_thin_gray_side,
+            top=_thin_gray_side,
+            bottom=_thin_gray_side
+        ),
+        # Alignments
+        center_alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        footer_alignment=Alignment(horizontal='center', vertical='center'),
+    )
+    
+    # Cell styles of the schedule sheet, registered on each workbook as named styles so a cell
+    # only references its style by name instead of resolving font/fill/border one by one
+    _st = _EXCEL_STYLES
+    _EXCEL_CELL_STYLES = {
+        "schedule_title": dict(font=_st.title_font, fill=_st.title_fill, alignment=_st.center_alignment),
+        "schedule_title_band": dict(fill=_st.title_fill),
+        "schedule_info": dict(font=_st.info_font, fill=_st.info_fill, alignment=_st.center_alignment),
+        "schedule_header": dict(font=_st.header_font, fill=_st.header_fill, alignment=_st.center_alignment),
+        "schedule_period": dict(font=_st.period_font, fill=_st.period_fill, alignment=_st.center_alignment),
+        "schedule_cell": dict(font=_st.cell_font, fill=_st.row_fill_white, alignment=_st.center_alignment, border=_st.subtle_border),
+        "schedule_cell_alt": dict(font=_st.cell_font, fill=_st.row_fill_alt, alignment=_st.center_alignment, border=_st.subtle_border),
+        "schedule_empty": dict(font=_st.empty_font, fill=_st.row_fill_white, alignment=_st.center_alignment, border=_st.subtle_border),
+        "schedule_empty_alt": dict(font=_st.empty_font, fill=_st.row_fill_alt, alignment=_st.center_alignment, border=_st.subtle_border),
+        "schedule_footer": dict(font=_st.footer_font, alignment=_st.footer_alignment),
+    }
+
+# PDF export - ReportLab is imported on the first PDF export rather than with this module;
+# loading reportlab.platypus alone takes tens of milliseconds
+REPORTLAB_AVAILABLE = find_spec("reportlab") is not None
+_reportlab: Optional[SimpleNamespace] = None
+
+
+def _load_reportlab() -> SimpleNamespace:
+    """Import the ReportLab names used by the PDF export (once)"""
+    global _reportlab
+    if _reportlab is None:
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib import colors
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+        _reportlab = SimpleNamespace(
+            A4=A4, landscape=landscape, colors=colors, inch=inch,
+            SimpleDocTemplate=SimpleDocTemplate, Table=Table, TableStyle=TableStyle,
+            Paragraph=Paragraph, Spacer=Spacer,
+            getSampleStyleSheet=getSampleStyleSheet, ParagraphStyle=ParagraphStyle,
+            TA_CENTER=TA_CENTER, TA_RIGHT=TA_RIGHT
+        )
+    return _reportlab
+
+# Image export - Pillow and the fonts are loaded on the first image export
+PIL_AVAILABLE = find_spec("PIL") is not None
+_pil: Optional[SimpleNamespace] = None
+
+
+def _load_pil() -> SimpleNamespace:
+    """Import Pillow and open the image export fonts by size (once)"""
+    global _pil
+    if _pil is None:
+        from PIL import Image, ImageDraw, ImageFont
+        # Falls back to Pillow's default font if Arial is not available
+        try:
+            fonts = {size: ImageFont.truetype("arial.ttf", size) for size in (16, 20, 28, 40)}
+        except OSError:
+            fonts = {size: ImageFont.load_default() for size in (16, 20, 28, 40)}
+        _pil = SimpleNamespace(Image=Image, ImageDraw=ImageDraw, fonts=fonts)
+    return _pil
+
+# Encoded image size kept in memory before an export spills to a temporary file
+IMAGE_SPOOL_MAX_SIZE = 8 * 1024 * 1024
 
 from sqlalchemy.orm import Session
 from ..models.schedules import Schedule, ScheduleAssignment, TimeSlot
@@ -65,9 +164,15 @@ from ..models.teachers import Teacher
 class ExportService:
     """Unified export service for all formats"""
     
+    # PDF paragraph styles and static table style commands, built on first PDF export
+    _pdf_styles: Optional[Dict[str, Any]] = None
+    
     def __init__(self, db: Session):
         self.db = db
-        self.day_names = ["", "الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس", "الجمعة", "السبت"]
+        self.day_names = DAY_NAMES
+        # Schedule data already loaded by this instance, keyed by schedule_id; an instance
+        # lives for one request, so repeated exports of a schedule reuse the same queries
+        self._schedule_cache: Dict[int, Dict[str, Any]] = {}
     
     def export_schedule_excel(
         self,
@@ -92,10 +197,10 @@ class ExportService:
         # Get schedule data
         schedule_data = self._get_schedule_data(schedule_id)
         
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "الجدول الدراسي"
+        # Create a write-only workbook: rows are streamed out as they are appended instead of
+        # being held in memory, so sheet settings, dimensions and styles are set up front
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("الجدول الدراسي")
         
         # Set document properties - Author as Educore
         wb.properties.creator = "Educore"
@@ -108,182 +213,111 @@ class ExportService:
         ws.sheet_view.rightToLeft = True
         
         # ============================================
-        # MODERN STYLES - Clean & Contemporary
+        # COLUMN WIDTHS - Clean proportions
         # ============================================
+        ws.column_dimensions['A'].width = 14  # Period column
+        for col_idx in range(2, 7):
+            ws.column_dimensions[get_column_letter(col_idx)].width = 22
         
-        # Title style - Deep blue, clean modern look
-        title_fill = PatternFill(start_color=THEME_PRIMARY_DARK, end_color=THEME_PRIMARY_DARK, fill_type="solid")
-        title_font = Font(name=MODERN_FONT, bold=True, size=20, color="FFFFFF")
-        
-        # Header style - Primary Blue for day headers
-        header_fill = PatternFill(start_color=THEME_PRIMARY_BLUE, end_color=THEME_PRIMARY_BLUE, fill_type="solid")
-        header_font = Font(name=MODERN_FONT, bold=True, size=12, color="FFFFFF")
-        
-        # Period column style - Modern amber/gold
-        period_fill = PatternFill(start_color=THEME_ACCENT_YELLOW, end_color=THEME_ACCENT_YELLOW, fill_type="solid")
-        period_font = Font(name=MODERN_FONT, bold=True, size=11, color=THEME_TEXT_DARK)
-        
-        # Info section style - Soft blue background, clean text
-        info_fill = PatternFill(start_color=THEME_SOFT_BLUE, end_color=THEME_SOFT_BLUE, fill_type="solid")
-        info_font = Font(name=MODERN_FONT, bold=False, size=11, color=THEME_PRIMARY_DARK)
-        
-        # Cell styles for schedule content - clean and readable
-        subject_font = Font(name=MODERN_FONT, bold=True, size=11, color=THEME_TEXT_DARK)
-        teacher_font = Font(name=MODERN_FONT, size=10, color=THEME_TEXT_MEDIUM)
-        cell_font = Font(name=MODERN_FONT, size=11, color=THEME_TEXT_DARK)
-        empty_font = Font(name=MODERN_FONT, size=10, color=THEME_TEXT_LIGHT)
-        
-        # Alternating row colors - very subtle
-        row_fill_white = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        row_fill_alt = PatternFill(start_color=THEME_LIGHT_GRAY, end_color=THEME_LIGHT_GRAY, fill_type="solid")
+        # Freeze header for scrolling
+        ws.freeze_panes = 'A5'
         
-        # Border styles - subtle and modern
-        no_border = Border()  # No border for cleaner look
-        subtle_border = Border(
-            left=Side(style='thin', color=THEME_BORDER_GRAY),
-            right=Side(style='thin', color=THEME_BORDER_GRAY),
-            top=Side(style='thin', color=THEME_BORDER_GRAY),
-            bottom=Side(style='thin', color=THEME_BORDER_GRAY)
-        )
-        bottom_border = Border(
-            bottom=Side(style='thin', color=THEME_BORDER_GRAY)
-        )
+        # Named styles bind to a workbook, so they are created per export from the shared specs
+        # (parts a spec leaves out keep the workbook default font and border)
+        for style_name, style_parts in _EXCEL_CELL_STYLES.items():
+            wb.add_named_style(NamedStyle(
+                name=style_name, **{"font": DEFAULT_FONT, "border": DEFAULT_BORDER, **style_parts}
+            ))
         
-        # Alignments
-        center_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        right_alignment = Alignment(horizontal='right', vertical='center', wrap_text=True)
+        def styled_cell(value=None, style=None):
+            cell = WriteOnlyCell(ws, value=value)
+            if style is not None:
+                cell.style = style
+            return cell
         
         # ============================================
         # TITLE SECTION - Modern clean header
         # ============================================
         row = 1
         ws.row_dimensions[row].height = 45
-        ws.merge_cells(f'A{row}:F{row}')
-        title_cell = ws[f'A{row}']
-        title_cell.value = "الجدول الدراسي"
-        title_cell.font = title_font
-        title_cell.fill = title_fill
-        title_cell.alignment = center_alignment
-        for col in range(1, 7):
-            ws.cell(row=row, column=col).fill = title_fill
-        row += 1
+        ws.merged_cells.add(f'A{row}:F{row}')
+        ws.append(
+            [styled_cell("الجدول الدراسي", "schedule_title")]
+            + [styled_cell(style="schedule_title_band") for _ in range(5)]
+        )
         
         # ============================================
         # INFO SECTION - Clean info bar
         # ============================================
+        row += 1
         ws.row_dimensions[row].height = 32
-        
-        # Apply info styling to all cells first
-        for col in range(1, 7):
-            cell = ws.cell(row=row, column=col)
-            cell.fill = info_fill
-            cell.font = info_font
-            cell.alignment = center_alignment
-        
-        # Class info (merged A:B)
-        ws.merge_cells(f'A{row}:B{row}')
-        ws[f'A{row}'].value = f"الصف: {schedule_data['class_name']}"
-        
-        # Section info
-        ws[f'C{row}'].value = f"الشعبة: {schedule_data['section'] or '1'}"
-        
-        # Session type
-        ws[f'D{row}'].value = f"الفترة: {schedule_data['session_type']}"
-        
-        # Academic year (merged E:F)
-        ws.merge_cells(f'E{row}:F{row}')
-        ws[f'E{row}'].value = f"السنة الدراسية: {schedule_data['academic_year']}"
+        # Class info (merged A:B) and academic year (merged E:F)
+        ws.merged_cells.add(f'A{row}:B{row}')
+        ws.merged_cells.add(f'E{row}:F{row}')
+        info_values = [
+            f"الصف: {schedule_data['class_name']}",
+            None,
+            f"الشعبة: {schedule_data['section'] or '1'}",
+            f"الفترة: {schedule_data['session_type']}",
+            f"السنة الدراسية: {schedule_data['academic_year']}",
+            None
+        ]
+        ws.append([
+            styled_cell(value, "schedule_info")
+            for value in info_values
+        ])
         
         # Small spacing row
         row += 1
         ws.row_dimensions[row].height = 6
-        row += 1
+        ws.append([])
         
         # ============================================
         # SCHEDULE TABLE - Modern clean design
         # ============================================
-        periods = schedule_data['periods']
         days = [d for d in self.day_names if d]  # Exclude empty string
         
-        # Header row - Clean blue headers
+        # Header row - Clean blue headers (period header + Sunday to Thursday)
+        row += 1
         ws.row_dimensions[row].height = 36
-        
-        # Period header cell
-        period_header = ws[f'A{row}']
-        period_header.value = "الحصة"
-        period_header.fill = header_fill
-        period_header.font = header_font
-        period_header.alignment = center_alignment
-        
-        # Day header cells
-        col_idx = 2
-        for day in days[:5]:  # Sunday to Thursday
-            cell = ws.cell(row=row, column=col_idx)
-            cell.value = day
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = center_alignment
-            col_idx += 1
+        ws.append([
+            styled_cell(value, "schedule_header")
+            for value in [_PERIOD_AR] + days[:5]
+        ])
         
         # Data rows with subtle alternating colors
-        row_index = 0
-        for period_num in sorted(periods.keys()):
+        rows = zip(schedule_data['period_labels'], schedule_data['matrix'])
+        for row_index, (period_label, day_assignments) in enumerate(rows, start=1):
             row += 1
-            row_index += 1
             ws.row_dimensions[row].height = 50
             
-            # Period number with amber accent
-            period_cell = ws[f'A{row}']
-            period_cell.value = f"الحصة {period_num}"
-            period_cell.fill = period_fill
-            period_cell.font = period_font
-            period_cell.alignment = center_alignment
-            
             # Subtle alternating row color
-            current_row_fill = row_fill_alt if row_index % 2 == 0 else row_fill_white
+            band = "_alt" if row_index % 2 == 0 else ""
             
-            # Subjects for each day
-            col_idx = 2
-            for day_idx in range(1, 6):  # Days 1-5 (Sunday-Thursday)
-                cell = ws.cell(row=row, column=col_idx)
-                
-                # Find assignment for this day/period
-                assignment = schedule_data['grid'].get((day_idx, period_num))
+            # Period number with amber accent
+            row_cells = [styled_cell(period_label, "schedule_period")]
+            
+            # Subjects for days 1-5 (Sunday-Thursday): subject name on first line, teacher on second
+            for assignment in day_assignments:
                 if assignment:
-                    # Format: Subject name on first line, teacher on second
-                    cell.value = f"{assignment['subject']}\n{assignment['teacher']}"
-                    cell.fill = current_row_fill
-                    cell.font = cell_font
+                    row_cells.append(styled_cell(
+                        f"{assignment['subject']}\n{assignment['teacher']}", f"schedule_cell{band}"
+                    ))
                 else:
-                    cell.value = "—"
-                    cell.fill = current_row_fill
-                    cell.font = empty_font
-                
-                cell.border = subtle_border
-                cell.alignment = center_alignment
-                col_idx += 1
+                    row_cells.append(styled_cell("—", f"schedule_empty{band}"))
+            
+            ws.append(row_cells)
         
         # ============================================
         # FOOTER - Clean timestamp
         # ============================================
         row += 1
         ws.row_dimensions[row].height = 25
-        
-        ws.merge_cells(f'A{row}:F{row}')
-        timestamp_cell = ws[f'A{row}']
-        timestamp_cell.value = f"Educore  |  {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        timestamp_cell.alignment = Alignment(horizontal='center', vertical='center')
-        timestamp_cell.font = Font(name=MODERN_FONT, size=9, color=THEME_TEXT_LIGHT)
-        
-        # ============================================
-        # COLUMN WIDTHS - Clean proportions
-        # ============================================
-        ws.column_dimensions['A'].width = 14  # Period column
-        for col_idx in range(2, 7):
-            ws.column_dimensions[get_column_letter(col_idx)].width = 22
-        
-        # Freeze header for scrolling
-        ws.freeze_panes = 'A5'
+        ws.merged_cells.add(f'A{row}:F{row}')
+        ws.append([styled_cell(
+            f"Educore  |  {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            "schedule_footer"
+        )])
         
         # Save to BytesIO
         output = BytesIO()
@@ -292,6 +326,44 @@ class ExportService:
         
         return output
     
+    @classmethod
+    def _get_pdf_styles(cls) -> Dict[str, Any]:
+        """Build the PDF styles once per process; getSampleStyleSheet() is costly to rebuild"""
+        if cls._pdf_styles is None:
+            rl = _load_reportlab()
+            styles = rl.getSampleStyleSheet()
+            cls._pdf_styles = {
+                # Title style (RTL)
+                'title': rl.ParagraphStyle(
+                    'CustomTitle',
+                    parent=styles['Heading1'],
+                    fontSize=18,
+                    textColor=rl.colors.HexColor('#366092'),
+                    alignment=rl.TA_CENTER,
+                    spaceAfter=20
+                ),
+                'info': rl.ParagraphStyle('Info', parent=styles['Normal'], alignment=rl.TA_RIGHT, fontSize=12),
+                'footer': rl.ParagraphStyle('Footer', parent=styles['Normal'], alignment=rl.TA_CENTER, fontSize=9, textColor=rl.colors.grey),
+                # Table style commands that do not depend on the number of rows
+                'table_commands': (
+                    # Header
+                    ('BACKGROUND', (0, 0), (-1, 0), rl.colors.HexColor('#366092')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), rl.colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 12),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    
+                    # Data cells
+                    ('BACKGROUND', (0, 1), (0, -1), rl.colors.HexColor('#D3D3D3')),
+                    ('GRID', (0, 0), (-1, -1), 1, rl.colors.black),
+                    ('FONTSIZE', (0, 1), (-1, -1), 10),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ),
+                'row_band': rl.colors.HexColor('#F5F5F5'),
+            }
+        return cls._pdf_styles
+    
     def export_schedule_pdf(
         self,
         schedule_id: int,
@@ -312,89 +384,68 @@ class ExportService:
         if not REPORTLAB_AVAILABLE:
             raise ImportError("reportlab is not installed. Install it with: pip install reportlab")
         
+        rl = _load_reportlab()
+        
         # Get schedule data
         schedule_data = self._get_schedule_data(schedule_id)
         
         # Create PDF
         output = BytesIO()
-        page_size = landscape(A4) if orientation == "landscape" else A4
-        doc = SimpleDocTemplate(output, pagesize=page_size, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+        page_size = rl.landscape(rl.A4) if orientation == "landscape" else rl.A4
+        doc = rl.SimpleDocTemplate(output, pagesize=page_size, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
         
         # Container for elements
         elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title style (RTL)
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#366092'),
-            alignment=TA_CENTER,
-            spaceAfter=20
-        )
+        pdf_styles = self._get_pdf_styles()
         
         # Add title
-        elements.append(Paragraph("الجدول الدراسي", title_style))
-        elements.append(Spacer(1, 0.2*inch))
+        elements.append(rl.Paragraph("الجدول الدراسي", pdf_styles['title']))
+        elements.append(rl.Spacer(1, 0.2*rl.inch))
         
         # Add info
-        info_style = ParagraphStyle('Info', parent=styles['Normal'], alignment=TA_RIGHT, fontSize=12)
         info_text = f"""
         <b>الصف:</b> {schedule_data['class_name']} &nbsp;&nbsp;&nbsp;
         <b>الشعبة:</b> {schedule_data['section'] or '1'} &nbsp;&nbsp;&nbsp;
         <b>الفترة:</b> {schedule_data['session_type']} &nbsp;&nbsp;&nbsp;
         <b>السنة:</b> {schedule_data['academic_year']}
         """
-        elements.append(Paragraph(info_text, info_style))
-        elements.append(Spacer(1, 0.3*inch))
+        elements.append(rl.Paragraph(info_text, pdf_styles['info']))
+        elements.append(rl.Spacer(1, 0.3*rl.inch))
         
         # Create table data
-        periods = schedule_data['periods']
         days = [d for d in self.day_names[1:6]]  # Sunday to Thursday
         
         # Table header
-        table_data = [['الحصة'] + days]
+        table_data = [[_PERIOD_AR] + days]
         
         # Table rows
-        for period_num in sorted(periods.keys()):
-            row = [f"الحصة {period_num}"]
-            for day_idx in range(1, 6):
-                assignment = schedule_data['grid'].get((day_idx, period_num))
+        for period_label, day_assignments in zip(schedule_data['period_labels'], schedule_data['matrix']):
+            row = [period_label]
+            for assignment in day_assignments:
                 if assignment:
                     cell_text = f"{assignment['subject']}\n{assignment['teacher']}"
                 else:
-                    cell_text = "فارغ"
+                    cell_text = _EMPTY_CELL_AR
                 row.append(cell_text)
             table_data.append(row)
         
         # Create table
-        table = Table(table_data, repeatRows=1)
-        
-        # Table style
-        table.setStyle(TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#366092')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            
-            # Data cells
-            ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#D3D3D3')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ROWBACKGROUNDS', (1, 1), (-1, -1), [colors.white, colors.HexColor('#F5F5F5')])
-        ]))
+        table = rl.Table(table_data, repeatRows=1)
+        
+        # Table style: a fresh TableStyle per table from the shared commands, plus one
+        # background band per shaded (even) row; odd rows stay on the white page
+        row_band = pdf_styles['row_band']
+        style_commands = list(pdf_styles['table_commands']) + [
+            ('BACKGROUND', (1, row_idx), (-1, row_idx), row_band)
+            for row_idx in range(2, len(table_data), 2)
+        ]
+        table.setStyle(rl.TableStyle(style_commands))
         
         elements.append(table)
         
         # Add footer
-        elements.append(Spacer(1, 0.3*inch))
-        footer_style = ParagraphStyle('Footer', parent=styles['Normal'], alignment=TA_CENTER, fontSize=9, textColor=colors.grey)
-        elements.append(Paragraph(f"تم الإنشاء في: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
+        elements.append(rl.Spacer(1, 0.3*rl.inch))
+        elements.append(rl.Paragraph(f"تم الإنشاء في: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", pdf_styles['footer']))
         
         # Build PDF
         doc.build(elements)
@@ -408,7 +459,7 @@ class ExportService:
         format: str = "PNG",
         width: int = 1920,
         height: int = 1080
-    ) -> BytesIO:
+    ) -> BinaryIO:
         """
         Export schedule to image format (PNG/JPG)
         
@@ -419,51 +470,62 @@ class ExportService:
             height: Image height
             
         Returns:
-            BytesIO object with image file
+            Binary file object with the image (spooled to disk above IMAGE_SPOOL_MAX_SIZE)
         """
         if not PIL_AVAILABLE:
             raise ImportError("Pillow is not installed. Install it with: pip install Pillow")
         
+        pil = _load_pil()
+        
         # Get schedule data
         schedule_data = self._get_schedule_data(schedule_id)
         
         # Create image
-        img = Image.new('RGB', (width, height), color='white')
-        draw = ImageDraw.Draw(img)
+        img = pil.Image.new('RGB', (width, height), color='white')
+        draw = pil.ImageDraw.Draw(img)
         
-        # Try to use a font (fallback to default if not available)
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 40)
-            header_font = ImageFont.truetype("arial.ttf", 28)
-            cell_font = ImageFont.truetype("arial.ttf", 20)
-            small_font = ImageFont.truetype("arial.ttf", 16)
-        except:
-            title_font = ImageFont.load_default()
-            header_font = ImageFont.load_default()
-            cell_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
+        # Fonts opened once on the first image export
+        title_font = pil.fonts[40]
+        header_font = pil.fonts[28]
+        cell_font = pil.fonts[20]
+        small_font = pil.fonts[16]
         
         # Colors
         header_bg = '#366092'
         header_text = 'white'
         cell_border = 'black'
         
+        # Text sizes measured once per (text, font); textbbox is the costly call here and most
+        # strings (day names, "فارغ", repeated subjects/teachers) occur many times
+        text_sizes: Dict[tuple, tuple] = {}
+        
+        def text_size(text: str, font) -> tuple:
+            key = (text, id(font))
+            size = text_sizes.get(key)
+            if size is None:
+                bbox = draw.textbbox((0, 0), text, font=font)
+                size = text_sizes[key] = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+            return size
+        
+        def draw_centered(x: int, y: int, text: str, font, fill: str):
+            text_width, text_height = text_size(text, font)
+            draw.text((x + (cell_width - text_width) / 2, y + (cell_height - text_height) / 2),
+                     text, fill=fill, font=font)
+        
         # Draw title
         title = "الجدول الدراسي"
-        title_bbox = draw.textbbox((0, 0), title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
+        title_width, _ = text_size(title, title_font)
         draw.text(((width - title_width) / 2, 40), title, fill='#366092', font=title_font)
         
         # Draw info
         info_y = 100
         info_text = f"الصف: {schedule_data['class_name']} | الشعبة: {schedule_data['section'] or '1'} | الفترة: {schedule_data['session_type']} | السنة: {schedule_data['academic_year']}"
-        info_bbox = draw.textbbox((0, 0), info_text, font=small_font)
-        info_width = info_bbox[2] - info_bbox[0]
+        info_width, _ = text_size(info_text, small_font)
         draw.text(((width - info_width) / 2, info_y), info_text, fill='black', font=small_font)
         
         # Calculate table dimensions
-        periods = schedule_data['periods']
-        num_periods = len(periods)
+        period_numbers = schedule_data['period_numbers']
+        num_periods = len(period_numbers)
         num_days = 5
         
         table_start_y = 180
@@ -473,70 +535,56 @@ class ExportService:
         cell_width = table_width // (num_days + 1)
         cell_height = table_height // (num_periods + 1)
         
-        # Draw table header
-        x = 100
-        y = table_start_y
+        table_x = 100
+        table_end_x = table_x + cell_width * (num_days + 1)
+        table_end_y = table_start_y + cell_height * (num_periods + 1)
+        
+        # Backgrounds: header row and period column as one rectangle each (cells are white already)
+        draw.rectangle([table_x, table_start_y, table_end_x, table_start_y + cell_height], fill=header_bg)
+        if num_periods:
+            draw.rectangle([table_x, table_start_y + cell_height, table_x + cell_width, table_end_y], fill='#D3D3D3')
+        
+        # Grid lines in two passes instead of an outline per cell
+        for row_idx in range(num_periods + 2):
+            line_y = table_start_y + row_idx * cell_height
+            draw.line([(table_x, line_y), (table_end_x, line_y)], fill=cell_border)
+        for col_idx in range(num_days + 2):
+            line_x = table_x + col_idx * cell_width
+            draw.line([(line_x, table_start_y), (line_x, table_end_y)], fill=cell_border)
         
         # Header row
-        draw.rectangle([x, y, x + cell_width, y + cell_height], fill=header_bg, outline=cell_border)
-        header_text_bbox = draw.textbbox((0, 0), "الحصة", font=header_font)
-        text_width = header_text_bbox[2] - header_text_bbox[0]
-        text_height = header_text_bbox[3] - header_text_bbox[1]
-        draw.text((x + (cell_width - text_width) / 2, y + (cell_height - text_height) / 2), 
-                 "الحصة", fill=header_text, font=header_font)
-        
-        x += cell_width
-        for day in self.day_names[1:6]:
-            draw.rectangle([x, y, x + cell_width, y + cell_height], fill=header_bg, outline=cell_border)
-            day_bbox = draw.textbbox((0, 0), day, font=header_font)
-            text_width = day_bbox[2] - day_bbox[0]
-            text_height = day_bbox[3] - day_bbox[1]
-            draw.text((x + (cell_width - text_width) / 2, y + (cell_height - text_height) / 2), 
-                     day, fill=header_text, font=header_font)
+        x = table_x
+        y = table_start_y
+        for header in (_PERIOD_AR,) + self.day_names[1:6]:
+            draw_centered(x, y, header, header_font, header_text)
             x += cell_width
         
         # Data rows
         y += cell_height
-        for period_num in sorted(periods.keys()):
-            x = 100
+        for period_label, day_assignments in zip(schedule_data['period_labels'], schedule_data['matrix']):
+            x = table_x
             
             # Period number cell
-            draw.rectangle([x, y, x + cell_width, y + cell_height], fill='#D3D3D3', outline=cell_border)
-            period_text = f"الحصة {period_num}"
-            period_bbox = draw.textbbox((0, 0), period_text, font=cell_font)
-            text_width = period_bbox[2] - period_bbox[0]
-            text_height = period_bbox[3] - period_bbox[1]
-            draw.text((x + (cell_width - text_width) / 2, y + (cell_height - text_height) / 2), 
-                     period_text, fill='black', font=cell_font)
-            
+            draw_centered(x, y, period_label, cell_font, 'black')
             x += cell_width
             
             # Day cells
-            for day_idx in range(1, 6):
-                assignment = schedule_data['grid'].get((day_idx, period_num))
-                draw.rectangle([x, y, x + cell_width, y + cell_height], fill='white', outline=cell_border)
-                
+            for assignment in day_assignments:
                 if assignment:
                     subject_text = assignment['subject']
                     teacher_text = assignment['teacher']
                     
                     # Draw subject
-                    subject_bbox = draw.textbbox((0, 0), subject_text, font=cell_font)
-                    text_width = subject_bbox[2] - subject_bbox[0]
+                    text_width, _ = text_size(subject_text, cell_font)
                     draw.text((x + (cell_width - text_width) / 2, y + 10), 
                              subject_text, fill='black', font=cell_font)
                     
                     # Draw teacher
-                    teacher_bbox = draw.textbbox((0, 0), teacher_text, font=small_font)
-                    text_width = teacher_bbox[2] - teacher_bbox[0]
+                    text_width, _ = text_size(teacher_text, small_font)
                     draw.text((x + (cell_width - text_width) / 2, y + cell_height - 30), 
                              teacher_text, fill='#666666', font=small_font)
                 else:
-                    empty_bbox = draw.textbbox((0, 0), "فارغ", font=cell_font)
-                    text_width = empty_bbox[2] - empty_bbox[0]
-                    text_height = empty_bbox[3] - empty_bbox[1]
-                    draw.text((x + (cell_width - text_width) / 2, y + (cell_height - text_height) / 2), 
-                             "فارغ", fill='#999999', font=cell_font)
+                    draw_centered(x, y, _EMPTY_CELL_AR, cell_font, '#999999')
                 
                 x += cell_width
             
@@ -544,19 +592,65 @@ class ExportService:
         
         # Draw footer
         footer_text = f"تم الإنشاء في: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        footer_bbox = draw.textbbox((0, 0), footer_text, font=small_font)
-        text_width = footer_bbox[2] - footer_bbox[0]
+        text_width, _ = text_size(footer_text, small_font)
         draw.text(((width - text_width) / 2, height - 50), footer_text, fill='#999999', font=small_font)
         
-        # Save to BytesIO
-        output = BytesIO()
-        img.save(output, format=format.upper(), quality=95 if format.upper() == 'JPEG' else None)
+        # Save to a spooled temp file: typical exports stay in memory, large ones (4K and up)
+        # spill to disk instead of growing an in-memory buffer
+        output = SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_SIZE, mode='w+b')
+        image_format = format.upper()
+        if image_format in ('JPG', 'JPEG'):
+            img.save(output, format='JPEG', quality=85, optimize=True, progressive=True)
+        else:
+            # PNG has no quality setting; optimize makes the encoder pick the smallest output
+            img.save(output, format=image_format, optimize=True)
         output.seek(0)
         
         return output
     
+    def export_schedule_all(
+        self,
+        schedule_id: int,
+        formats: tuple = ("excel", "pdf", "image")
+    ) -> Dict[str, BinaryIO]:
+        """
+        Export a schedule to several formats at once
+        
+        Args:
+            schedule_id: Schedule ID
+            formats: Any of "excel", "pdf" and "image"
+            
+        Returns:
+            Dict mapping each requested format to its file object
+        """
+        exporters = {
+            "excel": self.export_schedule_excel,
+            "pdf": self.export_schedule_pdf,
+            "image": self.export_schedule_image,
+        }
+        unknown = set(formats) - exporters.keys()
+        if unknown:
+            raise ValueError(f"Unsupported export format(s): {', '.join(sorted(unknown))}")
+        
+        # Load the data on this thread so the session is never touched by the workers;
+        # each renderer then reads it from the per-instance cache
+        self._get_schedule_data(schedule_id)
+        
+        # openpyxl, ReportLab and Pillow are independent, so the renderers run side by side
+        with ThreadPoolExecutor(max_workers=len(formats) or 1) as pool:
+            futures = {fmt: pool.submit(exporters[fmt], schedule_id) for fmt in formats}
+            return {fmt: future.result() for fmt, future in futures.items()}
+    
+    def invalidate_schedule(self, schedule_id: int):
+        """Drop cached export data for a schedule after it has been modified"""
+        self._schedule_cache.pop(schedule_id, None)
+    
     def _get_schedule_data(self, schedule_id: int) -> Dict[str, Any]:
-        """Get schedule data for export"""
+        """Get schedule data for export (cached per instance)"""
+        cached = self._schedule_cache.get(schedule_id)
+        if cached is not None:
+            return cached
+        
         schedule = self.db.query(Schedule).filter(Schedule.id == schedule_id).first()
         if not schedule:
             raise ValueError(f"Schedule with ID {schedule_id} not found")
@@ -567,14 +661,8 @@ class ExportService:
 
         class_obj = self.db.query(Class).filter(Class.id == schedule.class_id).first()
 
-        grade_level_ar = {
-            "primary": "ابتدائي",
-            "intermediate": "إعدادي",
-            "secondary": "ثانوي"
-        }
-
         class_name = (
-            f"الصف {class_obj.grade_number} {grade_level_ar.get(class_obj.grade_level, '')}"
+            f"الصف {class_obj.grade_number} {_GRADE_LEVEL_AR.get(class_obj.grade_level, '')}"
             if class_obj else "Unknown"
         )
 
@@ -582,7 +670,18 @@ class ExportService:
         periods: Dict[int, bool] = {}
 
         # In production data, each period may be stored directly as a Schedule row.
-        related_schedules = self.db.query(Schedule).filter(
+        # Subject and teacher names come from outer joins in the same query
+        related_schedules = self.db.query(
+            Schedule.day_of_week,
+            Schedule.period_number,
+            Schedule.description,
+            Subject.subject_name,
+            Teacher.full_name
+        ).outerjoin(
+            Subject, Subject.id == Schedule.subject_id
+        ).outerjoin(
+            Teacher, Teacher.id == Schedule.teacher_id
+        ).filter(
             Schedule.class_id == schedule.class_id,
             Schedule.section == schedule.section,
             Schedule.academic_year_id == schedule.academic_year_id,
@@ -590,26 +689,13 @@ class ExportService:
         ).all()
 
         if related_schedules:
-            subject_ids = {row.subject_id for row in related_schedules if row.subject_id}
-            teacher_ids = {row.teacher_id for row in related_schedules if row.teacher_id}
-
-            subjects_map = {
-                subj.id: subj.subject_name
-                for subj in self.db.query(Subject).filter(Subject.id.in_(subject_ids)).all()
-            } if subject_ids else {}
-
-            teachers_map = {
-                teacher.id: teacher.full_name
-                for teacher in self.db.query(Teacher).filter(Teacher.id.in_(teacher_ids)).all()
-            } if teacher_ids else {}
-
             for row in related_schedules:
                 if row.day_of_week is None or row.period_number is None:
                     continue
 
                 grid[(row.day_of_week, row.period_number)] = {
-                    'subject': subjects_map.get(row.subject_id, "Unknown"),
-                    'teacher': teachers_map.get(row.teacher_id, "Unknown"),
+                    'subject': row.subject_name or "Unknown",
+                    'teacher': row.full_name or "Unknown",
                     'room': row.description or ""
                 }
 
@@ -620,31 +706,57 @@ class ExportService:
                 ScheduleAssignment.schedule_id == schedule_id
             ).all()
 
+            time_slot_ids = {row.time_slot_id for row in assignments if row.time_slot_id}
+            subject_ids = {row.subject_id for row in assignments if row.subject_id}
+            teacher_ids = {row.teacher_id for row in assignments if row.teacher_id}
+
+            time_slots_map = {
+                slot_id: (day_of_week, period_number)
+                for slot_id, day_of_week, period_number in self.db.query(
+                    TimeSlot.id, TimeSlot.day_of_week, TimeSlot.period_number
+                ).filter(TimeSlot.id.in_(time_slot_ids)).all()
+            } if time_slot_ids else {}
+
+            subjects_map = dict(
+                self.db.query(Subject.id, Subject.subject_name).filter(Subject.id.in_(subject_ids)).all()
+            ) if subject_ids else {}
+
+            teachers_map = dict(
+                self.db.query(Teacher.id, Teacher.full_name).filter(Teacher.id.in_(teacher_ids)).all()
+            ) if teacher_ids else {}
+
             for assignment in assignments:
-                time_slot = self.db.query(TimeSlot).filter(TimeSlot.id == assignment.time_slot_id).first()
+                time_slot = time_slots_map.get(assignment.time_slot_id)
                 if not time_slot:
                     continue
 
-                subject = self.db.query(Subject).filter(Subject.id == assignment.subject_id).first()
-                teacher = self.db.query(Teacher).filter(Teacher.id == assignment.teacher_id).first()
-
-                day = time_slot.day_of_week
-                period = time_slot.period_number
+                day, period = time_slot
 
                 grid[(day, period)] = {
-                    'subject': subject.subject_name if subject else "Unknown",
-                    'teacher': teacher.full_name if teacher else "Unknown",
+                    'subject': subjects_map.get(assignment.subject_id, "Unknown"),
+                    'teacher': teachers_map.get(assignment.teacher_id, "Unknown"),
                     'room': assignment.room or ""
                 }
 
                 periods[period] = True
 
-        return {
+        # Period rows in order, each holding the assignments for days 1-5 (Sunday-Thursday),
+        # with their row labels; shared by the Excel, PDF and image exporters
+        period_numbers = sorted(periods)
+        period_labels = [f"{_PERIOD_AR} {period_num}" for period_num in period_numbers]
+        matrix = [[grid.get((day_idx, period_num)) for day_idx in range(1, 6)] for period_num in period_numbers]
+
+        schedule_data = {
             'schedule_id': schedule_id,
             'class_name': class_name,
             'section': schedule.section,
-            'session_type': "صباحي" if schedule.session_type == "morning" else "مسائي",
+            'session_type': _SESSION_AR.get(schedule.session_type, "مسائي"),
             'academic_year': academic_year.year_name if academic_year else "Unknown",
             'grid': grid,
-            'periods': periods
+            'periods': periods,
+            'period_numbers': period_numbers,
+            'period_labels': period_labels,
+            'matrix': matrix
         }
+        self._schedule_cache[schedule_id] = schedule_data
+        return schedule_data
@@ -3,6 +3,7 @@ Advanced Schedule Generation Service
 Handles automatic schedule creation with conflict detection and optimization
 """
 
+import logging
 import time
 from typing import List, Dict, Tuple, Optional, Set, Any
 from datetime import datetime, date, time as dt_time, timedelta
@@ -29,6 +30,8 @@ from ..core.exceptions import (
     InsufficientDataError
 )
 
+logger = logging.getLogger(__name__)
+
 class ScheduleGenerationService:
     """Advanced schedule generation with AI-like optimization"""
     
@@ -59,7 +62,7 @@ class ScheduleGenerationService:
         validation_results: Optional[Dict] = None
     ):
         """
-        Print all database data being used for schedule generation
+        Log all database data being used for schedule generation (DEBUG only)
         
         Args:
             academic_year_id: Academic year ID
@@ -71,71 +74,83 @@ class ScheduleGenerationService:
             teachers: List of teachers
             validation_results: Optional validation results
         """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        
         import json
+        from collections import Counter, defaultdict
         from datetime import datetime
         
-        print("\n" + "="*80)
-        print("=== بيانات قاعدة البيانات المستخدمة ===")
-        print(f"التاريخ والوقت: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*80)
+        lines = []
+        lines.append("\n" + "="*80)
+        lines.append("=== بيانات قاعدة البيانات المستخدمة ===")
+        lines.append(f"التاريخ والوقت: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append("="*80)
         
         # Section 1: Academic Year Info
-        print(f"\n📚 السنة الدراسية:")
+        lines.append(f"\n📚 السنة الدراسية:")
         academic_year = self.db.query(AcademicYear).filter(AcademicYear.id == academic_year_id).first()
         if academic_year:
-            print(f"  - المعرف: {academic_year.id}")
-            print(f"  - الاسم: {academic_year.year_name}")
-            print(f"  - نشطة: {'نعم' if academic_year.is_active else 'لا'}")
+            lines.append(f"  - المعرف: {academic_year.id}")
+            lines.append(f"  - الاسم: {academic_year.year_name}")
+            lines.append(f"  - نشطة: {'نعم' if academic_year.is_active else 'لا'}")
         else:
-            print(f"  - لم يتم العثور على السنة الدراسية (ID: {academic_year_id})")
+            lines.append(f"  - لم يتم العثور على السنة الدراسية (ID: {academic_year_id})")
         
         # Section 2: Classes
-        print(f"\n🏫 الصفوف (عدد: {len(classes)}):")
+        lines.append(f"\n🏫 الصفوف (عدد: {len(classes)}):")
         for cls in classes:
-            print(f"  - المعرف: {cls.id}, الاسم: الصف {cls.grade_number} {cls.grade_level}, الفترة: {cls.session_type}")
+            lines.append(f"  - المعرف: {cls.id}, الاسم: الصف {cls.grade_number} {cls.grade_level}, الفترة: {cls.session_type}")
         
         # Section 3: Subjects
-        print(f"\n📖 المواد (عدد: {len(subjects)}):")
+        lines.append(f"\n📖 المواد (عدد: {len(subjects)}):")
         for subject in subjects:
             weekly_hours = getattr(subject, 'weekly_hours', 0) or getattr(subject, 'periods_per_week', 0)
-            print(f"  - المعرف: {subject.id}, الاسم: {subject.subject_name}, الحصص المطلوبة: {weekly_hours}")
+            lines.append(f"  - المعرف: {subject.id}, الاسم: {subject.subject_name}, الحصص المطلوبة: {weekly_hours}")
         
         # Section 4: Teachers
-        print(f"\n👨‍🏫 المعلمين (عدد: {len(teachers)}):")
+        lines.append(f"\n👨‍🏫 المعلمين (عدد: {len(teachers)}):")
         for teacher in teachers:
-            print(f"\n  المعرف: {teacher.id}, الاسم: {teacher.full_name}")
+            lines.append(f"\n  المعرف: {teacher.id}, الاسم: {teacher.full_name}")
             
             # Parse and display free_time_slots
             try:
                 if teacher.free_time_slots:
                     slots = json.loads(teacher.free_time_slots)
-                    # Count free slots
-                    free_count = sum(1 for s in slots if s.get('status') == 'free' or s.get('is_free', False))
-                    assigned_count = sum(1 for s in slots if s.get('status') == 'assigned')
-                    unavailable_count = sum(1 for s in slots if s.get('status') == 'unavailable')
+                    # Count statuses and collect free periods per day in one pass
+                    day_names = ["الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس"]
+                    counts = Counter()
+                    free_by_day = defaultdict(list)
+                    for s in slots:
+                        status = s.get('status')
+                        is_free = status == 'free' or s.get('is_free', False)
+                        if is_free:
+                            counts['free'] += 1
+                            day = s.get('day')
+                            if day in range(len(day_names)):
+                                free_by_day[day].append(s.get('period') + 1)
+                        if status in ('assigned', 'unavailable'):
+                            counts[status] += 1
                     
-                    print(f"    أوقات الفراغ: حرة={free_count}, مشغولة={assigned_count}, غير متاحة={unavailable_count}")
+                    lines.append(f"    أوقات الفراغ: حرة={counts['free']}, مشغولة={counts['assigned']}, غير متاحة={counts['unavailable']}")
                     
                     # Show free slots by day
-                    day_names = ["الأحد", "الاثنين", "الثلاثاء", "الأربعاء", "الخميس"]
-                    for day_idx in range(5):
-                        day_slots = [s for s in slots if s.get('day') == day_idx]
-                        free_periods = [s.get('period') + 1 for s in day_slots if s.get('status') == 'free' or s.get('is_free', False)]
-                        if free_periods:
-                            print(f"    - {day_names[day_idx]}: {free_periods}")
+                    for day_idx, day_name in enumerate(day_names):
+                        if free_by_day[day_idx]:
+                            lines.append(f"    - {day_name}: {free_by_day[day_idx]}")
                 else:
-                    print("    أوقات الفراغ: غير محددة")
+                    lines.append("    أوقات الفراغ: غير محددة")
             except Exception as e:
-                print(f"    خطأ في قراءة أوقات الفراغ: {e}")
+                lines.append(f"    خطأ في قراءة أوقات الفراغ: {e}")
         
         # Section 5: Time Slots Available
-        print(f"\n⏰ الفترات الزمنية المتاحة:")
-        print(f"  - الأيام: الأحد، الاثنين، الثلاثاء، الأربعاء، الخميس (5 أيام)")
-        print(f"  - الحصص: 1-6 (6 حصص في اليوم)")
-        print(f"  - المجموع: 30 فترة زمنية في الأسبوع")
+        lines.append(f"\n⏰ الفترات الزمنية المتاحة:")
+        lines.append(f"  - الأيام: الأحد، الاثنين، الثلاثاء، الأربعاء، الخميس (5 أيام)")
+        lines.append(f"  - الحصص: 1-6 (6 حصص في اليوم)")
+        lines.append(f"  - المجموع: 30 فترة زمنية في الأسبوع")
         
         # Section 6: Active Constraints
-        print(f"\n⚠️ القيود النشطة:")
+        lines.append(f"\n⚠️ القيود النشطة:")
         try:
             constraints = self.db.query(ScheduleConstraint).filter(
                 ScheduleConstraint.academic_year_id == academic_year_id,
@@ -143,43 +158,44 @@ class ScheduleGenerationService:
             ).all()
             
             if constraints:
-                print(f"  (عدد: {len(constraints)})")
+                lines.append(f"  (عدد: {len(constraints)})")
                 for constraint in constraints:
                     priority_names = {1: "منخفض", 2: "متوسط", 3: "عالي", 4: "حرج"}
                     priority = priority_names.get(constraint.priority_level, str(constraint.priority_level))
-                    print(f"  - النوع: {constraint.constraint_type}, الأولوية: {priority}")
+                    lines.append(f"  - النوع: {constraint.constraint_type}, الأولوية: {priority}")
                     if constraint.description:
-                        print(f"    الوصف: {constraint.description}")
+                        lines.append(f"    الوصف: {constraint.description}")
             else:
-                print("  - لا توجد قيود نشطة")
+                lines.append("  - لا توجد قيود نشطة")
         except Exception as e:
-            print(f"  - خطأ في قراءة القيود: {e}")
+            lines.append(f"  - خطأ في قراءة القيود: {e}")
         
         # Section 7: Validation Results
         if validation_results:
-            print(f"\n✅ نتائج التحقق:")
-            print(f"  - صالح: {'نعم' if validation_results.get('is_valid') else 'لا'}")
-            print(f"  - يمكن المتابعة: {'نعم' if validation_results.get('can_proceed') else 'لا'}")
+            lines.append(f"\n✅ نتائج التحقق:")
+            lines.append(f"  - صالح: {'نعم' if validation_results.get('is_valid') else 'لا'}")
+            lines.append(f"  - يمكن المتابعة: {'نعم' if validation_results.get('can_proceed') else 'لا'}")
             
             summary = validation_results.get('summary', {})
             if summary:
-                print(f"  - إجمالي المواد: {summary.get('total_subjects', 0)}")
-                print(f"  - المواد مع معلمين: {summary.get('subjects_with_teachers', 0)}")
-                print(f"  - المعلمين بأوقات كافية: {summary.get('teachers_with_sufficient_time', 0)}")
+                lines.append(f"  - إجمالي المواد: {summary.get('total_subjects', 0)}")
+                lines.append(f"  - المواد مع معلمين: {summary.get('subjects_with_teachers', 0)}")
+                lines.append(f"  - المعلمين بأوقات كافية: {summary.get('teachers_with_sufficient_time', 0)}")
             
             errors = validation_results.get('errors', [])
             if errors:
-                print(f"\n  ⚠️ الأخطاء ({len(errors)}):")
+                lines.append(f"\n  ⚠️ الأخطاء ({len(errors)}):")
                 for error in errors:
-                    print(f"    - {error}")
+                    lines.append(f"    - {error}")
             
             warnings = validation_results.get('warnings', [])
             if warnings:
-                print(f"\n  ⚠️ التحذيرات ({len(warnings)}):")
+                lines.append(f"\n  ⚠️ التحذيرات ({len(warnings)}):")
                 for warning in warnings:
-                    print(f"    - {warning}")
+                    lines.append(f"    - {warning}")
         
-        print("\n" + "="*80 + "\n")
+        lines.append("\n" + "="*80 + "\n")
+        logger.debug("\n".join(lines))
     
     def _print_generated_schedule_markdown(
         self,
@@ -188,16 +204,36 @@ class ScheduleGenerationService:
         save_to_file: bool = False
     ):
         """
-        Generate and print schedule in markdown table format
+        Generate and log schedule in markdown table format
         
         Args:
             schedule_entries: List of schedule entries
             class_info: Class information dictionary
-            save_to_file: Whether to save to file (default: False, just print)
+            save_to_file: Whether to save to file (default: False, just log at DEBUG)
         """
         from datetime import datetime
         import os
         
+        # Check for conflicts (each clashing teacher/day/period reported once)
+        conflicts = []
+        seen_slots = set()
+        conflicting_slots = set()
+        for entry in schedule_entries:
+            key = (entry.teacher_id, entry.day_of_week, entry.period_number)
+            if key not in seen_slots:
+                seen_slots.add(key)
+            elif key not in conflicting_slots:
+                conflicting_slots.add(key)
+                conflicts.append({
+                    'teacher_id': entry.teacher_id,
+                    'day': entry.day_of_week,
+                    'period': entry.period_number
+                })
+        
+        # Nothing to render unless it is logged or saved
+        if not save_to_file and not logger.isEnabledFor(logging.DEBUG):
+            return len(conflicts) == 0
+        
         # Get class and teacher info
         class_name = class_info.get('class_name', 'Unknown')
         section = class_info.get('section', '1')
@@ -217,18 +253,21 @@ class ScheduleGenerationService:
             key = (entry.day_of_week, entry.period_number)
             schedule_grid[key] = entry
         
-        # Get subject and teacher names
-        subject_cache = {}
-        teacher_cache = {}
+        # Get subject and teacher names (one query each; placeholders only for missing ids)
+        subject_ids = {entry.subject_id for entry in schedule_entries}
+        teacher_ids = {entry.teacher_id for entry in schedule_entries}
         
-        for entry in schedule_entries:
-            if entry.subject_id not in subject_cache:
-                subject = self.db.query(Subject).filter(Subject.id == entry.subject_id).first()
-                subject_cache[entry.subject_id] = subject.subject_name if subject else f"مادة {entry.subject_id}"
-            
-            if entry.teacher_id not in teacher_cache:
-                teacher = self.db.query(Teacher).filter(Teacher.id == entry.teacher_id).first()
-                teacher_cache[entry.teacher_id] = teacher.full_name if teacher else f"معلم {entry.teacher_id}"
+        subject_cache = dict(
+            self.db.query(Subject.id, Subject.subject_name).filter(Subject.id.in_(subject_ids)).all()
+        ) if subject_ids else {}
+        teacher_cache = dict(
+            self.db.query(Teacher.id, Teacher.full_name).filter(Teacher.id.in_(teacher_ids)).all()
+        ) if teacher_ids else {}
+        
+        for subject_id in subject_ids - subject_cache.keys():
+            subject_cache[subject_id] = f"مادة {subject_id}"
+        for teacher_id in teacher_ids - teacher_cache.keys():
+            teacher_cache[teacher_id] = f"معلم {teacher_id}"
         
         # Build table header
         markdown.append("| الحصة | " + " | ".join(day_names) + " |")
@@ -258,20 +297,6 @@ class ScheduleGenerationService:
         unique_subjects = len(set(e.subject_id for e in schedule_entries))
         unique_teachers = len(set(e.teacher_id for e in schedule_entries))
         
-        # Check for conflicts
-        conflicts = []
-        teacher_schedule = {}
-        for entry in schedule_entries:
-            key = (entry.teacher_id, entry.day_of_week, entry.period_number)
-            if key in teacher_schedule:
-                conflicts.append({
-                    'teacher_id': entry.teacher_id,
-                    'day': entry.day_of_week,
-                    'period': entry.period_number
-                })
-            else:
-                teacher_schedule[key] = entry
-        
         markdown.append(f"- **إجمالي الحصص:** {total_periods}")
         markdown.append(f"- **عدد المواد:** {unique_subjects}")
         markdown.append(f"- **عدد المعلمين:** {unique_teachers}")
@@ -290,10 +315,8 @@ class ScheduleGenerationService:
         # Join all markdown lines
         markdown_text = "\n".join(markdown)
         
-        # Print to console
-        print("\n" + "="*80)
-        print(markdown_text)
-        print("="*80 + "\n")
+        # Log to console
+        logger.debug("\n%s\n%s\n%s\n", "="*80, markdown_text, "="*80)
         
         # Save to file if requested
         if save_to_file:
@@ -310,9 +333,9 @@ class ScheduleGenerationService:
                 with open(filename, 'w', encoding='utf-8') as f:
                     f.write(markdown_text)
                 
-                print(f"✅ تم حفظ الجدول في: {filename}")
+                logger.debug(f"✅ تم حفظ الجدول في: {filename}")
             except Exception as e:
-                print(f"⚠️ فشل حفظ الملف: {e}")
+                logger.warning(f"⚠️ فشل حفظ الملف: {e}")
         
         # Return validation status
         return len(conflicts) == 0
@@ -2770,8 +2793,8 @@ class ScheduleGenerationService:
                         conflict.conflict_type = "teacher_double_booking"
                         conflict.severity = "high"
                         conflict.description = f"Teacher {assignment.teacher_id} assigned to multiple classes at same time"
-                        conflict.affected_assignments = str([teacher_schedule[key], assignment.id])  # Convert to JSON string
-                        conflict.resolution_suggestions = str(["Reassign one of the classes to different teacher", "Move one assignment to different time slot"])  # Convert to JSON string
+                        conflict.affected_assignments = [teacher_schedule[key], assignment.id]
+                        conflict.resolution_suggestions = ["Reassign one of the classes to different teacher", "Move one assignment to different time slot"]
                         conflicts.append(conflict)
                     else:
                         teacher_schedule[key] = assignment.id
@@ -2803,8 +2826,8 @@ class ScheduleGenerationService:
                         conflict.conflict_type = "room_conflict"
                         conflict.severity = "medium"
                         conflict.description = f"Room {assignment.room} assigned to multiple classes at same time"
-                        conflict.affected_assignments = str([room_schedule[key], assignment.id])  # Convert to JSON string
-                        conflict.resolution_suggestions = str(["Assign different room to one class", "Move one assignment to different time slot"])  # Convert to JSON string
+                        conflict.affected_assignments = [room_schedule[key], assignment.id]
+                        conflict.resolution_suggestions = ["Assign different room to one class", "Move one assignment to different time slot"]
                         conflicts.append(conflict)
                     else:
                         room_schedule[key] = assignment.id
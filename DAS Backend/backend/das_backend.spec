@@ -47,6 +47,8 @@ a = Analysis(
         'pydantic',
         'pydantic_core',
         'pydantic.deprecated.decorator',
+        'orjson',
+        'zstandard',
         # SQLAlchemy & SQLCipher
         'sqlalchemy.dialects.sqlite',
         'sqlalchemy.ext.declarative',
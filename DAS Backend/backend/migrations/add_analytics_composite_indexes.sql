@@ -0,0 +1,16 @@
+-- Migration: Add composite indexes for analytics dashboard queries
+-- Date: 2026-10-16
+-- Description: Lets the dashboard COUNT/GROUP BY queries be answered from the index
+-- instead of reading every matching row of the table.
+
+CREATE INDEX IF NOT EXISTS ix_student_ay_active_session_grade
+ON students (academic_year_id, is_active, session_type, grade_level, grade_number);
+
+CREATE INDEX IF NOT EXISTS ix_teacher_ay_session_active
+ON teachers (academic_year_id, session_type, is_active);
+
+CREATE INDEX IF NOT EXISTS ix_sda_ay_date_present
+ON student_daily_attendances (academic_year_id, attendance_date, is_present);
+
+CREATE INDEX IF NOT EXISTS ix_academic_ay_student_subject
+ON student_academics (academic_year_id, student_id, subject_id);
@@ -0,0 +1,10 @@
+-- Migration: Add parent folder indexes for director notes
+-- Date: 2026-10-16
+-- Description: Lets list_items walk one folder level of a category, and the recursive folder
+-- delete/rename find children, without scanning the whole table.
+
+CREATE INDEX IF NOT EXISTS ix_director_note_ay_type_parent
+ON director_notes (academic_year_id, folder_type, parent_folder_id);
+
+CREATE INDEX IF NOT EXISTS ix_director_note_parent_folder
+ON director_notes (parent_folder_id, is_folder);
@@ -0,0 +1,7 @@
+-- Migration: Add unique path index for director notes
+-- Date: 2026-10-16
+-- Description: One note per path (and file/folder type) within a category; also serves the
+-- existence check done before creating a file or folder.
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_director_note_path
+ON director_notes (academic_year_id, folder_type, file_path, is_folder);
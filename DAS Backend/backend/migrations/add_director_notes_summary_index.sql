@@ -0,0 +1,6 @@
+-- Migration: Add composite index for director notes category summary
+-- Date: 2026-10-16
+-- Description: Lets the per-category file/folder counts be grouped straight from the index.
+
+CREATE INDEX IF NOT EXISTS ix_director_note_ay_type_folder
+ON director_notes (academic_year_id, folder_type, is_folder);
@@ -0,0 +1,14 @@
+-- Migration: Add (student_id, academic_year_id) indexes for per-student analytics
+-- Date: 2026-10-16
+-- Description: Lets the student finance, payment and behavior lookups seek straight to one
+-- student's rows for a year. student_academics is already covered by
+-- ix_academic_ay_student_subject.
+
+CREATE INDEX IF NOT EXISTS ix_finance_student_ay
+ON student_finances (student_id, academic_year_id);
+
+CREATE INDEX IF NOT EXISTS ix_payment_student_ay_amount
+ON student_payments (student_id, academic_year_id, payment_amount);
+
+CREATE INDEX IF NOT EXISTS ix_behavior_student_ay_date
+ON student_behavior_records (student_id, academic_year_id, record_date);
@@ -0,0 +1,11 @@
+-- Migration: Store schedule conflict lists as JSON
+-- Date: 2026-10-16
+-- Description: affected_assignments and resolution_suggestions are now JSON columns.
+-- Older rows were written with Python's str() (single-quoted lists), which is not valid JSON.
+-- SQLite stores JSON as TEXT, so only the data needs converting; the column type is unchanged.
+
+UPDATE schedule_conflicts
+SET affected_assignments = replace(affected_assignments, '''', '"'),
+    resolution_suggestions = replace(resolution_suggestions, '''', '"')
+WHERE NOT json_valid(COALESCE(affected_assignments, '[]'))
+   OR NOT json_valid(COALESCE(resolution_suggestions, '[]'));
@@ -2,6 +2,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
+from app.database import SessionLocal
 from app.services.analytics_service import AnalyticsService
 
 service = AnalyticsService()
@@ -11,7 +12,11 @@ print("اختبار حساب متوسط العلامات الجديد")
 print("="*80 + "\n")
 
 # Get school-wide grades
-results = service.get_school_wide_grades(academic_year_id=1)
+db = SessionLocal()
+try:
+    results = service.get_school_wide_grades(db, academic_year_id=1)
+finally:
+    db.close()
 
 # Find final exam (امتحان 2)
 for item in results: